@@ -32,11 +32,13 @@ from satirical_agent.integrated_daily_mash_system import IntegratedDailyMashSyst
 # Import agentic workflow components
 from backend_functions.job_queue_manager import JobQueueManager, JobStatus
 from backend_functions.agentic_video_worker import (
-    start_agentic_workforce, stop_agentic_workforce, get_workforce_status
+    start_agentic_workforce, stop_agentic_workforce, get_workforce_status,
+    configure_logging as configure_worker_logging
 )
 from agents.topic_generation_agent import TopicGenerationAgent
 from backend_functions.oauth_credentials_manager import get_oauth_manager
 from backend_functions.cloudflare_storage_manager import get_cloudflare_manager
+from backend_functions.cleanup_utils import configure_logging as configure_cleanup_logging
 
 # Legacy imports for compatibility (fallback)
 try:
@@ -47,6 +49,10 @@ except ImportError:
 app = Flask(__name__, static_folder='static')
 CORS(app)
 
+# Print worker and cleanup logs unless logging was configured before startup
+configure_worker_logging()
+configure_cleanup_logging()
+
 # Configuration - Akash integration removed
 
 # In-memory job storage (use Redis in production)
@@ -1317,7 +1323,9 @@ def start_agentic_workforce_endpoint():
                 "status": get_workforce_status()
             })
         
-        agentic_workforce = start_agentic_workforce(num_workers)
+        agentic_workforce = start_agentic_workforce(
+            num_workers, job_queue_manager, topic_generation_agent
+        )
         
         return jsonify({
             "success": True,
@@ -1562,6 +1570,57 @@ def cancel_agentic_job(job_id: str):
             "message": "Failed to cancel job"
         }), 500
 
+@app.route("/agentic/dlq", methods=["GET"])
+def list_agentic_dlq():
+    """List jobs in the dead-letter queue"""
+    try:
+        if not job_queue_manager:
+            return jsonify({"error": "Job queue manager not initialized"}), 500
+        
+        dead_jobs = job_queue_manager.list_dlq()
+        
+        return jsonify({
+            "success": True,
+            "dead_letter_jobs": dead_jobs,
+            "count": len(dead_jobs),
+            "timestamp": datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "message": "Failed to list dead-letter queue"
+        }), 500
+
+@app.route("/agentic/dlq/replay/<job_id>", methods=["POST"])
+def replay_agentic_dlq_job(job_id: str):
+    """Move a dead-lettered job back to the queue"""
+    try:
+        if not job_queue_manager:
+            return jsonify({"error": "Job queue manager not initialized"}), 500
+        
+        success = job_queue_manager.replay_dlq_job(job_id)
+        
+        if success:
+            return jsonify({
+                "success": True,
+                "message": f"Job {job_id} replayed from dead-letter queue",
+                "timestamp": datetime.now().isoformat()
+            })
+        else:
+            return jsonify({
+                "success": False,
+                "message": "Job not found in dead-letter queue"
+            }), 404
+        
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "message": "Failed to replay job"
+        }), 500
+
 @app.route("/agentic/auto-workflow", methods=["POST"])
 def start_auto_workflow():
     """Start complete automated workflow: generate topics -> add jobs -> start workers"""
@@ -1601,7 +1660,9 @@ def start_auto_workflow():
         global agentic_workforce
         workforce_status = get_workforce_status()
         if not workforce_status or not workforce_status.get("is_running"):
-            agentic_workforce = start_agentic_workforce(num_workers)
+            agentic_workforce = start_agentic_workforce(
+                num_workers, job_queue_manager, topic_generation_agent
+            )
             workflow_results["stage_3_workforce"] = {
                 "success": True,
                 "workers_started": num_workers,
@@ -2594,7 +2655,7 @@ def upload_youtube_from_cloudflare():
         if job_id:
             if job_id not in cloudflare_manager.storage_records:
                 return jsonify({"error": "Video not found in Cloudflare storage"}), 404
-            video_record = cloudflare_manager.storage_records[job_id]
+            video_record = cloudflare_manager.storage_records[job_id].to_dict()
         else:
             # Get the oldest video from Cloudflare for upload
             stored_videos = cloudflare_manager.get_stored_videos()
@@ -6,9 +6,13 @@ Automatically processes video generation jobs from the queue
 import os
 import sys
 import time
+import queue
+import logging
+import logging.handlers
 import threading
 import signal
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
 
 # Add project root to path
@@ -16,9 +20,34 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import required modules
 from backend_functions.job_queue_manager import JobQueueManager, JobStatus
-from backend_functions.story_video_generator import generate_story_video
+from backend_functions.story_video_generator import generate_story_video, generate_story_video_batch
 from agents.topic_generation_agent import TopicGenerationAgent
 
+# Messages are only formatted when a handler is enabled for their level;
+# handlers are left to the application (see configure_logging)
+log = logging.getLogger("agentic.worker")
+_log_listener = None
+
+def configure_logging(level: int = logging.INFO):
+    """
+    Print worker messages to stderr unless the application configured logging
+    
+    Records go through a queue drained by a background listener, so emitting
+    one never blocks a worker on the stream. Does nothing if the worker logger
+    or any of its ancestors already has a handler.
+    """
+    global _log_listener
+    if log.hasHandlers():
+        return
+    
+    log.setLevel(level)
+    log_queue = queue.Queue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(message)s'))
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+    log.addHandler(logging.handlers.QueueHandler(log_queue))
+
 class AgenticVideoWorker:
     """
     Autonomous worker that processes video generation jobs
@@ -28,180 +57,312 @@ class AgenticVideoWorker:
                  worker_id: str = "worker-1",
                  poll_interval: int = 10,
                  max_retries: int = 2,
-                 auto_refill_queue: bool = True):
+                 retry_backoff_seconds: int = 30,
+                 auto_refill_queue: bool = True,
+                 queue_tier: Optional[str] = None,
+                 batch_size: int = 3,
+                 domain_affinity: Optional[Tuple[int, int]] = None,
+                 job_manager: Optional[JobQueueManager] = None,
+                 topic_agent: Optional[TopicGenerationAgent] = None):
         
         self.worker_id = worker_id
         self.poll_interval = poll_interval
         self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
         self.auto_refill_queue = auto_refill_queue
+        self.queue_tier = queue_tier  # None = take jobs from any tier
+        self.batch_size = max(1, batch_size)
+        self.domain_affinity = domain_affinity  # (slot, num_slots) or None
         
-        # Initialize components
-        self.job_manager = JobQueueManager()
-        self.topic_agent = TopicGenerationAgent() if auto_refill_queue else None
+        # Initialize components (shared instances are passed in by the workforce)
+        self.job_manager = job_manager or JobQueueManager()
+        if auto_refill_queue:
+            self.topic_agent = topic_agent or TopicGenerationAgent()
+        else:
+            self.topic_agent = None
         
         # Worker state
         self.is_running = False
         self.current_job_id = None
         self.worker_thread = None
+        self.refill_thread = None
+        self._prefetch_executor = None  # Looks up the next batch while one is processing
+        self._prefetch_future = None
+        self._stop_event = threading.Event()  # Wakes the loop out of its poll sleep
         
-        # Statistics
+        # Statistics (timestamps kept as time.time_ns() and formatted on demand)
         self.stats = {
             "jobs_processed": 0,
             "jobs_completed": 0,
             "jobs_failed": 0,
+            "jobs_retried": 0,
             "started_at": None,
             "last_activity": None
         }
         
-        print(f"[WORKER {worker_id}] Initialized agentic video worker")
+        # Bumped on every stats mutation; get_worker_status() reuses its last
+        # snapshot while nothing it reports has changed
+        self._stats_version = 0
+        self._status_cache_key = None
+        self._status_cache = None
+        
+        log.info("[WORKER %s] Initialized agentic video worker (tier: %s)", worker_id, queue_tier or 'any')
     
     def start(self):
         """Start the worker in a separate thread"""
         if self.is_running:
-            print(f"[WORKER {self.worker_id}] Already running")
+            log.info("[WORKER %s] Already running", self.worker_id)
             return
         
         self.is_running = True
-        self.stats["started_at"] = datetime.now()
+        self._stop_event.clear()
+        self.stats["started_at"] = time.time_ns()
+        self._stats_version += 1
+        
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=1)
+        self._prefetch_future = None
         
         self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
         self.worker_thread.start()
         
-        print(f"[WORKER {self.worker_id}] Started")
+        if self.topic_agent:
+            self.refill_thread = threading.Thread(target=self._refill_loop, daemon=True)
+            self.refill_thread.start()
+        
+        log.info("[WORKER %s] Started", self.worker_id)
     
-    def stop(self):
-        """Stop the worker"""
+    def request_stop(self):
+        """Signal the worker loop to exit without waiting for it"""
         if not self.is_running:
             return
         
-        print(f"[WORKER {self.worker_id}] Stopping...")
+        log.info("[WORKER %s] Stopping...", self.worker_id)
         self.is_running = False
-        
+        self._stop_event.set()
+    
+    def join(self, timeout: float = 30):
+        """Wait for the worker thread to finish"""
         if self.worker_thread:
-            self.worker_thread.join(timeout=30)
+            self.worker_thread.join(timeout=timeout)
+        if self.refill_thread:
+            self.refill_thread.join(timeout=timeout)
+        if self._prefetch_executor:
+            self._prefetch_executor.shutdown(wait=False)
+        
+        # Persist any progress updates still waiting on the batch flusher
+        self.job_manager.flush()
         
-        print(f"[WORKER {self.worker_id}] Stopped")
+        log.info("[WORKER %s] Stopped", self.worker_id)
+    
+    def stop(self):
+        """Stop the worker"""
+        if not self.is_running:
+            return
+        
+        self.request_stop()
+        self.join(timeout=30)
     
     def _worker_loop(self):
         """Main worker loop"""
-        print(f"[WORKER {self.worker_id}] Starting worker loop")
+        log.info("[WORKER %s] Starting worker loop", self.worker_id)
         
         while self.is_running:
             try:
-                # Check for new jobs
-                next_job = self.job_manager.get_next_job()
+                # Check for new jobs - up to batch_size at once when the queue is deep
+                next_jobs = self._take_prefetched_jobs() or self._fetch_jobs()
                 
-                if next_job:
-                    self._process_job(next_job)
-                else:
-                    # No jobs available - maybe refill queue
-                    if self.auto_refill_queue and self._should_refill_queue():
-                        self._refill_queue()
+                if next_jobs:
+                    # Double-buffer: look up the following batch while this one runs
+                    in_flight = {job.job_id for job in next_jobs}
+                    self._prefetch_future = self._prefetch_executor.submit(self._fetch_jobs, in_flight, False)
                     
-                    # Wait before checking again
-                    time.sleep(self.poll_interval)
+                    self._process_batch(next_jobs)
+                else:
+                    # No jobs available - wait before checking again
+                    self._stop_event.wait(self.poll_interval)
                 
             except Exception as e:
-                print(f"[WORKER {self.worker_id}] Error in worker loop: {e}")
-                time.sleep(self.poll_interval)
+                log.error("[WORKER %s] Error in worker loop: %s", self.worker_id, e)
+                self._stop_event.wait(self.poll_interval)
         
-        print(f"[WORKER {self.worker_id}] Worker loop ended")
+        log.info("[WORKER %s] Worker loop ended", self.worker_id)
+    
+    def _fetch_jobs(self, exclude_job_ids: Optional[set] = None, claim: bool = True):
+        """Get (and by default claim) the next batch of jobs this worker should run"""
+        return self.job_manager.get_next_batch(
+            self.batch_size, tier=self.queue_tier, affinity=self.domain_affinity,
+            exclude_job_ids=exclude_job_ids, claim=claim
+        )
+    
+    def _take_prefetched_jobs(self):
+        """
+        Claim the prefetched batch now that it is about to run
+        
+        The prefetch only looked at the queue, so the claim re-checks the
+        concurrency limit and skips jobs another worker took in the meantime.
+        """
+        future, self._prefetch_future = self._prefetch_future, None
+        if future is None:
+            return []
+        
+        jobs = future.result()
+        if not jobs:
+            return []
+        return self.job_manager.claim_jobs([job.job_id for job in jobs], tier=self.queue_tier)
+    
+    def _process_batch(self, jobs):
+        """Process a batch of jobs through one pipeline invocation"""
+        if len(jobs) == 1:
+            self._process_job(jobs[0])
+            return
+        
+        log.info("[WORKER %s] Processing batch of %s jobs", self.worker_id, len(jobs))
+        
+        finished = set()
+        
+        def start_video(i: int):
+            # Videos render one at a time; mark each job as it actually starts
+            self.current_job_id = jobs[i].job_id
+            self._start_job(jobs[i])
+        
+        def video_done(i: int, result: Dict[str, Any]):
+            # Record each video as it finishes, so a later error cannot undo it
+            finished.add(i)
+            try:
+                self._handle_job_result(jobs[i], result)
+            except Exception as e:
+                self._handle_job_failure(jobs[i], str(e))
+        
+        try:
+            # Scripts for the whole batch come from a single Gemini call
+            generate_story_video_batch([self._video_params(job) for job in jobs],
+                                       on_video_start=start_video, on_video_done=video_done)
+        except Exception as e:
+            for i, job in enumerate(jobs):
+                if i not in finished:
+                    self._handle_job_failure(job, str(e))
+        finally:
+            self.current_job_id = None
     
     def _process_job(self, job):
         """Process a single video generation job"""
-        job_id = job.job_id
-        self.current_job_id = job_id
-        self.stats["jobs_processed"] += 1
-        self.stats["last_activity"] = datetime.now()
-        
-        print(f"[WORKER {self.worker_id}] Processing job {job_id}: {job.topic}")
+        self.current_job_id = job.job_id
         
         try:
-            # Update job status to processing
-            self.job_manager.update_job_status(
-                job_id, JobStatus.PROCESSING, 
-                progress=0.0, 
-                message=f"Starting video generation (Worker: {self.worker_id})"
-            )
+            self._start_job(job)
             
             # Generate video using the story video generator
-            result = generate_story_video(
-                topic=job.topic,
-                script_length=job.script_length,
-                voice=job.voice,
-                width=job.width,
-                height=job.height,
-                fps=job.fps,
-                img_style_prompt=job.img_style_prompt,
-                include_dialogs=job.include_dialogs,
-                use_different_voices=job.use_different_voices,
-                add_captions=job.add_captions,
-                add_title_card=job.add_title_card,
-                add_end_card=job.add_end_card
-            )
-            
-            if result.get("success"):
-                # Success - update job and map video
-                final_video = result.get("final_video", {})
-                video_file_path = final_video.get("file_path")
-                
-                self.job_manager.update_job_status(
-                    job_id, JobStatus.COMPLETED,
-                    progress=1.0,
-                    message=f"Video generation completed (Worker: {self.worker_id})",
-                    result=result
-                )
-                
-                if video_file_path:
-                    self.job_manager.map_job_to_video(job_id, video_file_path)
-                
-                self.stats["jobs_completed"] += 1
-                print(f"[WORKER {self.worker_id}] Job {job_id} completed successfully")
-                
-            else:
-                # Failed - update job with error
-                error_msg = result.get("error", "Unknown error occurred")
-                self.job_manager.update_job_status(
-                    job_id, JobStatus.FAILED,
-                    message=f"Video generation failed (Worker: {self.worker_id})",
-                    error=error_msg
-                )
-                
-                self.stats["jobs_failed"] += 1
-                print(f"[WORKER {self.worker_id}] Job {job_id} failed: {error_msg}")
+            result = generate_story_video(**self._video_params(job))
+            self._handle_job_result(job, result)
                 
         except Exception as e:
             # Unexpected error during processing
-            error_msg = str(e)
-            self.job_manager.update_job_status(
-                job_id, JobStatus.FAILED,
-                message=f"Processing error (Worker: {self.worker_id})",
-                error=error_msg
-            )
-            
-            self.stats["jobs_failed"] += 1
-            print(f"[WORKER {self.worker_id}] Job {job_id} error: {error_msg}")
+            self._handle_job_failure(job, str(e))
         
         finally:
             self.current_job_id = None
     
-    def _should_refill_queue(self) -> bool:
-        """Check if queue needs refilling"""
-        if not self.topic_agent:
-            return False
+    def _video_params(self, job) -> Dict[str, Any]:
+        """Build generate_story_video keyword arguments for a job"""
+        return {
+            "topic": job.topic,
+            "script_length": job.script_length,
+            "voice": job.voice,
+            "width": job.width,
+            "height": job.height,
+            "fps": job.fps,
+            "img_style_prompt": job.img_style_prompt,
+            "include_dialogs": job.include_dialogs,
+            "use_different_voices": job.use_different_voices,
+            "add_captions": job.add_captions,
+            "add_title_card": job.add_title_card,
+            "add_end_card": job.add_end_card
+        }
+    
+    def _start_job(self, job):
+        """Record the job start and mark it as processing"""
+        self.stats["jobs_processed"] += 1
+        self.stats["last_activity"] = time.time_ns()
+        self._stats_version += 1
         
-        status = self.job_manager.get_queue_status()
-        queued_jobs = status["by_status"].get("queued", 0)
+        log.info("[WORKER %s] Processing job %s: %s", self.worker_id, job.job_id, job.topic)
         
-        # Refill if less than 5 queued jobs
-        return queued_jobs < 5
+        self.job_manager.update_job_status(
+            job.job_id, JobStatus.PROCESSING, 
+            progress=0.0, 
+            message=f"Starting video generation (Worker: {self.worker_id})"
+        )
+    
+    def _handle_job_result(self, job, result: Dict[str, Any]):
+        """Complete the job on success, otherwise hand it to failure handling"""
+        job_id = job.job_id
+        
+        if result.get("success"):
+            # Success - update job and map video
+            final_video = result.get("final_video", {})
+            video_file_path = final_video.get("file_path")
+            
+            self.job_manager.update_job_status(
+                job_id, JobStatus.COMPLETED,
+                progress=1.0,
+                message=f"Video generation completed (Worker: {self.worker_id})",
+                result=result
+            )
+            
+            if video_file_path:
+                self.job_manager.map_job_to_video(job_id, video_file_path)
+            
+            self.stats["jobs_completed"] += 1
+            self._stats_version += 1
+            log.info("[WORKER %s] Job %s completed successfully", self.worker_id, job_id)
+            
+        else:
+            # Failed - retry or dead-letter the job
+            error_msg = result.get("error", "Unknown error occurred")
+            self._handle_job_failure(job, error_msg)
+    
+    def _handle_job_failure(self, job, error_msg: str):
+        """Re-enqueue a failed job with exponential backoff, or dead-letter it"""
+        job_id = job.job_id
+        
+        if job.attempts < self.max_retries:
+            delay = self.retry_backoff_seconds * (2 ** job.attempts)
+            self.job_manager.reenqueue(job_id, delay=delay, error=error_msg)
+            
+            self.stats["jobs_retried"] += 1
+            self._stats_version += 1
+            log.warning("[WORKER %s] Job %s failed, retrying in %ss: %s", self.worker_id, job_id, delay, error_msg)
+        else:
+            self.job_manager.move_to_dlq(job_id, error_msg)
+            
+            self.stats["jobs_failed"] += 1
+            self._stats_version += 1
+            log.warning("[WORKER %s] Job %s failed permanently: %s", self.worker_id, job_id, error_msg)
+    
+    def _refill_loop(self):
+        """Refill the queue whenever the job manager signals it is running low"""
+        refill_needed = self.job_manager.refill_needed_event
+        
+        while self.is_running:
+            # Wake periodically so a stop request is noticed
+            signalled = refill_needed.wait(timeout=self.poll_interval)
+            if not self.is_running:
+                break
+            
+            # The event only fires as the count crosses the threshold, so a
+            # failed or empty refill is retried from the periodic re-check
+            if not signalled and self.job_manager.queued_count >= self.job_manager.refill_threshold:
+                continue
+            
+            refill_needed.clear()
+            self._refill_queue()
     
     def _refill_queue(self):
         """Automatically refill queue with new topics"""
         if not self.topic_agent:
             return
         
-        print(f"[WORKER {self.worker_id}] Auto-refilling queue with new topics")
+        log.info("[WORKER %s] Auto-refilling queue with new topics", self.worker_id)
         
         try:
             # Generate topics for common domains
@@ -215,36 +376,54 @@ class AgenticVideoWorker:
             added_count = self.job_manager.bulk_add_jobs_from_topics(daily_topics)
             
             total_added = sum(added_count.values())
-            print(f"[WORKER {self.worker_id}] Auto-refilled queue with {total_added} new jobs")
+            log.info("[WORKER %s] Auto-refilled queue with %s new jobs", self.worker_id, total_added)
             
         except Exception as e:
-            print(f"[WORKER {self.worker_id}] Error refilling queue: {e}")
+            log.error("[WORKER %s] Error refilling queue: %s", self.worker_id, e)
     
     def get_worker_status(self) -> Dict[str, Any]:
-        """Get current worker status"""
+        """
+        Get current worker status
+        
+        The returned dict is a shared snapshot reused until the worker's state
+        changes - treat it as read-only.
+        """
+        current_job_id = self.current_job_id
+        current_job = self.job_manager.get_job(current_job_id) if current_job_id else None
+        
+        cache_key = (
+            self._stats_version,
+            self.is_running,
+            current_job_id,
+            (current_job.progress, current_job.message) if current_job else None
+        )
+        if cache_key == self._status_cache_key:
+            return self._status_cache
+        
         status = {
             "worker_id": self.worker_id,
             "is_running": self.is_running,
-            "current_job_id": self.current_job_id,
+            "queue_tier": self.queue_tier,
+            "current_job_id": current_job_id,
             "stats": dict(self.stats)
         }
         
-        # Convert datetime objects to strings
+        # Convert nanosecond timestamps to ISO strings
         for key in ["started_at", "last_activity"]:
             if status["stats"][key]:
-                status["stats"][key] = status["stats"][key].isoformat()
+                status["stats"][key] = datetime.fromtimestamp(status["stats"][key] / 1e9).isoformat()
         
         # Add current job info if processing
-        if self.current_job_id:
-            current_job = self.job_manager.get_job(self.current_job_id)
-            if current_job:
-                status["current_job"] = {
-                    "topic": current_job.topic,
-                    "domain": current_job.domain,
-                    "progress": current_job.progress,
-                    "message": current_job.message
-                }
+        if current_job:
+            status["current_job"] = {
+                "topic": current_job.topic,
+                "domain": current_job.domain,
+                "progress": current_job.progress,
+                "message": current_job.message
+            }
         
+        self._status_cache_key = cache_key
+        self._status_cache = status
         return status
 
 class AgenticWorkforceManager:
@@ -252,26 +431,48 @@ class AgenticWorkforceManager:
     Manages multiple agentic workers
     """
     
-    def __init__(self, num_workers: int = 1):
+    def __init__(self, num_workers: int = 1,
+                 job_manager: Optional[JobQueueManager] = None,
+                 topic_agent: Optional[TopicGenerationAgent] = None):
         self.num_workers = num_workers
         self.workers: Dict[str, AgenticVideoWorker] = {}
         self.is_running = False
         
+        # One job manager and topic agent shared by every worker, so they all
+        # see the same in-memory queue and reuse the same connections
+        self.job_manager = job_manager or JobQueueManager()
+        self.topic_agent = topic_agent
+        
+        # With more than one worker, the last one is reserved for short jobs.
+        # The remaining general workers each own a slice of the domains so
+        # their per-domain caches stay warm.
+        general_workers = num_workers - 1 if num_workers > 1 else num_workers
+        
         # Create workers
         for i in range(num_workers):
             worker_id = f"worker-{i+1}"
+            
+            # With more than one worker, reserve the last one for short jobs
+            # so they are never queued behind long renders
+            pinned_short = num_workers > 1 and i == num_workers - 1
+            affinity = None if pinned_short or general_workers < 2 else (i, general_workers)
+            
             worker = AgenticVideoWorker(
                 worker_id=worker_id,
-                auto_refill_queue=(i == 0)  # Only first worker refills queue
+                auto_refill_queue=(i == 0),  # Only first worker refills queue
+                queue_tier="short" if pinned_short else None,
+                domain_affinity=affinity,
+                job_manager=self.job_manager,
+                topic_agent=self.topic_agent
             )
             self.workers[worker_id] = worker
         
-        print(f"[WORKFORCE] Created {num_workers} workers")
+        log.info("[WORKFORCE] Created %s workers", num_workers)
     
     def start_all_workers(self):
         """Start all workers"""
         if self.is_running:
-            print("[WORKFORCE] Already running")
+            log.info("[WORKFORCE] Already running")
             return
         
         self.is_running = True
@@ -279,20 +480,27 @@ class AgenticWorkforceManager:
         for worker in self.workers.values():
             worker.start()
         
-        print(f"[WORKFORCE] Started {len(self.workers)} workers")
+        log.info("[WORKFORCE] Started %s workers", len(self.workers))
     
     def stop_all_workers(self):
         """Stop all workers"""
         if not self.is_running:
             return
         
-        print("[WORKFORCE] Stopping all workers...")
+        log.info("[WORKFORCE] Stopping all workers...")
         self.is_running = False
         
+        # Signal every worker first, then join them in parallel so shutdown
+        # takes at most one join timeout regardless of the worker count
         for worker in self.workers.values():
-            worker.stop()
+            worker.request_stop()
+        
+        if self.workers:
+            with ThreadPoolExecutor(max_workers=len(self.workers)) as executor:
+                futures = [executor.submit(worker.join, 30) for worker in self.workers.values()]
+                wait(futures)
         
-        print("[WORKFORCE] All workers stopped")
+        log.info("[WORKFORCE] All workers stopped")
     
     def get_workforce_status(self) -> Dict[str, Any]:
         """Get status of all workers"""
@@ -308,15 +516,17 @@ class AgenticWorkforceManager:
 # Global workforce manager instance
 _workforce_manager: Optional[AgenticWorkforceManager] = None
 
-def start_agentic_workforce(num_workers: int = 1) -> AgenticWorkforceManager:
+def start_agentic_workforce(num_workers: int = 1,
+                            job_manager: Optional[JobQueueManager] = None,
+                            topic_agent: Optional[TopicGenerationAgent] = None) -> AgenticWorkforceManager:
     """Start the agentic video generation workforce"""
     global _workforce_manager
     
     if _workforce_manager and _workforce_manager.is_running:
-        print("[AGENTIC] Workforce already running")
+        log.info("[AGENTIC] Workforce already running")
         return _workforce_manager
     
-    _workforce_manager = AgenticWorkforceManager(num_workers)
+    _workforce_manager = AgenticWorkforceManager(num_workers, job_manager, topic_agent)
     _workforce_manager.start_all_workers()
     
     return _workforce_manager
@@ -349,6 +559,7 @@ if __name__ == "__main__":
     signal.signal(signal.SIGTERM, signal_handler)
     
     print("Starting Agentic Video Generation System...")
+    configure_logging()
     
     try:
         # Start workforce
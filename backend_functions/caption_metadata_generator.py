@@ -4,36 +4,303 @@ Generates platform-specific captions, descriptions, and metadata during video cr
 """
 
 import os
+import sys
+import copy
 import json
 import time
-from typing import Dict, Any, List, Optional
+from functools import cache, lru_cache
+from itertools import chain, islice
+from typing import Dict, Any, List, Tuple
 from datetime import datetime
 
+# NumPy speeds up timestamp formatting for long caption tracks
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Numba (optional) JIT-compiles the timestamp decomposition; string
+# formatting stays in Python since Numba is weak at unicode work
+try:
+    import numba
+    NUMBA_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# orjson (optional) serializes metadata several times faster than json
+try:
+    import orjson
+    
+    def _dumps_metadata(metadata: Dict[str, Any]) -> bytes:
+        return orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _dumps_metadata(metadata: Dict[str, Any]) -> bytes:
+        return json.dumps(metadata, indent=2, ensure_ascii=False).encode("utf-8")
+
+def _write_file_bytes(path: str, data: bytes):
+    """Write data to path with a single open and as few write syscalls as possible"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
+# Caption tracks longer than this use vectorized timestamp arithmetic
+VECTORIZED_CAPTIONS_MIN_SEGMENTS = 64
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True)
+    def _decompose_times(total_ms, out):
+        """Split each millisecond count into (hours, minutes, seconds, milliseconds) rows of out"""
+        for i in range(total_ms.shape[0]):
+            hours, rem = divmod(total_ms[i], 3_600_000)
+            minutes, rem = divmod(rem, 60_000)
+            secs, millisecs = divmod(rem, 1000)
+            out[i, 0] = hours
+            out[i, 1] = minutes
+            out[i, 2] = secs
+            out[i, 3] = millisecs
+
+# Lowercases ASCII letters and drops spaces in a single translate pass
+_HASHTAG_TABLE = str.maketrans(
+    {**{chr(c): chr(c + 32) for c in range(ord("A"), ord("Z") + 1)}, " ": None}
+)
+
+def _compact_lower(text: str) -> str:
+    """Lowercase text and remove spaces (for tags and hashtags)"""
+    if text.isascii():
+        return text.translate(_HASHTAG_TABLE)
+    return text.replace(" ", "").lower()
+
+# Last generated_at timestamp as (epoch seconds, ISO string)
+_iso_now_cache = (0.0, "")
+
+def _iso_now_cached() -> str:
+    """Current local time in ISO format, refreshed at most once per second"""
+    global _iso_now_cache
+    now = time.time()
+    if now - _iso_now_cache[0] >= 1.0:
+        _iso_now_cache = (now, datetime.fromtimestamp(now).isoformat())
+    return _iso_now_cache[1]
+
+# Per-platform limits
+PLATFORM_CONFIGS = {
+    "youtube": {
+        "max_title_length": 100,
+        "max_description_length": 5000,
+        "recommended_tags": 10,
+        "hashtag_limit": None
+    },
+    "instagram": {
+        "max_title_length": 2200,  # Caption length
+        "max_description_length": 2200,
+        "recommended_tags": None,
+        "hashtag_limit": 30
+    },
+    "tiktok": {
+        "max_title_length": 150,
+        "max_description_length": 150,
+        "recommended_tags": None,
+        "hashtag_limit": 100
+    }
+}
+
+# Description style each platform generator reads (others use the generic style)
+PLATFORM_DESCRIPTION_STYLES = {
+    "youtube": "engaging",
+    "instagram": "casual",
+    "tiktok": "casual"
+}
+GENERIC_DESCRIPTION_STYLE = "educational"
+
+# Title emojis per domain
+DOMAIN_EMOJIS = {
+    "indian_mythology": ("🕉️", "📿", "⚡", "🏛️"),
+    "technology": ("🚀", "🤖", "💡", "⚡"),
+    "science": ("🔬", "🧪", "⭐", "🌌"),
+    "history": ("📜", "🏛️", "⚔️", "👑"),
+    "health": ("🌱", "💪", "🧠", "❤️"),
+    "business": ("💼", "📈", "💡", "🎯")
+}
+
+# Tags added for each domain
+DOMAIN_TAGS = {
+    "indian_mythology": ("mythology", "hinduism", "ancient india", "vedic", "puranas", "epic", "spiritual", "culture"),
+    "technology": ("tech", "innovation", "future", "AI", "digital", "startup", "programming", "gadgets"),
+    "science": ("science", "research", "discovery", "education", "facts", "physics", "biology", "chemistry"),
+    "history": ("history", "ancient", "civilization", "historical", "past", "timeline", "documentary"),
+    "health": ("health", "wellness", "fitness", "nutrition", "medical", "lifestyle", "tips"),
+    "business": ("business", "entrepreneur", "success", "marketing", "finance", "strategy", "leadership")
+}
+
+# SEO keywords added for each domain
+DOMAIN_KEYWORDS = {
+    "indian_mythology": ("mythology", "hinduism", "vedic", "ancient india"),
+    "technology": ("tech", "innovation", "artificial intelligence", "digital"),
+    "science": ("science", "research", "discovery", "educational"),
+    "history": ("history", "historical", "ancient", "civilization"),
+    "health": ("health", "wellness", "fitness", "medical"),
+    "business": ("business", "entrepreneurship", "success", "leadership")
+}
+
+# Tags added to every video
+BASE_TAGS = tuple(sys.intern(tag) for tag in ("AI generated", "educational", "story", "learning"))
+
+# Tag and keyword strings repeat across every video in a batch - intern them
+# so the dedup dicts compare by identity
+for _table in (DOMAIN_TAGS, DOMAIN_KEYWORDS):
+    for _domain, _values in _table.items():
+        _table[_domain] = tuple(sys.intern(value) for value in _values)
+del _table, _domain, _values
+
+# Copy templates, filled in with str.format at generation time
+TITLE_TEMPLATES = (
+    "{topic}",
+    "{emoji} {topic}",
+    "The TRUTH About {topic}",
+    "Why {topic} Will BLOW Your Mind!",
+    "SHOCKING: {topic} Revealed",
+    "{topic} - You Won't Believe This!",
+    "The Secret of {topic}",
+    "{alt_emoji} {topic} Explained"
+)
+
+DESCRIPTION_TEMPLATES = {
+    "engaging": "🎬 Dive deep into the fascinating world of {topic}!\n\n{summary}\n\nThis AI-generated video takes you on an incredible journey through {domain}, revealing insights you've never heard before!{character_text}\n\n💫 What you'll discover:\n✨ Hidden truths and amazing facts\n🔍 Expert insights and analysis\n🎯 Everything you need to know\n\nDon't miss this epic story! Like and subscribe for more amazing content! 🚀",
+
+    "educational": "📚 Educational Deep Dive: {topic}\n\n{summary}\n\nIn this comprehensive exploration of {domain}, we uncover the essential knowledge about {topic}. Perfect for students, enthusiasts, and anyone curious about this fascinating subject.{character_text}\n\n📖 Topics covered:\n• Historical context and background\n• Key concepts and principles\n• Modern relevance and applications\n\n🎓 Learn something new today!",
+
+    "storytelling": "🌟 An Epic Tale: {topic}\n\n{summary}\n\nJoin us as we unfold this incredible story from the world of {domain}. Every detail has been carefully crafted to bring you an immersive experience that will captivate and inspire.{character_text}\n\n✨ Get ready for:\n🎭 Compelling characters and narratives\n🏛️ Rich cultural and historical context\n💫 Unforgettable moments and revelations\n\n#AIGenerated #Storytelling",
+
+    "casual": "Hey everyone! 👋\n\nToday we're talking about {topic} - and trust me, this is going to be interesting!\n\n{summary}{character_text}\n\nI've been diving deep into {domain} lately, and there's so much cool stuff to share. Whether you're new to this topic or already know a bit, I think you'll find something valuable here.\n\nLet me know what you think in the comments! And if you enjoyed this, don't forget to hit that like button! 🔥"
+}
+
+HOOK_TEMPLATES = (
+    "Did you know about {topic}? 🤔",
+    "This {domain} fact will blow your mind! 🤯",
+    "Everyone should know about {topic}! 📢",
+    "The story of {topic} is incredible! ✨",
+    "You won't believe what I learned about {topic}! 😱"
+)
+
+SEARCH_TERM_TEMPLATES = (
+    "{topic} explained",
+    "learn about {topic}",
+    "{domain} stories",
+    "{topic} documentary"
+)
+
+# Memoized builders for base metadata and SEO data. Module-level so the caches
+# key on the arguments only and do not keep generator instances alive
+
+@lru_cache(maxsize=512)
+def _title_variations(topic: str, domain: str) -> Tuple[str, ...]:
+    """Generate multiple title variations for A/B testing"""
+
+    emojis = DOMAIN_EMOJIS.get(domain, ("✨", "🎬", "📺"))
+
+    # Only the top 5 variations are kept, so only format those templates
+    return tuple(
+        template.format(topic=topic, emoji=emojis[0], alt_emoji=emojis[1])
+        for template in islice(TITLE_TEMPLATES, 5)
+    )
+
+@lru_cache(maxsize=512)
+def _descriptions(topic: str, summary: str, domain: str, characters: Tuple[str, ...],
+                  styles: Tuple[str, ...]) -> Dict[str, str]:
+    """Generate the requested description styles"""
+
+    character_text = f"\n\n🎭 Featured: {', '.join(characters)}" if characters else ""
+
+    descriptions = {
+        style: DESCRIPTION_TEMPLATES[style].format(
+            topic=topic, summary=summary, domain=domain, character_text=character_text
+        )
+        for style in styles
+    }
+
+    return descriptions
+
+@lru_cache(maxsize=512)
+def _tags(topic: str, domain: str, characters: Tuple[str, ...]) -> List[str]:
+    """Generate comprehensive tags for SEO and discovery"""
+
+    # Topic-specific tags (extract keywords from topic)
+    topic_words = [word.lower() for word in topic.split() if len(word) > 3]
+
+    # Character tags
+    character_tags = [_compact_lower(char) for char in characters]
+
+    # Combine all tags
+    all_tags = chain(BASE_TAGS,
+                     DOMAIN_TAGS.get(domain, ()),  # Domain-specific tags
+                     topic_words,
+                     character_tags,
+                     (sys.intern(domain),))
+
+    # Remove duplicates keeping priority order (base tags first)
+    return list(islice(dict.fromkeys(all_tags), 15))  # Limit to 15 tags
+
+@lru_cache(maxsize=512)
+def _engagement_hooks(topic: str, domain: str) -> Tuple[str, ...]:
+    """Generate engagement hooks for social media"""
+
+    return tuple(template.format(topic=topic, domain=domain) for template in HOOK_TEMPLATES)
+
+@lru_cache(maxsize=512)
+def _seo_data(topic: str, domain: str, summary: str) -> Dict[str, Any]:
+    """Generate SEO-optimized data"""
+
+    keywords = []
+
+    # Extract keywords from topic
+    topic_keywords = [word.lower() for word in topic.split() if len(word) > 3]
+    keywords.extend(topic_keywords)
+
+    # Domain keywords
+    keywords.extend(DOMAIN_KEYWORDS.get(domain, ()))
+
+    return {
+        "primary_keywords": list(islice(dict.fromkeys(keywords), 10)),
+        "search_terms": [
+            template.format(topic=topic, domain=domain) for template in SEARCH_TERM_TEMPLATES
+        ],
+        "meta_description": f"Discover the fascinating story of {topic} in this AI-generated educational video about {domain}. {summary[:100]}...",
+        "schema_markup": {
+            "@type": "VideoObject",
+            "name": topic,
+            "description": summary[:200],
+            "genre": domain,
+            "contentRating": "G"
+        }
+    }
+
 class CaptionMetadataGenerator:
     """
     Generates captions and metadata for different platforms during video creation
     """
     
+    _INSTAGRAM_STORY_TEMPLATES = (
+        "Behind the scenes: Creating {title}",
+        "Poll: Did you know this fact?",
+        "Swipe up to learn more about {domain}",
+        "Quiz: Test your knowledge!",
+        "Share if you found this interesting!"
+    )
+    
+    # Shared, read-only platform limits
+    platform_configs = PLATFORM_CONFIGS
+    
     def __init__(self):
-        self.platform_configs = {
-            "youtube": {
-                "max_title_length": 100,
-                "max_description_length": 5000,
-                "recommended_tags": 10,
-                "hashtag_limit": None
-            },
-            "instagram": {
-                "max_title_length": 2200,  # Caption length
-                "max_description_length": 2200,
-                "recommended_tags": None,
-                "hashtag_limit": 30
-            },
-            "tiktok": {
-                "max_title_length": 150,
-                "max_description_length": 150,
-                "recommended_tags": None,
-                "hashtag_limit": 100
-            }
+        # Platform name -> metadata generator (anything else gets generic metadata)
+        self._platform_generators = {
+            "youtube": self._generate_youtube_metadata,
+            "instagram": self._generate_instagram_metadata,
+            "tiktok": self._generate_tiktok_metadata
         }
         
         print("[CAPTIONS] Initialized caption and metadata generator")
@@ -43,170 +310,112 @@ class CaptionMetadataGenerator:
                                platforms: List[str] = ["youtube", "instagram"]) -> Dict[str, Any]:
         """Generate comprehensive metadata for video during creation"""
         
-        try:
-            topic = story_info.get("title", "AI Generated Story")
-            summary = story_info.get("summary", "")
-            characters = story_info.get("characters", [])
-            segments = story_info.get("segments", [])
-            
-            # Generate base content
-            base_metadata = self._generate_base_metadata(topic, summary, domain, characters)
-            
-            # Generate platform-specific content
-            platform_metadata = {}
-            
-            for platform in platforms:
-                platform_metadata[platform] = self._generate_platform_specific_metadata(
-                    base_metadata, platform, domain
-                )
-            
-            # Generate captions/subtitles for accessibility
-            captions = self._generate_captions_from_segments(segments)
-            
-            # Generate SEO tags and keywords
-            seo_data = self._generate_seo_data(topic, domain, summary)
-            
-            metadata = {
-                "generated_at": datetime.now().isoformat(),
-                "topic": topic,
-                "domain": domain,
-                "base_metadata": base_metadata,
-                "platform_metadata": platform_metadata,
-                "captions": captions,
-                "seo_data": seo_data,
-                "story_info": story_info
-            }
-            
-            return metadata
-            
-        except Exception as e:
-            print(f"[CAPTIONS] Error generating metadata: {e}")
+        fields = self._safe_extract(story_info)
+        if fields is None:
             return self._generate_fallback_metadata(story_info, domain)
-    
-    def _generate_base_metadata(self, topic: str, summary: str, domain: str, characters: List[str]) -> Dict[str, Any]:
-        """Generate base metadata that can be adapted for each platform"""
+        topic, summary, characters, segments = fields
         
-        # Create engaging titles
-        title_variations = self._generate_title_variations(topic, domain)
+        # Generate base content
+        base_metadata = self._generate_base_metadata(topic, summary, domain, characters, platforms)
         
-        # Create descriptions
-        descriptions = self._generate_descriptions(topic, summary, domain, characters)
+        # Generate platform-specific content
+        platform_metadata = {}
         
-        # Generate tags and keywords
-        tags = self._generate_tags(topic, domain, characters)
+        for platform in platforms:
+            platform_metadata[platform] = self._generate_platform_specific_metadata(
+                base_metadata, platform, domain
+            )
         
-        return {
-            "title_variations": title_variations,
-            "descriptions": descriptions,
-            "tags": tags,
-            "characters": characters,
+        # Generate captions/subtitles for accessibility
+        captions = self._generate_captions_from_segments(segments)
+        
+        # Generate SEO tags and keywords (memoized and shared, so copy it)
+        seo_data = copy.deepcopy(_seo_data(topic, domain, summary))
+        
+        metadata = {
+            "generated_at": _iso_now_cached(),
+            "topic": topic,
             "domain": domain,
-            "engagement_hooks": self._generate_engagement_hooks(topic, domain)
+            "base_metadata": base_metadata,
+            "platform_metadata": platform_metadata,
+            "captions": captions,
+            "seo_data": seo_data,
+            "story_info": story_info
         }
+        
+        return metadata
     
-    def _generate_title_variations(self, topic: str, domain: str) -> List[str]:
-        """Generate multiple title variations for A/B testing"""
-        
-        domain_prefixes = {
-            "indian_mythology": ["🕉️", "📿", "⚡", "🏛️"],
-            "technology": ["🚀", "🤖", "💡", "⚡"],
-            "science": ["🔬", "🧪", "⭐", "🌌"],
-            "history": ["📜", "🏛️", "⚔️", "👑"],
-            "health": ["🌱", "💪", "🧠", "❤️"],
-            "business": ["💼", "📈", "💡", "🎯"]
-        }
+    def _safe_extract(self, story_info: Dict[str, Any]):
+        """Pull (topic, summary, characters, segments) out of story_info, or None if it is malformed"""
         
-        emojis = domain_prefixes.get(domain, ["✨", "🎬", "📺"])
-        
-        variations = [
-            f"{topic}",
-            f"{emojis[0]} {topic}",
-            f"The TRUTH About {topic}",
-            f"Why {topic} Will BLOW Your Mind!",
-            f"SHOCKING: {topic} Revealed",
-            f"{topic} - You Won't Believe This!",
-            f"The Secret of {topic}",
-            f"{emojis[1]} {topic} Explained"
-        ]
+        try:
+            topic = str(story_info.get("title", "AI Generated Story"))
+            summary = str(story_info.get("summary", "") or "")
+            characters = list(story_info.get("characters", None) or [])
+            segments = list(story_info.get("segments", None) or [])
+        except (AttributeError, TypeError, ValueError) as e:
+            print(f"[CAPTIONS] Error generating metadata: {e}")
+            return None
         
-        return variations[:5]  # Return top 5 variations
+        return topic, summary, characters, segments
     
-    def _generate_descriptions(self, topic: str, summary: str, domain: str, characters: List[str]) -> Dict[str, str]:
-        """Generate different description styles"""
+    def _generate_base_metadata(self, topic: str, summary: str, domain: str, characters: List[Any],
+                                platforms: List[str] = None) -> Dict[str, Any]:
+        """Generate base metadata that can be adapted for each platform"""
         
-        character_text = f"\n\n🎭 Featured: {', '.join(characters)}" if characters else ""
+        # Script characters may be dicts - key the cached generators on names
+        character_names = tuple(
+            char.get("name", "") if isinstance(char, dict) else str(char)
+            for char in characters
+        )
         
-        descriptions = {
-            "engaging": f"🎬 Dive deep into the fascinating world of {topic}!\n\n{summary}\n\nThis AI-generated video takes you on an incredible journey through {domain}, revealing insights you've never heard before!{character_text}\n\n💫 What you'll discover:\n✨ Hidden truths and amazing facts\n🔍 Expert insights and analysis\n🎯 Everything you need to know\n\nDon't miss this epic story! Like and subscribe for more amazing content! 🚀",
-            
-            "educational": f"📚 Educational Deep Dive: {topic}\n\n{summary}\n\nIn this comprehensive exploration of {domain}, we uncover the essential knowledge about {topic}. Perfect for students, enthusiasts, and anyone curious about this fascinating subject.{character_text}\n\n📖 Topics covered:\n• Historical context and background\n• Key concepts and principles\n• Modern relevance and applications\n\n🎓 Learn something new today!",
-            
-            "storytelling": f"🌟 An Epic Tale: {topic}\n\n{summary}\n\nJoin us as we unfold this incredible story from the world of {domain}. Every detail has been carefully crafted to bring you an immersive experience that will captivate and inspire.{character_text}\n\n✨ Get ready for:\n🎭 Compelling characters and narratives\n🏛️ Rich cultural and historical context\n💫 Unforgettable moments and revelations\n\n#AIGenerated #Storytelling",
-            
-            "casual": f"Hey everyone! 👋\n\nToday we're talking about {topic} - and trust me, this is going to be interesting!\n\n{summary}{character_text}\n\nI've been diving deep into {domain} lately, and there's so much cool stuff to share. Whether you're new to this topic or already know a bit, I think you'll find something valuable here.\n\nLet me know what you think in the comments! And if you enjoyed this, don't forget to hit that like button! 🔥"
-        }
+        # The generators below are memoized and return shared objects, so
+        # hand callers their own copies of anything mutable. Titles and hooks
+        # come back as frozen tuples and can be shared as-is
         
-        return descriptions
-    
-    def _generate_tags(self, topic: str, domain: str, characters: List[str]) -> List[str]:
-        """Generate comprehensive tags for SEO and discovery"""
-        
-        # Base tags
-        base_tags = ["AI generated", "educational", "story", "learning"]
-        
-        # Domain-specific tags
-        domain_tags = {
-            "indian_mythology": ["mythology", "hinduism", "ancient india", "vedic", "puranas", "epic", "spiritual", "culture"],
-            "technology": ["tech", "innovation", "future", "AI", "digital", "startup", "programming", "gadgets"],
-            "science": ["science", "research", "discovery", "education", "facts", "physics", "biology", "chemistry"],
-            "history": ["history", "ancient", "civilization", "historical", "past", "timeline", "documentary"],
-            "health": ["health", "wellness", "fitness", "nutrition", "medical", "lifestyle", "tips"],
-            "business": ["business", "entrepreneur", "success", "marketing", "finance", "strategy", "leadership"]
-        }
-        
-        # Topic-specific tags (extract keywords from topic)
-        topic_words = [word.lower() for word in topic.split() if len(word) > 3]
+        # Create engaging titles
+        title_variations = _title_variations(topic, domain)
         
-        # Character tags
-        character_tags = [char.lower().replace(" ", "") for char in characters]
+        # Create descriptions - only the styles the requested platforms read
+        if platforms is None:
+            styles = tuple(DESCRIPTION_TEMPLATES)
+        else:
+            styles = tuple(dict.fromkeys(
+                PLATFORM_DESCRIPTION_STYLES.get(platform, GENERIC_DESCRIPTION_STYLE)
+                for platform in platforms
+            ))
+            # Every platform cuts its description to its limit, so summary text
+            # past the largest limit can never show - clip it before formatting
+            limits = [self.platform_configs.get(platform, {}).get("max_description_length")
+                      for platform in platforms]
+            if limits and None not in limits:
+                summary = summary[:max(limits)]
+        descriptions = dict(_descriptions(topic, summary, domain, character_names, styles))
         
-        # Combine all tags
-        all_tags = (base_tags + 
-                   domain_tags.get(domain, []) + 
-                   topic_words + 
-                   character_tags + 
-                   [domain])
+        # Generate tags and keywords
+        tags = list(_tags(topic, domain, character_names))
         
-        # Remove duplicates and return
-        return list(set(all_tags))[:15]  # Limit to 15 tags
-    
-    def _generate_engagement_hooks(self, topic: str, domain: str) -> List[str]:
-        """Generate engagement hooks for social media"""
-        
-        hooks = [
-            f"Did you know about {topic}? 🤔",
-            f"This {domain} fact will blow your mind! 🤯",
-            f"Everyone should know about {topic}! 📢",
-            f"The story of {topic} is incredible! ✨",
-            f"You won't believe what I learned about {topic}! 😱"
-        ]
+        # Hashtag forms of the tags, shared by every platform generator
+        hashtags = ["#" + _compact_lower(tag) for tag in tags]
         
-        return hooks
+        return {
+            "title_variations": title_variations,
+            "descriptions": descriptions,
+            "tags": tags,
+            "hashtags": hashtags,
+            "characters": characters,
+            "domain": domain,
+            "engagement_hooks": _engagement_hooks(topic, domain)
+        }
     
     def _generate_platform_specific_metadata(self, base_metadata: Dict[str, Any], 
                                            platform: str, domain: str) -> Dict[str, Any]:
         """Generate platform-specific optimized metadata"""
         
         config = self.platform_configs.get(platform, {})
+        generator = self._platform_generators.get(platform, self._generate_generic_metadata)
         
-        if platform == "youtube":
-            return self._generate_youtube_metadata(base_metadata, config)
-        elif platform == "instagram":
-            return self._generate_instagram_metadata(base_metadata, config)
-        elif platform == "tiktok":
-            return self._generate_tiktok_metadata(base_metadata, config)
-        else:
-            return self._generate_generic_metadata(base_metadata, config)
+        return generator(base_metadata, config)
     
     def _generate_youtube_metadata(self, base_metadata: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
         """Generate YouTube-optimized metadata"""
@@ -217,7 +426,7 @@ class CaptionMetadataGenerator:
             title = title[:config["max_title_length"]-3] + "..."
         
         # Use engaging description
-        description = base_metadata["descriptions"]["engaging"]
+        description = base_metadata["descriptions"][PLATFORM_DESCRIPTION_STYLES["youtube"]]
         if len(description) > config["max_description_length"]:
             description = description[:config["max_description_length"]-3] + "..."
         
@@ -251,14 +460,15 @@ class CaptionMetadataGenerator:
         caption_parts.append("")
         
         # Add description (shortened)
-        short_desc = base_metadata["descriptions"]["casual"][:800] + "..." if len(base_metadata["descriptions"]["casual"]) > 800 else base_metadata["descriptions"]["casual"]
+        description = base_metadata["descriptions"][PLATFORM_DESCRIPTION_STYLES["instagram"]]
+        short_desc = description[:800] + "..." if len(description) > 800 else description
         caption_parts.append(short_desc)
         caption_parts.append("")
         
         # Add hashtags (limit to 30)
-        hashtags = ["#" + tag.replace(" ", "").lower() for tag in base_metadata["tags"][:25]]
+        hashtags = base_metadata["hashtags"][:25]
         hashtags.extend(["#AI", "#educational", "#story", "#viral", "#fyp"])
-        caption_parts.append(" ".join(hashtags[:30]))
+        caption_parts.append(" ".join(islice(hashtags, 30)))
         
         caption = "\n".join(caption_parts)
         
@@ -280,12 +490,12 @@ class CaptionMetadataGenerator:
         
         # TikTok caption (short and engaging)
         hook = base_metadata["engagement_hooks"][0]
-        short_desc = base_metadata["descriptions"]["casual"][:100]
+        short_desc = base_metadata["descriptions"][PLATFORM_DESCRIPTION_STYLES["tiktok"]][:100]
         
-        hashtags = ["#" + tag.replace(" ", "").lower() for tag in base_metadata["tags"][:10]]
+        hashtags = base_metadata["hashtags"][:10]
         hashtags.extend(["#fyp", "#viral", "#AI", "#story", "#educational"])
         
-        caption = f"{hook}\n\n{short_desc}...\n\n{' '.join(hashtags[:15])}"
+        caption = f"{hook}\n\n{short_desc}...\n\n{' '.join(islice(hashtags, 15))}"
         
         return {
             "caption": caption[:config["max_title_length"]],
@@ -305,105 +515,101 @@ class CaptionMetadataGenerator:
         
         return {
             "title": base_metadata["title_variations"][0],
-            "description": base_metadata["descriptions"]["educational"],
+            "description": base_metadata["descriptions"][GENERIC_DESCRIPTION_STYLE],
             "tags": base_metadata["tags"][:10],
-            "hashtags": ["#" + tag.replace(" ", "").lower() for tag in base_metadata["tags"][:10]]
+            "hashtags": base_metadata["hashtags"][:10]
         }
     
     def _generate_captions_from_segments(self, segments: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generate captions/subtitles from video segments"""
         
+        # Both caption files are built in one pass into preallocated line
+        # buffers: 4 SRT lines per segment, 3 VTT lines plus the header
+        segment_count = len(segments)
+        srt_captions = [""] * (4 * segment_count)
+        vtt_captions = [""] * (3 * segment_count + 2)
+        vtt_captions[0] = "WEBVTT"
+        
+        # Start/end times and the total duration in a single pass - segment
+        # timing is the only untrusted input here
+        starts = []
+        ends = []
+        total_duration = 0
         try:
-            srt_captions = []
-            vtt_captions = ["WEBVTT", ""]
-            
             for i, segment in enumerate(segments):
-                text = segment.get("text", f"Segment {i+1}")
                 start_time = segment.get("start_time", i * 5)  # Default 5 sec per segment
                 duration = segment.get("duration", 5)
-                end_time = start_time + duration
-                
-                # SRT format
-                srt_captions.extend([
-                    str(i + 1),
-                    f"{self._seconds_to_srt_time(start_time)} --> {self._seconds_to_srt_time(end_time)}",
-                    text,
-                    ""
-                ])
-                
-                # VTT format
-                vtt_captions.extend([
-                    f"{self._seconds_to_vtt_time(start_time)} --> {self._seconds_to_vtt_time(end_time)}",
-                    text,
-                    ""
-                ])
-            
-            return {
-                "srt_format": "\n".join(srt_captions),
-                "vtt_format": "\n".join(vtt_captions),
-                "segments_count": len(segments),
-                "total_duration": sum(s.get("duration", 5) for s in segments)
-            }
-            
-        except Exception as e:
+                starts.append(start_time)
+                ends.append(start_time + duration)
+                total_duration += duration
+        except (AttributeError, TypeError) as e:
             print(f"[CAPTIONS] Error generating captions: {e}")
             return {"srt_format": "", "vtt_format": "", "segments_count": 0}
-    
-    def _seconds_to_srt_time(self, seconds: float) -> str:
-        """Convert seconds to SRT time format"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millisecs = int((seconds % 1) * 1000)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{millisecs:03d}"
-    
-    def _seconds_to_vtt_time(self, seconds: float) -> str:
-        """Convert seconds to VTT time format"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millisecs = int((seconds % 1) * 1000)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millisecs:03d}"
-    
-    def _generate_seo_data(self, topic: str, domain: str, summary: str) -> Dict[str, Any]:
-        """Generate SEO-optimized data"""
-        
-        keywords = []
-        
-        # Extract keywords from topic
-        topic_keywords = [word.lower() for word in topic.split() if len(word) > 3]
-        keywords.extend(topic_keywords)
-        
-        # Domain keywords
-        domain_keywords = {
-            "indian_mythology": ["mythology", "hinduism", "vedic", "ancient india"],
-            "technology": ["tech", "innovation", "artificial intelligence", "digital"],
-            "science": ["science", "research", "discovery", "educational"],
-            "history": ["history", "historical", "ancient", "civilization"],
-            "health": ["health", "wellness", "fitness", "medical"],
-            "business": ["business", "entrepreneurship", "success", "leadership"]
-        }
         
-        keywords.extend(domain_keywords.get(domain, []))
+        # Start timestamps first, then end timestamps
+        if NUMPY_AVAILABLE and segment_count > VECTORIZED_CAPTIONS_MIN_SEGMENTS:
+            srt_times, vtt_times = self._format_timestamps_bulk(starts + ends)
+        else:
+            srt_times, vtt_times = [], []
+            for seconds in starts + ends:
+                srt_time, vtt_time = self._format_timestamps(seconds)
+                srt_times.append(srt_time)
+                vtt_times.append(vtt_time)
+        
+        for i, segment in enumerate(segments):
+            text = segment.get("text", f"Segment {i+1}")
+            
+            # SRT format
+            srt_index = 4 * i
+            srt_captions[srt_index] = str(i + 1)
+            srt_captions[srt_index + 1] = f"{srt_times[i]} --> {srt_times[segment_count + i]}"
+            srt_captions[srt_index + 2] = text
+            
+            # VTT format
+            vtt_index = 3 * i + 2
+            vtt_captions[vtt_index] = f"{vtt_times[i]} --> {vtt_times[segment_count + i]}"
+            vtt_captions[vtt_index + 1] = text
         
         return {
-            "primary_keywords": list(set(keywords))[:10],
-            "search_terms": [
-                f"{topic} explained",
-                f"learn about {topic}",
-                f"{domain} stories",
-                f"{topic} documentary"
-            ],
-            "meta_description": f"Discover the fascinating story of {topic} in this AI-generated educational video about {domain}. {summary[:100]}...",
-            "schema_markup": {
-                "@type": "VideoObject",
-                "name": topic,
-                "description": summary[:200],
-                "genre": domain,
-                "contentRating": "G"
-            }
+            "srt_format": "\n".join(srt_captions),
+            "vtt_format": "\n".join(vtt_captions),
+            "segments_count": len(segments),
+            "total_duration": total_duration
         }
     
+    def _format_timestamps(self, seconds: float) -> Tuple[str, str]:
+        """Convert seconds to (SRT, VTT) time strings - they only differ in the millisecond separator"""
+        hours, millisecs = divmod(int(seconds * 1000), 3_600_000)
+        minutes, millisecs = divmod(millisecs, 60_000)
+        secs, millisecs = divmod(millisecs, 1000)
+        clock = "%02d:%02d:%02d" % (hours, minutes, secs)
+        return "%s,%03d" % (clock, millisecs), "%s.%03d" % (clock, millisecs)
+    
+    def _format_timestamps_bulk(self, times: List[float]) -> Tuple[List[str], List[str]]:
+        """Vectorized _format_timestamps for many timestamps at once"""
+        seconds = np.asarray(times, dtype=np.float64)
+        
+        # Same integer-millisecond split as the scalar path, done in compiled loops
+        total_ms = (seconds * 1000).astype(np.int64)
+        if NUMBA_AVAILABLE:
+            fields = np.empty((total_ms.shape[0], 4), dtype=np.int64)
+            _decompose_times(total_ms, fields)
+            hours, minutes, secs, millisecs = fields.T.tolist()
+        else:
+            hours = (total_ms // 3_600_000).tolist()
+            minutes = (total_ms // 60_000 % 60).tolist()
+            secs = (total_ms // 1000 % 60).tolist()
+            millisecs = (total_ms % 1000).tolist()
+        
+        srt_times = []
+        vtt_times = []
+        for h, m, sec, ms in zip(hours, minutes, secs, millisecs):
+            clock = "%02d:%02d:%02d" % (h, m, sec)
+            srt_times.append("%s,%03d" % (clock, ms))
+            vtt_times.append("%s.%03d" % (clock, ms))
+        
+        return srt_times, vtt_times
+    
     def _generate_thumbnail_keywords(self, base_metadata: Dict[str, Any]) -> List[str]:
         """Generate keywords for thumbnail creation"""
         
@@ -420,20 +626,17 @@ class CaptionMetadataGenerator:
         """Generate Instagram story content ideas"""
         
         return [
-            f"Behind the scenes: Creating {base_metadata['title_variations'][0]}",
-            "Poll: Did you know this fact?",
-            f"Swipe up to learn more about {base_metadata['domain']}",
-            "Quiz: Test your knowledge!",
-            "Share if you found this interesting!"
+            template.format(title=base_metadata["title_variations"][0], domain=base_metadata["domain"])
+            for template in self._INSTAGRAM_STORY_TEMPLATES
         ]
     
     def _generate_fallback_metadata(self, story_info: Dict[str, Any], domain: str) -> Dict[str, Any]:
         """Generate simple fallback metadata if main generation fails"""
         
-        topic = story_info.get("title", "AI Generated Story")
+        topic = story_info.get("title", "AI Generated Story") if isinstance(story_info, dict) else "AI Generated Story"
         
         return {
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": _iso_now_cached(),
             "topic": topic,
             "domain": domain,
             "base_metadata": {
@@ -460,19 +663,18 @@ class CaptionMetadataGenerator:
             os.makedirs(output_dir, exist_ok=True)
             metadata_file = os.path.join(output_dir, "video_metadata.json")
             
-            with open(metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            # Serialize in memory, then write each file in one go
+            _write_file_bytes(metadata_file, _dumps_metadata(metadata))
             
             # Save captions as separate files
-            if metadata.get("captions", {}).get("srt_format"):
+            captions = metadata.get("captions", {})
+            if captions.get("srt_format"):
                 srt_file = os.path.join(output_dir, "captions.srt")
-                with open(srt_file, 'w', encoding='utf-8') as f:
-                    f.write(metadata["captions"]["srt_format"])
+                _write_file_bytes(srt_file, captions["srt_format"].encode("utf-8"))
             
-            if metadata.get("captions", {}).get("vtt_format"):
+            if captions.get("vtt_format"):
                 vtt_file = os.path.join(output_dir, "captions.vtt")
-                with open(vtt_file, 'w', encoding='utf-8') as f:
-                    f.write(metadata["captions"]["vtt_format"])
+                _write_file_bytes(vtt_file, captions["vtt_format"].encode("utf-8"))
             
             print(f"[CAPTIONS] Saved metadata to: {metadata_file}")
             return metadata_file
@@ -481,17 +683,10 @@ class CaptionMetadataGenerator:
             print(f"[CAPTIONS] Error saving metadata: {e}")
             return ""
 
-# Global instance
-_caption_generator: Optional[CaptionMetadataGenerator] = None
-
+@cache
 def get_caption_generator() -> CaptionMetadataGenerator:
     """Get global caption generator instance"""
-    global _caption_generator
-    
-    if _caption_generator is None:
-        _caption_generator = CaptionMetadataGenerator()
-    
-    return _caption_generator
+    return CaptionMetadataGenerator()
 
 if __name__ == "__main__":
     # Test the caption generator
@@ -4,11 +4,169 @@ Handles automatic cleanup of result folders and temporary files
 """
 
 import os
+import sys
+import logging
+import re
+import fnmatch
+import errno
 import shutil
 import time
-import glob
+import uuid
+import atexit
+import threading
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime
+
+# Cleanup logs through the logging module so per-file messages are DEBUG level
+# (formatted only when enabled) and summaries go out as INFO; handlers are
+# left to the application (see configure_logging)
+log = logging.getLogger("cleanup")
+
+def configure_logging(level: int = logging.INFO):
+    """
+    Print cleanup summaries to stdout unless the application configured logging
+    
+    Does nothing if the cleanup logger or any of its ancestors already has a handler.
+    """
+    if log.hasHandlers():
+        return
+    
+    log.setLevel(level)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(stream_handler)
+
+# Extensions treated as (potentially final) video files
+_VIDEO_EXTS = ('.mp4', '.avi', '.mov')
+
+# Temporary file name patterns, compiled into one regex so a single directory
+# pass can test every pattern at once
+TEMP_FILE_PATTERNS = (
+    "temp_*.mp3",
+    "temp_*.wav",
+    "temp_*.png",
+    "temp_*.jpg",
+    "temp_*.mp4",
+    "fallback_*.png",
+    "segment_*_temp.*",
+    "silent_audio_*.wav",
+    "*_temp_*.*"
+)
+_TEMP_FILE_RE = re.compile("|".join(fnmatch.translate(pattern) for pattern in dict.fromkeys(TEMP_FILE_PATTERNS)))
+
+# Short-lived stat cache shared by the scans in one scheduled cleanup run
+# (cleanup_old_results, then get_cleanup_stats): absolute path -> (stat, expiry).
+# Background cleanup threads use it too, so every access holds the lock
+STAT_CACHE_TTL = 5.0
+_STAT_CACHE: Dict[str, tuple] = {}
+_stat_cache_lock = threading.Lock()
+
+def _cached_stat(entry: os.DirEntry, ttl: float = STAT_CACHE_TTL) -> os.stat_result:
+    """Stat a scandir entry (without following symlinks), reusing a result cached within ttl seconds"""
+    key = os.path.abspath(entry.path)
+    now = time.time()
+    
+    with _stat_cache_lock:
+        cached = _STAT_CACHE.get(key)
+    if cached is not None and now < cached[1]:
+        return cached[0]
+    
+    st = entry.stat(follow_symlinks=False)
+    with _stat_cache_lock:
+        _STAT_CACHE[key] = (st, now + ttl)
+    return st
+
+def _prune_stat_cache():
+    """Drop expired entries so the cache only holds the current run's stats"""
+    now = time.time()
+    with _stat_cache_lock:
+        for key in [key for key, (_, expiry) in _STAT_CACHE.items() if expiry <= now]:
+            del _STAT_CACHE[key]
+
+def _invalidate_stat_cache(path: str):
+    """Drop cached stats for path and everything below it"""
+    prefix = os.path.abspath(path)
+    nested = prefix + os.sep
+    with _stat_cache_lock:
+        for key in [key for key in _STAT_CACHE if key == prefix or key.startswith(nested)]:
+            del _STAT_CACHE[key]
+
+# Trees with more files than this are emptied with rsync when it is installed
+RSYNC_RMTREE_MIN_FILES = 500
+
+def _fast_rmtree(path: str):
+    """
+    Remove a directory tree. Large trees are emptied by rsync against an
+    empty directory; otherwise files are unlinked from a thread pool (the
+    GIL is released during unlink) and directories removed bottom-up.
+    """
+    tree = list(os.walk(path, topdown=False))
+    file_count = sum(len(filenames) for _, _, filenames in tree)
+    
+    rsync = shutil.which("rsync")
+    if rsync and file_count > RSYNC_RMTREE_MIN_FILES:
+        with tempfile.TemporaryDirectory() as empty_dir:
+            result = subprocess.run(
+                [rsync, "-a", "--delete", empty_dir + "/", path + "/"],
+                capture_output=True
+            )
+        if result.returncode == 0:
+            os.rmdir(path)
+            return
+    
+    # Symlinks to directories show up in dirnames but are unlinked, not walked
+    to_unlink = [os.path.join(dirpath, name) for dirpath, _, filenames in tree for name in filenames]
+    to_unlink.extend(
+        os.path.join(dirpath, name)
+        for dirpath, dirnames, _ in tree for name in dirnames
+        if os.path.islink(os.path.join(dirpath, name))
+    )
+    
+    if to_unlink:
+        try:
+            with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+                list(pool.map(os.unlink, to_unlink))
+        except RuntimeError:
+            # No new pools once the interpreter is shutting down (a background
+            # cleanup being joined at exit) - unlink serially instead
+            for file_path in to_unlink:
+                os.unlink(file_path)
+    
+    # os.walk(topdown=False) lists children before their parents
+    for dirpath, _, _ in tree:
+        os.rmdir(dirpath)
+
+def _move_file(src: str, dst: str):
+    """
+    Move a file with a single atomic rename. Only when src and dst are on
+    different filesystems (output_dir is a mount point) fall back to
+    shutil.move, which copies the data.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+def _walk_scandir(path: str):
+    """Yield a DirEntry for every file under path, recursing with os.scandir"""
+    try:
+        with os.scandir(path) as entries:
+            subdirs = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    yield entry
+    except OSError:
+        return
+    
+    for subdir in subdirs:
+        yield from _walk_scandir(subdir)
 
 def cleanup_result_folder(output_dir: str, keep_final_video: bool = True) -> bool:
     """
@@ -23,55 +181,65 @@ def cleanup_result_folder(output_dir: str, keep_final_video: bool = True) -> boo
     """
     try:
         if not os.path.exists(output_dir):
-            print(f"[CLEANUP] Directory {output_dir} doesn't exist, nothing to clean")
+            log.info("[CLEANUP] Directory %s doesn't exist, nothing to clean", output_dir)
             return True
         
-        print(f"[CLEANUP] Starting cleanup of {output_dir}")
+        log.info("[CLEANUP] Starting cleanup of %s", output_dir)
         
         if keep_final_video:
-            # Find and preserve the final video file temporarily
+            # Find and preserve the final video file temporarily - one directory
+            # pass, with sizes read from the scandir entries
             final_video_files = []
-            for ext in ['*.mp4', '*.avi', '*.mov']:
-                pattern = os.path.join(output_dir, f"*final*{ext}")
-                final_video_files.extend(glob.glob(pattern))
+            mp4_sizes = []
+            with os.scandir(output_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith(".") or not name.endswith(_VIDEO_EXTS) or not entry.is_file():
+                        continue
+                    if "final" in name:
+                        final_video_files.append(entry.path)
+                    if name.endswith(".mp4"):
+                        mp4_sizes.append((entry.stat().st_size, entry.path))
             
             # Also check for any video file that might be the final one
-            if not final_video_files:
-                pattern = os.path.join(output_dir, "*.mp4")
-                all_videos = glob.glob(pattern)
-                if all_videos:
-                    # Get the largest video file (likely the final one)
-                    final_video_files = [max(all_videos, key=os.path.getsize)]
+            if not final_video_files and mp4_sizes:
+                # Get the largest video file (likely the final one)
+                final_video_files = [max(mp4_sizes)[1]]
             
-            # Move final video to temp location
+            # Move final video to a temp location next to the folder (not
+            # inside it, or rmtree below would delete it too)
+            parent_dir = os.path.dirname(os.path.abspath(output_dir))
             temp_videos = []
             for video_file in final_video_files:
-                temp_name = f"{video_file}.temp_keep"
+                temp_name = os.path.join(parent_dir, f".keep_{uuid.uuid4().hex}_{os.path.basename(video_file)}")
                 try:
-                    shutil.move(video_file, temp_name)
+                    _move_file(video_file, temp_name)
                     temp_videos.append((temp_name, video_file))
-                    print(f"[CLEANUP] Temporarily preserved: {os.path.basename(video_file)}")
+                    log.debug("[CLEANUP] Temporarily preserved: %s", os.path.basename(video_file))
                 except Exception as e:
-                    print(f"[CLEANUP] Warning: Could not preserve {video_file}: {e}")
+                    log.warning("[CLEANUP] Warning: Could not preserve %s: %s", video_file, e)
         
         # Remove the entire directory
-        shutil.rmtree(output_dir)
-        print(f"[CLEANUP] Removed directory: {output_dir}")
-        
-        if keep_final_video and temp_videos:
-            # Recreate directory and restore final videos
-            os.makedirs(output_dir, exist_ok=True)
-            for temp_name, original_name in temp_videos:
-                try:
-                    shutil.move(temp_name, original_name)
-                    print(f"[CLEANUP] Restored final video: {os.path.basename(original_name)}")
-                except Exception as e:
-                    print(f"[CLEANUP] Warning: Could not restore {original_name}: {e}")
+        try:
+            _invalidate_stat_cache(output_dir)
+            _fast_rmtree(output_dir)
+            log.info("[CLEANUP] Removed directory: %s", output_dir)
+        finally:
+            # Restore preserved videos even if removal failed part-way
+            if keep_final_video and temp_videos:
+                # Recreate directory and restore final videos
+                os.makedirs(output_dir, exist_ok=True)
+                for temp_name, original_name in temp_videos:
+                    try:
+                        _move_file(temp_name, original_name)
+                        log.debug("[CLEANUP] Restored final video: %s", os.path.basename(original_name))
+                    except Exception as e:
+                        log.warning("[CLEANUP] Warning: Could not restore %s: %s", original_name, e)
         
         return True
         
     except Exception as e:
-        print(f"[CLEANUP] Error cleaning up {output_dir}: {e}")
+        log.error("[CLEANUP] Error cleaning up %s: %s", output_dir, e)
         return False
 
 def cleanup_old_results(max_age_hours: int = 24, results_base_dir: str = "results") -> int:
@@ -87,33 +255,33 @@ def cleanup_old_results(max_age_hours: int = 24, results_base_dir: str = "result
     """
     try:
         if not os.path.exists(results_base_dir):
-            print(f"[CLEANUP] Results directory {results_base_dir} doesn't exist")
+            log.info("[CLEANUP] Results directory %s doesn't exist", results_base_dir)
             return 0
         
-        cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
+        cutoff_ts = time.time() - max_age_hours * 3600
         cleaned_count = 0
+        _prune_stat_cache()
         
-        print(f"[CLEANUP] Scanning for result folders older than {max_age_hours} hours...")
+        log.info("[CLEANUP] Scanning for result folders older than %s hours...", max_age_hours)
         
-        for folder_name in os.listdir(results_base_dir):
-            folder_path = os.path.join(results_base_dir, folder_name)
-            
-            if not os.path.isdir(folder_path):
-                continue
-            
-            # Check folder creation time
-            folder_creation_time = datetime.fromtimestamp(os.path.getctime(folder_path))
-            
-            if folder_creation_time < cutoff_time:
-                print(f"[CLEANUP] Found old folder: {folder_name} (created: {folder_creation_time})")
-                if cleanup_result_folder(folder_path, keep_final_video=False):
-                    cleaned_count += 1
+        # One scandir pass; is_dir() and stat() share the entry's cached data
+        with os.scandir(results_base_dir) as entries:
+            old_folders = [
+                (entry.name, entry.path, _cached_stat(entry).st_ctime)
+                for entry in entries
+                if entry.is_dir(follow_symlinks=False) and _cached_stat(entry).st_ctime < cutoff_ts
+            ]
         
-        print(f"[CLEANUP] Cleaned up {cleaned_count} old result folders")
+        for folder_name, folder_path, created_ts in old_folders:
+            log.debug("[CLEANUP] Found old folder: %s (created: %s)", folder_name, datetime.fromtimestamp(created_ts))
+            if cleanup_result_folder(folder_path, keep_final_video=False):
+                cleaned_count += 1
+        
+        log.info("[CLEANUP] Cleaned up %d old result folders", cleaned_count)
         return cleaned_count
         
     except Exception as e:
-        print(f"[CLEANUP] Error during old results cleanup: {e}")
+        log.error("[CLEANUP] Error during old results cleanup: %s", e)
         return 0
 
 def cleanup_temporary_files(base_dir: str = ".") -> int:
@@ -127,41 +295,77 @@ def cleanup_temporary_files(base_dir: str = ".") -> int:
         int: Number of files cleaned up
     """
     try:
-        temp_patterns = [
-            "temp_*.mp3",
-            "temp_*.wav", 
-            "temp_*.png",
-            "temp_*.jpg",
-            "temp_*.mp4",
-            "fallback_*.png",
-            "segment_*_temp.*",
-            "silent_audio_*.wav",
-            "*_temp_*.*"
-        ]
-        
         cleaned_count = 0
-        print(f"[CLEANUP] Scanning for temporary files in {base_dir}...")
+        log.info("[CLEANUP] Scanning for temporary files in %s...", base_dir)
         
-        for pattern in temp_patterns:
-            files = glob.glob(os.path.join(base_dir, pattern))
-            for file_path in files:
-                try:
-                    # Only clean files older than 1 hour
-                    file_age = datetime.now() - datetime.fromtimestamp(os.path.getctime(file_path))
-                    if file_age > timedelta(hours=1):
-                        os.remove(file_path)
-                        print(f"[CLEANUP] Removed temp file: {os.path.basename(file_path)}")
-                        cleaned_count += 1
-                except Exception as e:
-                    print(f"[CLEANUP] Could not remove {file_path}: {e}")
+        # Only clean files older than 1 hour
+        cutoff_ts = time.time() - 3600
+        
+        # Hold a descriptor for base_dir and unlink names relative to it, so
+        # the kernel does not re-resolve the directory path for every file
+        use_dir_fd = os.unlink in os.supports_dir_fd and os.scandir in os.supports_fd
+        dir_fd = os.open(base_dir, os.O_RDONLY | os.O_DIRECTORY) if use_dir_fd else None
+        
+        try:
+            expired_files = []
+            with os.scandir(dir_fd if use_dir_fd else base_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or not _TEMP_FILE_RE.match(entry.name):
+                        continue
+                    try:
+                        if entry.is_file() and entry.stat().st_ctime < cutoff_ts:
+                            expired_files.append(entry.name)
+                    except Exception as e:
+                        log.warning("[CLEANUP] Could not remove %s: %s", os.path.join(base_dir, entry.name), e)
+            
+            # Unlinks block on the filesystem with the GIL released, so run them
+            # from a thread pool and report each result as it completes
+            if expired_files:
+                with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+                    if use_dir_fd:
+                        futures = {pool.submit(os.unlink, name, dir_fd=dir_fd): name for name in expired_files}
+                    else:
+                        futures = {pool.submit(os.remove, os.path.join(base_dir, name)): name for name in expired_files}
+                    for future in as_completed(futures):
+                        name = futures[future]
+                        try:
+                            future.result()
+                            log.debug("[CLEANUP] Removed temp file: %s", name)
+                            cleaned_count += 1
+                        except Exception as e:
+                            log.warning("[CLEANUP] Could not remove %s: %s", os.path.join(base_dir, name), e)
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
         
-        print(f"[CLEANUP] Cleaned up {cleaned_count} temporary files")
+        log.info("[CLEANUP] Cleaned up %d temporary files", cleaned_count)
         return cleaned_count
         
     except Exception as e:
-        print(f"[CLEANUP] Error during temp file cleanup: {e}")
+        log.error("[CLEANUP] Error during temp file cleanup: %s", e)
         return 0
 
+# Background cleanup threads started by auto_cleanup_after_upload
+_background_cleanups = set()
+_background_cleanups_lock = threading.Lock()
+
+def _run_background_cleanup(output_dir: str):
+    """Thread body for auto_cleanup_after_upload"""
+    try:
+        cleanup_result_folder(output_dir, keep_final_video=True)
+    finally:
+        with _background_cleanups_lock:
+            _background_cleanups.discard(threading.current_thread())
+
+def _wait_for_background_cleanups():
+    """Join outstanding background cleanups at interpreter exit"""
+    with _background_cleanups_lock:
+        pending = list(_background_cleanups)
+    for thread in pending:
+        thread.join()
+
+atexit.register(_wait_for_background_cleanups)
+
 def auto_cleanup_after_upload(output_dir: str, upload_success: bool) -> bool:
     """
     Automatically clean up result folder after successful upload to Cloudflare
@@ -171,15 +375,20 @@ def auto_cleanup_after_upload(output_dir: str, upload_success: bool) -> bool:
         upload_success: Whether the upload was successful
     
     Returns:
-        bool: True if cleanup was performed
+        bool: True if cleanup was started (it runs on a background thread)
     """
     if upload_success:
-        print(f"[CLEANUP] Upload successful, cleaning up result folder...")
-        # Give a small delay to ensure upload is complete
-        time.sleep(2)
-        return cleanup_result_folder(output_dir, keep_final_video=True)
+        log.info("[CLEANUP] Upload successful, cleaning up result folder...")
+        # The upload has already returned by the time this is called, so the
+        # cleanup can run off the caller's path; it is tracked so process exit
+        # waits for it rather than leaving a half-removed folder
+        thread = threading.Thread(target=_run_background_cleanup, args=(output_dir,), daemon=True)
+        with _background_cleanups_lock:
+            _background_cleanups.add(thread)
+        thread.start()
+        return True
     else:
-        print(f"[CLEANUP] Upload failed, keeping result folder for debugging")
+        log.info("[CLEANUP] Upload failed, keeping result folder for debugging")
         return False
 
 def get_cleanup_stats(results_base_dir: str = "results") -> Dict[str, Any]:
@@ -206,24 +415,23 @@ def get_cleanup_stats(results_base_dir: str = "results") -> Dict[str, Any]:
         
         oldest_time = None
         newest_time = None
+        _prune_stat_cache()
         
-        for folder_name in os.listdir(results_base_dir):
-            folder_path = os.path.join(results_base_dir, folder_name)
-            
-            if not os.path.isdir(folder_path):
-                continue
+        with os.scandir(results_base_dir) as folders:
+            folder_entries = [entry for entry in folders if entry.is_dir()]
+        
+        for folder_entry in folder_entries:
+            folder_name = folder_entry.name
             
             stats["total_folders"] += 1
             
             # Calculate folder size
             folder_size = 0
-            for dirpath, dirnames, filenames in os.walk(folder_path):
-                for filename in filenames:
-                    filepath = os.path.join(dirpath, filename)
-                    try:
-                        folder_size += os.path.getsize(filepath)
-                    except:
-                        pass
+            for file_entry in _walk_scandir(folder_entry.path):
+                try:
+                    folder_size += _cached_stat(file_entry).st_size
+                except OSError:
+                    pass
             
             folder_size_mb = folder_size / (1024 * 1024)
             stats["total_size_mb"] += folder_size_mb
@@ -235,28 +443,33 @@ def get_cleanup_stats(results_base_dir: str = "results") -> Dict[str, Any]:
                     "size_mb": round(folder_size_mb, 2)
                 })
             
-            # Track oldest and newest folders
-            folder_time = datetime.fromtimestamp(os.path.getctime(folder_path))
+            # Track oldest and newest folders - compare raw ctime floats and
+            # only build the datetime strings for the winners below
+            folder_ts = _cached_stat(folder_entry).st_ctime
             
-            if oldest_time is None or folder_time < oldest_time:
-                oldest_time = folder_time
-                stats["oldest_folder"] = {
-                    "name": folder_name,
-                    "created": folder_time.isoformat()
-                }
+            if oldest_time is None or folder_ts < oldest_time:
+                oldest_time = folder_ts
+                oldest_name = folder_name
             
-            if newest_time is None or folder_time > newest_time:
-                newest_time = folder_time
-                stats["newest_folder"] = {
-                    "name": folder_name,
-                    "created": folder_time.isoformat()
-                }
+            if newest_time is None or folder_ts > newest_time:
+                newest_time = folder_ts
+                newest_name = folder_name
+        
+        if oldest_time is not None:
+            stats["oldest_folder"] = {
+                "name": oldest_name,
+                "created": datetime.fromtimestamp(oldest_time).isoformat()
+            }
+            stats["newest_folder"] = {
+                "name": newest_name,
+                "created": datetime.fromtimestamp(newest_time).isoformat()
+            }
         
         stats["total_size_mb"] = round(stats["total_size_mb"], 2)
         return stats
         
     except Exception as e:
-        print(f"[CLEANUP] Error getting cleanup stats: {e}")
+        log.error("[CLEANUP] Error getting cleanup stats: %s", e)
         return {"error": str(e)}
 
 # Background cleanup function for scheduled runs
@@ -265,7 +478,7 @@ def scheduled_cleanup():
     Run scheduled cleanup tasks
     This can be called periodically to maintain system cleanliness
     """
-    print(f"[CLEANUP] Starting scheduled cleanup at {datetime.now()}")
+    log.info("[CLEANUP] Starting scheduled cleanup at %s", datetime.now())
     
     # Clean up old result folders (older than 24 hours)
     old_folders_cleaned = cleanup_old_results(max_age_hours=24)
@@ -276,11 +489,15 @@ def scheduled_cleanup():
     # Get current stats
     stats = get_cleanup_stats()
     
-    print(f"[CLEANUP] Scheduled cleanup complete:")
-    print(f"  - Old folders cleaned: {old_folders_cleaned}")
-    print(f"  - Temp files cleaned: {temp_files_cleaned}")
-    print(f"  - Current result folders: {stats.get('total_folders', 0)}")
-    print(f"  - Total storage used: {stats.get('total_size_mb', 0):.2f} MB")
+    log.info(
+        "[CLEANUP] Scheduled cleanup complete:\n"
+        "  - Old folders cleaned: %s\n"
+        "  - Temp files cleaned: %s\n"
+        "  - Current result folders: %s\n"
+        "  - Total storage used: %.2f MB",
+        old_folders_cleaned, temp_files_cleaned,
+        stats.get('total_folders', 0), stats.get('total_size_mb', 0)
+    )
     
     return {
         "old_folders_cleaned": old_folders_cleaned,
@@ -290,4 +507,5 @@ def scheduled_cleanup():
 
 if __name__ == "__main__":
     # Run cleanup when script is executed directly
+    configure_logging()
     scheduled_cleanup()
\ No newline at end of file
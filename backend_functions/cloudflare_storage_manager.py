@@ -5,11 +5,82 @@ Manages video uploads to Cloudflare with storage limits and automatic cleanup
 
 import os
 import json
+import base64
 import time
+import atexit
+import bisect
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict, fields
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
+# orjson (optional) parses and serializes storage records several times faster
+# than json, straight to/from bytes
+try:
+    import orjson
+    
+    _loads_json = orjson.loads
+    
+    def _dumps_json(obj: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS if indent else 0)
+except ImportError:
+    _loads_json = json.loads
+    
+    def _dumps_json(obj: Any, indent: bool = False) -> bytes:
+        return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+# Cloudflare Stream API endpoint (format with account_id)
+CLOUDFLARE_STREAM_URL = "https://api.cloudflare.com/client/v4/accounts/{account_id}/stream"
+
+# tus resumable uploads: Cloudflare needs every chunk but the last to be a
+# multiple of 256 KiB and at least 5 MiB. A failed chunk is resumed from the
+# server's offset up to UPLOAD_CHUNK_RETRIES times
+TUS_VERSION = "1.0.0"
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+UPLOAD_CHUNK_RETRIES = 3
+
+# Shared session so successive uploads reuse pooled keep-alive connections
+_http_session = requests.Session()
+_http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+@dataclass(slots=True)
+class UploadRecord:
+    """One video stored on Cloudflare (slotted - one per stored video)"""
+    job_id: str
+    cloudflare_id: str
+    cloudflare_url: str
+    filename: str
+    file_size: int
+    size_mb: float
+    uploaded_at: str  # ISO timestamp
+    local_file_path: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    local_file_deleted: Optional[bool] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization"""
+        data = asdict(self)
+        if data["local_file_deleted"] is None:
+            del data["local_file_deleted"]
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'UploadRecord':
+        """Create from dictionary (JSON deserialization), ignoring unknown keys"""
+        values = {key: data[key] for key in _UPLOAD_RECORD_FIELDS if key in data}
+        # Older records may lack fields that were only read with .get() before
+        values.setdefault("filename", "")
+        values.setdefault("uploaded_at", "")
+        values.setdefault("file_size", 0)
+        values.setdefault("size_mb", round(values["file_size"] / (1024 * 1024), 2))
+        return cls(**values)
+
+_UPLOAD_RECORD_FIELDS = tuple(f.name for f in fields(UploadRecord))
+
 class CloudflareStorageManager:
     """
     Manages video storage on Cloudflare with automatic cleanup and limits
@@ -18,37 +89,174 @@ class CloudflareStorageManager:
     def __init__(self, 
                  storage_file: str = "cloudflare_storage.json",
                  max_videos: int = 30,
-                 cloudflare_config: Optional[Dict[str, str]] = None):
+                 cloudflare_config: Optional[Dict[str, str]] = None,
+                 save_flush_interval: float = 0.5):
         
         self.storage_file = storage_file
         self.max_videos = max_videos
         self.cloudflare_config = cloudflare_config or {}
         
+        # Record changes are appended to an NDJSON log next to the storage file
+        # (one "put"/"del" line each) instead of rewriting every record. A
+        # background flusher fsyncs the log at most once per
+        # save_flush_interval and compacts it into the storage file once it
+        # holds more than twice as many lines as there are live records
+        self.log_file = storage_file + ".log"
+        self.save_flush_interval = save_flush_interval
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._flusher_thread = None
+        self._log_lines = 0
+        
         # Load existing storage records
         self.storage_records = self._load_storage_records()
         
+        # (uploaded_at, job_id) pairs kept sorted so the oldest and newest
+        # videos are found without sorting or scanning every record
+        self._by_time = sorted(
+            (record.uploaded_at, job_id) for job_id, record in self.storage_records.items()
+        )
+        self._log = open(self.log_file, 'ab')
+        atexit.register(self.flush)
+        
         print(f"[CLOUDFLARE] Initialized storage manager (max: {max_videos} videos)")
     
-    def _load_storage_records(self) -> Dict[str, Dict[str, Any]]:
-        """Load storage records from JSON file"""
-        if not os.path.exists(self.storage_file):
-            return {}
+    def _load_storage_records(self) -> Dict[str, UploadRecord]:
+        """Load the compacted storage records, then replay the change log over them"""
+        records = {}
+        
+        if os.path.exists(self.storage_file):
+            try:
+                with open(self.storage_file, 'rb') as f:
+                    stored = _loads_json(f.read())
+            except Exception as e:
+                print(f"[CLOUDFLARE] Error loading storage records: {e}")
+                stored = {}
+            
+            # A malformed record is skipped on its own rather than dropping the rest
+            for job_id, data in stored.items():
+                try:
+                    records[job_id] = UploadRecord.from_dict(data)
+                except (TypeError, AttributeError) as e:
+                    print(f"[CLOUDFLARE] Skipping malformed storage record {job_id}: {e}")
+        
+        if os.path.exists(self.log_file):
+            try:
+                with open(self.log_file, 'rb') as f:
+                    for line in f:
+                        try:
+                            entry = _loads_json(line)
+                        except ValueError:
+                            continue  # Torn final line from a crash mid-append
+                        self._log_lines += 1
+                        if entry["op"] == "put":
+                            try:
+                                records[entry["id"]] = UploadRecord.from_dict(entry["rec"])
+                            except (TypeError, AttributeError) as e:
+                                print(f"[CLOUDFLARE] Skipping malformed storage record {entry['id']}: {e}")
+                        else:
+                            records.pop(entry["id"], None)
+            except Exception as e:
+                print(f"[CLOUDFLARE] Error replaying storage log: {e}")
+        
+        return records
+    
+    def _append_record(self, op: str, job_id: str, record: Optional[UploadRecord] = None):
+        """Append one record change ("put" or "del") to the log (call with lock held)"""
+        entry = {"op": op, "id": job_id}
+        if record is not None:
+            entry["rec"] = record.to_dict()
         
         try:
-            with open(self.storage_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            self._log.write(_dumps_json(entry) + b"\n")
+            self._log.flush()
+            self._log_lines += 1
         except Exception as e:
-            print(f"[CLOUDFLARE] Error loading storage records: {e}")
-            return {}
+            print(f"[CLOUDFLARE] Error appending storage record: {e}")
+        
+        self._schedule_save()
+    
+    def _put_record(self, job_id: str, record: UploadRecord):
+        """Add or replace a storage record, keeping the time index and log in step (call with lock held)"""
+        if job_id in self.storage_records:
+            self._remove_record(job_id)
+        
+        self.storage_records[job_id] = record
+        bisect.insort(self._by_time, (record.uploaded_at, job_id))
+        self._append_record("put", job_id, record)
+    
+    def _remove_record(self, job_id: str) -> Optional[UploadRecord]:
+        """Drop a storage record, keeping the time index and log in step (call with lock held)"""
+        record = self.storage_records.pop(job_id, None)
+        if record is None:
+            return None
+        
+        key = (record.uploaded_at, job_id)
+        index = bisect.bisect_left(self._by_time, key)
+        if index < len(self._by_time) and self._by_time[index] == key:
+            del self._by_time[index]
+        
+        self._append_record("del", job_id)
+        return record
     
     def _save_storage_records(self):
-        """Save storage records to JSON file"""
+        """Compact all records into the storage file and truncate the log (call with lock held)"""
+        self._dirty = False
         try:
-            with open(self.storage_file, 'w', encoding='utf-8') as f:
-                json.dump(self.storage_records, f, indent=2, ensure_ascii=False)
+            # Write a temp file, fsync it and rename it over the old records so
+            # a crash mid-write never leaves a truncated file behind. Replaying
+            # a not-yet-truncated log over the new file is harmless
+            temp_file = self.storage_file + ".tmp"
+            with open(temp_file, 'wb') as f:
+                f.write(_dumps_json(
+                    {job_id: record.to_dict() for job_id, record in self.storage_records.items()},
+                    indent=True
+                ))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.storage_file)
+            
+            self._log.truncate(0)
+            self._log_lines = 0
         except Exception as e:
             print(f"[CLOUDFLARE] Error saving storage records: {e}")
     
+    def _sync_log(self):
+        """Make appended log lines durable, compacting the log if it has grown too long (call with lock held)"""
+        self._dirty = False
+        if self._log_lines > 2 * max(1, len(self.storage_records)):
+            self._save_storage_records()
+            return
+        
+        try:
+            os.fsync(self._log.fileno())
+        except Exception as e:
+            print(f"[CLOUDFLARE] Error syncing storage log: {e}")
+    
+    def _schedule_save(self):
+        """Mark the log dirty so the background flusher syncs it (call with lock held)"""
+        self._dirty = True
+        
+        if self._flusher_thread is None or not self._flusher_thread.is_alive():
+            self._flusher_thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher_thread.start()
+    
+    def _flush_loop(self):
+        """Sync coalesced log appends every flush interval while dirty"""
+        while True:
+            time.sleep(self.save_flush_interval)
+            with self._lock:
+                if not self._dirty:
+                    self._flusher_thread = None
+                    return
+                self._sync_log()
+    
+    def flush(self):
+        """Make any pending record changes durable immediately"""
+        with self._lock:
+            if self._dirty:
+                self._sync_log()
+    
     def check_storage_limit(self) -> Dict[str, Any]:
         """Check current storage status against limits"""
         current_count = len(self.storage_records)
@@ -64,17 +272,16 @@ class CloudflareStorageManager:
     
     def _get_oldest_videos(self, limit: int = 5) -> List[Dict[str, Any]]:
         """Get oldest videos for cleanup"""
-        videos = list(self.storage_records.items())
-        # Sort by upload timestamp
-        videos.sort(key=lambda x: x[1].get("uploaded_at", ""))
+        with self._lock:
+            videos = [(job_id, self.storage_records[job_id]) for _, job_id in self._by_time[:limit]]
         
         return [{
             "job_id": job_id,
-            "cloudflare_id": record["cloudflare_id"],
-            "filename": record.get("filename", "unknown"),
-            "uploaded_at": record.get("uploaded_at"),
-            "size_mb": record.get("size_mb", 0)
-        } for job_id, record in videos[:limit]]
+            "cloudflare_id": record.cloudflare_id,
+            "filename": record.filename or "unknown",
+            "uploaded_at": record.uploaded_at,
+            "size_mb": record.size_mb
+        } for job_id, record in videos]
     
     def upload_video_to_cloudflare(self, job_id: str, video_file_path: str, 
                                   video_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -84,8 +291,10 @@ class CloudflareStorageManager:
             storage_status = self.check_storage_limit()
             
             if storage_status["storage_full"]:
-                # Perform cleanup of oldest video
-                cleanup_result = self._cleanup_oldest_video()
+                # Free enough of the oldest videos to get back under the limit
+                # (more than one if max_videos was lowered)
+                excess = storage_status["current_videos"] - self.max_videos + 1
+                cleanup_result = self._cleanup_oldest_videos(excess)
                 if not cleanup_result["success"]:
                     return {
                         "success": False,
@@ -94,10 +303,12 @@ class CloudflareStorageManager:
                         "cleanup_result": cleanup_result
                     }
                 
-                print(f"[CLOUDFLARE] Cleaned up oldest video to make space")
+                print(f"[CLOUDFLARE] Cleaned up {len(cleanup_result['deleted'])} oldest video(s) to make space")
             
-            # Check if video file exists
-            if not os.path.exists(video_file_path):
+            # Check the video file exists and get its size with a single stat
+            try:
+                file_size = os.stat(video_file_path).st_size
+            except FileNotFoundError:
                 return {
                     "success": False,
                     "error": "Video file not found",
@@ -105,47 +316,54 @@ class CloudflareStorageManager:
                 }
             
             # Get file info
-            file_size = os.path.getsize(video_file_path)
             filename = os.path.basename(video_file_path)
             
-            # Simulate Cloudflare upload (replace with actual API call)
-            cloudflare_result = self._simulate_cloudflare_upload(
-                video_file_path, filename, file_size
-            )
+            # Real upload when credentials are configured, simulated otherwise
+            if self.cloudflare_config.get("account_id") and self.cloudflare_config.get("api_token"):
+                cloudflare_result = self._do_cloudflare_upload(video_file_path, filename, file_size)
+            else:
+                cloudflare_result = self._simulate_cloudflare_upload(
+                    video_file_path, filename, file_size
+                )
             
             if cloudflare_result["success"]:
                 # Record successful upload
-                upload_record = {
-                    "job_id": job_id,
-                    "cloudflare_id": cloudflare_result["cloudflare_id"],
-                    "cloudflare_url": cloudflare_result["url"],
-                    "filename": filename,
-                    "file_size": file_size,
-                    "size_mb": round(file_size / (1024 * 1024), 2),
-                    "uploaded_at": datetime.now().isoformat(),
-                    "local_file_path": video_file_path,
-                    "metadata": video_metadata or {}
-                }
+                upload_record = UploadRecord(
+                    job_id=job_id,
+                    cloudflare_id=cloudflare_result["cloudflare_id"],
+                    cloudflare_url=cloudflare_result["url"],
+                    filename=filename,
+                    file_size=file_size,
+                    size_mb=round(file_size / (1024 * 1024), 2),
+                    uploaded_at=datetime.now().isoformat(),
+                    local_file_path=video_file_path,
+                    metadata=video_metadata or {}
+                )
                 
-                self.storage_records[job_id] = upload_record
-                self._save_storage_records()
+                with self._lock:
+                    self._put_record(job_id, upload_record)
                 
                 # Delete local file after successful upload
                 try:
                     os.remove(video_file_path)
-                    upload_record["local_file_deleted"] = True
+                    local_file_deleted = True
                     print(f"[CLOUDFLARE] Deleted local file: {filename}")
                 except Exception as e:
                     print(f"[CLOUDFLARE] Warning: Could not delete local file {filename}: {e}")
-                    upload_record["local_file_deleted"] = False
+                    local_file_deleted = False
+                
+                # The record may be mid-compaction on the flusher thread
+                with self._lock:
+                    upload_record.local_file_deleted = local_file_deleted
+                    upload_record_data = upload_record.to_dict()
                 
                 return {
                     "success": True,
                     "cloudflare_id": cloudflare_result["cloudflare_id"],
                     "cloudflare_url": cloudflare_result["url"],
-                    "upload_record": upload_record,
+                    "upload_record": upload_record_data,
                     "storage_status": self.check_storage_limit(),
-                    "local_file_deleted": upload_record.get("local_file_deleted", False)
+                    "local_file_deleted": local_file_deleted
                 }
             else:
                 return {
@@ -161,6 +379,75 @@ class CloudflareStorageManager:
                 "exception": "CloudflareStorageManager.upload_video_to_cloudflare"
             }
     
+    def _do_cloudflare_upload(self, file_path: str, filename: str, file_size: int) -> Dict[str, Any]:
+        """
+        Upload a video to Cloudflare Stream with the tus protocol: a POST creates
+        the upload, then the file is PATCHed in UPLOAD_CHUNK_SIZE pieces, so memory
+        use stays flat regardless of video size
+        """
+        try:
+            url = self.cloudflare_config.get("upload_url") or CLOUDFLARE_STREAM_URL.format(
+                account_id=self.cloudflare_config["account_id"]
+            )
+            auth = {
+                "Authorization": f"Bearer {self.cloudflare_config['api_token']}",
+                "Tus-Resumable": TUS_VERSION
+            }
+            
+            start_time = time.time()
+            response = _http_session.post(url, headers={
+                **auth,
+                "Upload-Length": str(file_size),
+                "Upload-Metadata": "name " + base64.b64encode(filename.encode('utf-8')).decode('ascii')
+            }, timeout=(5, 30))
+            response.raise_for_status()
+            upload_url = urljoin(url, response.headers["Location"])
+            cloudflare_id = response.headers["stream-media-id"]
+            
+            # Retries are counted per offset: they reset whenever the server
+            # accepts more bytes, so a long upload is not failed by a few
+            # unrelated blips spread across its chunks
+            offset = 0
+            retries = 0
+            with open(file_path, 'rb') as f:
+                while offset < file_size:
+                    f.seek(offset)
+                    chunk = f.read(UPLOAD_CHUNK_SIZE)
+                    try:
+                        response = _http_session.patch(upload_url, data=chunk, headers={
+                            **auth,
+                            "Upload-Offset": str(offset),
+                            "Content-Type": "application/offset+octet-stream"
+                        }, timeout=(5, 300))
+                        response.raise_for_status()
+                        offset = int(response.headers.get("Upload-Offset", offset + len(chunk)))
+                        retries = 0
+                    except requests.RequestException as e:
+                        retries += 1
+                        if retries > UPLOAD_CHUNK_RETRIES:
+                            raise
+                        print(f"[CLOUDFLARE] Chunk at offset {offset} failed ({e}), resuming ({retries}/{UPLOAD_CHUNK_RETRIES})...")
+                        # Ask the server how much it has so the upload resumes from there
+                        head = _http_session.head(upload_url, headers=auth, timeout=(5, 30))
+                        head.raise_for_status()
+                        resumed_at = int(head.headers["Upload-Offset"])
+                        if resumed_at > offset:
+                            retries = 0
+                        offset = resumed_at
+            
+            return {
+                "success": True,
+                "cloudflare_id": cloudflare_id,
+                "url": f"https://watch.cloudflarestream.com/{cloudflare_id}",
+                "upload_time_seconds": round(time.time() - start_time, 2)
+            }
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
     def _simulate_cloudflare_upload(self, file_path: str, filename: str, file_size: int) -> Dict[str, Any]:
         """Simulate Cloudflare upload (replace with real API)"""
         try:
@@ -187,45 +474,72 @@ class CloudflareStorageManager:
     
     def _cleanup_oldest_video(self) -> Dict[str, Any]:
         """Remove oldest video from Cloudflare to make space"""
+        result = self._cleanup_oldest_videos(1)
+        
+        if not result["success"]:
+            return {key: value for key, value in result.items() if key not in ("deleted", "failed")}
+        
+        deleted = result["deleted"][0]
+        return {
+            "success": True,
+            "deleted_job_id": deleted["job_id"],
+            "deleted_cloudflare_id": deleted["cloudflare_id"],
+            "deleted_filename": deleted["filename"],
+            "freed_space_mb": deleted["size_mb"]
+        }
+    
+    def _cleanup_oldest_videos(self, count: int) -> Dict[str, Any]:
+        """Remove the count oldest videos from Cloudflare, issuing the deletes concurrently"""
         try:
-            oldest_videos = self._get_oldest_videos(1)
+            oldest_videos = self._get_oldest_videos(count)
             
             if not oldest_videos:
-                return {"success": False, "error": "No videos to cleanup"}
+                return {"success": False, "error": "No videos to cleanup", "deleted": [], "failed": []}
             
-            oldest_video = oldest_videos[0]
-            job_id = oldest_video["job_id"]
-            cloudflare_id = oldest_video["cloudflare_id"]
+            # Deletes are independent API round trips - overlap them
+            with ThreadPoolExecutor(max_workers=min(8, len(oldest_videos))) as pool:
+                delete_results = list(pool.map(
+                    self._delete_from_cloudflare, [video["cloudflare_id"] for video in oldest_videos]
+                ))
             
-            # Delete from Cloudflare
-            delete_result = self._delete_from_cloudflare(cloudflare_id)
+            deleted = []
+            failed = []
+            for video, delete_result in zip(oldest_videos, delete_results):
+                if delete_result["success"]:
+                    deleted.append(video)
+                else:
+                    failed.append({**video, "cloudflare_error": delete_result.get("error")})
             
-            if delete_result["success"]:
-                # Remove from local records
-                if job_id in self.storage_records:
-                    del self.storage_records[job_id]
-                    self._save_storage_records()
-                
-                print(f"[CLOUDFLARE] Cleaned up oldest video: {oldest_video['filename']}")
-                
-                return {
-                    "success": True,
-                    "deleted_job_id": job_id,
-                    "deleted_cloudflare_id": cloudflare_id,
-                    "deleted_filename": oldest_video["filename"],
-                    "freed_space_mb": oldest_video["size_mb"]
-                }
-            else:
+            # Remove every deleted video from local records in one go
+            with self._lock:
+                for video in deleted:
+                    self._remove_record(video["job_id"])
+            
+            for video in deleted:
+                print(f"[CLOUDFLARE] Cleaned up oldest video: {video['filename']}")
+            
+            if not deleted:
                 return {
                     "success": False,
                     "error": "Failed to delete from Cloudflare",
-                    "cloudflare_error": delete_result.get("error")
+                    "cloudflare_error": failed[0]["cloudflare_error"],
+                    "deleted": deleted,
+                    "failed": failed
                 }
+            
+            return {
+                "success": True,
+                "deleted": deleted,
+                "failed": failed,
+                "freed_space_mb": round(sum(video["size_mb"] for video in deleted), 2)
+            }
                 
         except Exception as e:
             return {
                 "success": False,
-                "error": str(e)
+                "error": str(e),
+                "deleted": [],
+                "failed": []
             }
     
     def delete_video_from_cloudflare(self, job_id: str) -> Dict[str, Any]:
@@ -238,22 +552,22 @@ class CloudflareStorageManager:
                 }
             
             record = self.storage_records[job_id]
-            cloudflare_id = record["cloudflare_id"]
+            cloudflare_id = record.cloudflare_id
             
             # Delete from Cloudflare
             delete_result = self._delete_from_cloudflare(cloudflare_id)
             
             if delete_result["success"]:
                 # Remove from local records
-                del self.storage_records[job_id]
-                self._save_storage_records()
+                with self._lock:
+                    self._remove_record(job_id)
                 
                 return {
                     "success": True,
                     "deleted_job_id": job_id,
                     "deleted_cloudflare_id": cloudflare_id,
-                    "deleted_filename": record.get("filename"),
-                    "freed_space_mb": record.get("size_mb", 0),
+                    "deleted_filename": record.filename,
+                    "freed_space_mb": record.size_mb,
                     "storage_status": self.check_storage_limit()
                 }
             else:
@@ -295,12 +609,12 @@ class CloudflareStorageManager:
         for job_id, record in self.storage_records.items():
             videos.append({
                 "job_id": job_id,
-                "cloudflare_id": record["cloudflare_id"],
-                "cloudflare_url": record["cloudflare_url"],
-                "filename": record["filename"],
-                "size_mb": record["size_mb"],
-                "uploaded_at": record["uploaded_at"],
-                "metadata": record.get("metadata", {})
+                "cloudflare_id": record.cloudflare_id,
+                "cloudflare_url": record.cloudflare_url,
+                "filename": record.filename,
+                "size_mb": record.size_mb,
+                "uploaded_at": record.uploaded_at,
+                "metadata": record.metadata
             })
         
         # Sort by upload time (newest first)
@@ -310,20 +624,23 @@ class CloudflareStorageManager:
     
     def get_storage_stats(self) -> Dict[str, Any]:
         """Get storage statistics"""
-        videos = list(self.storage_records.values())
-        
-        total_size = sum(v.get("size_mb", 0) for v in videos)
-        avg_size = total_size / len(videos) if videos else 0
+        with self._lock:
+            videos = list(self.storage_records.values())
+            oldest_video = self.storage_records[self._by_time[0][1]].to_dict() if self._by_time else None
+            newest_video = self.storage_records[self._by_time[-1][1]].to_dict() if self._by_time else None
         
-        # Upload timeline (last 7 days)
-        now = datetime.now()
-        recent_uploads = []
+        # Total size and the upload timeline (up to 7 whole days ago) in one
+        # pass; uploaded_at is an ISO string, so it compares as a string
+        recent_cutoff = (datetime.now() - timedelta(days=8)).isoformat()
+        total_size = 0
+        recent_uploads = 0
         
         for record in videos:
-            upload_time = datetime.fromisoformat(record["uploaded_at"])
-            days_ago = (now - upload_time).days
-            if days_ago <= 7:
-                recent_uploads.append(record)
+            total_size += record.size_mb
+            if record.uploaded_at > recent_cutoff:
+                recent_uploads += 1
+        
+        avg_size = total_size / len(videos) if videos else 0
         
         return {
             "total_videos": len(videos),
@@ -332,10 +649,10 @@ class CloudflareStorageManager:
             "total_size_mb": round(total_size, 2),
             "average_video_size_mb": round(avg_size, 2),
             "storage_usage_percent": round((len(videos) / self.max_videos) * 100, 1),
-            "recent_uploads_7_days": len(recent_uploads),
-            "oldest_video": min(videos, key=lambda x: x["uploaded_at"]) if videos else None,
-            "newest_video": max(videos, key=lambda x: x["uploaded_at"]) if videos else None,
-            "storage_file_exists": os.path.exists(self.storage_file)
+            "recent_uploads_7_days": recent_uploads,
+            "oldest_video": oldest_video,
+            "newest_video": newest_video,
+            "storage_file_exists": os.path.exists(self.storage_file) or os.path.exists(self.log_file)
         }
 
 # Global instance
@@ -4,12 +4,60 @@ With gTTS fallback when ElevenLabs fails
 """
 
 import os
+import re
+import sys
+import json
+import shutil
+import hashlib
+import threading
+import subprocess
 import requests
-import datetime
-import uuid
-from typing import Dict, Tuple
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Any, Dict, Tuple, Optional, List, Callable
+
+# orjson (optional) serializes request bodies several times faster than json
+try:
+    import orjson
+    
+    _dumps_json = orjson.dumps
+except ImportError:
+    def _dumps_json(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+try:
+    from gtts import gTTS as _GTTS
+except ImportError:
+    _GTTS = None
+
+try:
+    from mutagen.mp3 import MP3 as _MP3
+except ImportError:
+    _MP3 = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: cache index updates are not locked across processes
+
+try:
+    from .ffmpeg_video import _FFMPEG_EXE
+except ImportError:
+    from ffmpeg_video import _FFMPEG_EXE
+
+__version__ = "2.0"
+
+# Importing this file under both "elevenlabs_audio" and "backend_functions.elevenlabs_audio"
+# creates two copies with separate HTTP pools and key state; flag it when it happens
+_duplicate = sys.modules.get("elevenlabs_audio" if __name__.startswith("backend_functions.") else "backend_functions.elevenlabs_audio")
+if _duplicate is not None and getattr(_duplicate, "__version__", None):
+    print(f"[AUDIO] WARNING: elevenlabs_audio imported twice ({_duplicate.__name__} and {__name__})")
 
-# Load environment variables
 try:
     from dotenv import load_dotenv
     # Load from parent directory (where .env is located)
@@ -29,8 +77,115 @@ ELEVENLABS_API_KEYS = [
 ELEVENLABS_API_KEYS = [key for key in ELEVENLABS_API_KEYS if key and key != 'sk_fallback_key']
 
 ELEVENLABS_BASE_URL = "https://api.elevenlabs.io/v1"
+ELEVENLABS_MODEL_ID = "eleven_multilingual_v2"
+# ElevenLabs output formats; "video_bg" is for clips the video pipeline re-encodes
+# anyway, at roughly a quarter of the bytes of full-quality narration
+DEFAULT_OUTPUT_FORMAT = "mp3_44100_128"
+OUTPUT_FORMAT_PRESETS = {
+    "narration": "mp3_44100_128",
+    "video_bg": "mp3_22050_32"
+}
+VOICE_SETTINGS = {
+    "stability": 0.75,
+    "similarity_boost": 0.85,
+    "style": 0.4,
+    "use_speaker_boost": True
+}
+
+# Static tail of every TTS request body: ',"model_id":...,"voice_settings":{...}}'
+_REQUEST_BODY_TAIL = b',' + _dumps_json({
+    "model_id": ELEVENLABS_MODEL_ID,
+    "voice_settings": VOICE_SETTINGS
+})[1:]
+
+# Request timeouts (seconds): connect, per-read, and the longest a streaming
+# download may go without delivering a chunk before it is aborted
+CONNECT_TIMEOUT = float(os.getenv('ELEVENLABS_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = float(os.getenv('ELEVENLABS_READ_TIMEOUT', '60'))
+STALL_TIMEOUT = float(os.getenv('ELEVENLABS_STALL_TIMEOUT', '30'))
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# Shared session so successive clips reuse pooled keep-alive connections instead
+# of paying a TCP + TLS handshake per request; xi-api-key is passed per call.
+# Only connection failures are retried here (as httpx retries=2 does below): a
+# POST that reached ElevenLabs may already be billed, and 429s are handled per
+# key in generate_audio
+_http_session = requests.Session()
+_http_session.mount("https://", HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=2,
+        connect=2,
+        read=0,
+        status=0,
+        backoff_factor=0.3,
+        raise_on_status=False
+    )
+))
+_http_session.headers.update({
+    "Accept": "audio/mpeg",
+    "Content-Type": "application/json"
+})
+
+# httpx with h2 (optional) multiplexes concurrent key probes as HTTP/2 streams
+# over one TLS connection; preferred over the requests session when installed
+try:
+    import httpx
+    import h2  # noqa: F401 - required by httpx for http2=True
+    
+    _http2_client = httpx.Client(
+        http2=True,
+        transport=httpx.HTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=16)
+        ),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        headers={"Accept": "audio/mpeg", "Content-Type": "application/json"}
+    )
+except ImportError:
+    _http2_client = None
+
+def _warm_connection():
+    """Resolve DNS and complete the TLS handshake ahead of the first TTS request"""
+    try:
+        if _http2_client is not None:
+            _http2_client.head(f"{ELEVENLABS_BASE_URL}/models", timeout=CONNECT_TIMEOUT)
+        else:
+            _http_session.head(f"{ELEVENLABS_BASE_URL}/models", timeout=CONNECT_TIMEOUT)
+    except Exception:
+        pass  # Warmup is best effort; the real request will connect anyway
+
+if str(os.getenv("ELEVENLABS_WARMUP", "")).lower() in ("1", "true", "yes"):
+    threading.Thread(target=_warm_connection, name="elevenlabs-warmup", daemon=True).start()
 print(f"[AUDIO] Loaded {len(ELEVENLABS_API_KEYS)} ElevenLabs API keys for fallback system")
 
+# Keys that run out of quota (or are invalid) are skipped for this many seconds
+# instead of being tried on every request
+KEY_QUOTA_BACKOFF = 900
+KEY_INVALID_BACKOFF = 86400
+
+# A 429 that is not quota_exceeded (too_many_concurrent_requests, system_busy,
+# rate limits) is transient: retry the same key after a short, doubling backoff
+KEY_BUSY_RETRIES = 2
+KEY_BUSY_BACKOFF = 1.0
+_KEY_STATE: Dict[str, Dict[str, Any]] = {}
+
+# A key that has not started streaming audio within the hedge delay (hung or
+# overloaded) gets the next key started alongside it; the delay is the p95 of
+# recent time-to-audio, but never below KEY_HEDGE_DELAY, so a healthy key is
+# rarely billed twice for the same clip
+KEY_HEDGE_DELAY = float(os.getenv('ELEVENLABS_KEY_HEDGE_DELAY', '3'))
+_audio_latencies = deque(maxlen=50)
+
+# On-disk TTS cache: identical (voice, model, settings, speed, text) requests are
+# served from here instead of calling ElevenLabs/gTTS again
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tts_cache'
+)
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_MB', '500')) * 1024 * 1024
+
 # Updated voice mappings with tested working voices
 VOICE_MAP = {
     'nova': 'pNInz6obpgDQGcFmaJgB',     # Adam - tested working
@@ -44,102 +199,415 @@ VOICE_MAP = {
     'domi': 'AZnzlk1XvdvUeBnXmlld',    # Domi - female voice
 }
 
-def generate_audio_gtts_fallback(text: str, output_dir: str = ".") -> Dict[str, any]:
+@lru_cache(maxsize=32)
+def _resolve_voice(voice: str) -> str:
+    """Map a voice name to its ElevenLabs voice ID, defaulting to Rachel (high quality)"""
+    return VOICE_MAP.get(voice, VOICE_MAP['alloy'])
+
+# MPEG audio Layer III header tables for _mp3_duration (kbps, Hz)
+_MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+def _mp3_duration(filepath: str) -> Optional[float]:
+    """
+    Read an MP3's duration from its headers without decoding it
+    
+    Uses mutagen when installed, falling back to the first frame header (Xing/Info
+    frame count for VBR, bitrate for CBR). Returns None if it cannot be determined.
+    """
+    if _MP3 is not None:
+        try:
+            return _MP3(filepath).info.length
+        except Exception:
+            pass  # Fall back to parsing the frame header ourselves
+    
+    try:
+        with open(filepath, 'rb') as f:
+            head = f.read(65536)
+            file_size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return None
+    
+    # Skip an ID3v2 tag (syncsafe size, optional footer)
+    offset = 0
+    if head[:3] == b"ID3" and len(head) >= 10:
+        offset = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+        if head[5] & 0x10:
+            offset += 10
+    
+    # Find the first Layer III frame header
+    while offset + 4 <= len(head):
+        if head[offset] == 0xFF and (head[offset + 1] & 0xE6) == 0xE2:
+            version = (head[offset + 1] >> 3) & 3
+            bitrate_index = head[offset + 2] >> 4
+            rate_index = (head[offset + 2] >> 2) & 3
+            if version != 1 and 0 < bitrate_index < 15 and rate_index < 3:
+                break
+        offset += 1
+    else:
+        return None
+    
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    bitrate = _MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+    samples_per_frame = 1152 if version == 3 else 576
+    mono = (head[offset + 3] >> 6) == 3
+    
+    # VBR files carry the total frame count in a Xing/Info tag after the side info
+    xing = offset + 4 + ((17 if mono else 32) if version == 3 else (9 if mono else 17))
+    if head[xing:xing + 4] in (b"Xing", b"Info") and head[xing + 7] & 1:
+        frames = int.from_bytes(head[xing + 8:xing + 12], 'big')
+        return frames * samples_per_frame / sample_rate
+    
+    return (file_size - offset) * 8 / bitrate
+
+def _gen_filename(prefix: str) -> str:
+    """Unique, time-ordered mp3 filename without datetime formatting or a full UUID"""
+    return f"{prefix}_{time.time_ns():x}_{os.urandom(4).hex()}.mp3"
+
+def _tts_cache_key(*parts) -> str:
+    """Hash the request parameters into a cache key"""
+    return hashlib.blake2b("|".join(map(str, parts)).encode('utf-8'), digest_size=16).hexdigest()
+
+@contextmanager
+def _tts_cache_lock():
+    """Serialize cache index updates across processes"""
+    os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+    with open(os.path.join(TTS_CACHE_DIR, 'index.lock'), 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _load_cache_index() -> OrderedDict:
+    """Load the LRU index (key -> bytes, least recently used first)"""
+    try:
+        with open(os.path.join(TTS_CACHE_DIR, 'index.json'), 'r', encoding='utf-8') as f:
+            return OrderedDict(json.load(f))
+    except (OSError, ValueError):
+        return OrderedDict()
+
+def _save_cache_index(index: OrderedDict):
+    """Atomically rewrite the LRU index"""
+    index_path = os.path.join(TTS_CACHE_DIR, 'index.json')
+    with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(index_path + '.tmp', index_path)
+
+# Destination directories where hardlinking failed (other filesystem, no link
+# support); later clips there are copied without retrying the link
+_no_link_dirs = set()
+
+def _link_or_copy(src: str, dst: str):
+    """
+    Hardlink src to dst so a cache hit reads and writes no audio bytes,
+    copying when dst is on a filesystem that cannot link to src
+    """
+    dst_dir = os.path.dirname(os.path.abspath(dst))
+    if dst_dir not in _no_link_dirs:
+        try:
+            os.link(src, dst)
+            return
+        except (FileNotFoundError, FileExistsError):
+            raise
+        except OSError:
+            _no_link_dirs.add(dst_dir)
+    shutil.copyfile(src, dst)
+
+def _tts_cache_get(key: str, filepath: str) -> Optional[Dict[str, Any]]:
+    """Materialize a cached clip at filepath and return its stored metadata, or None on miss"""
+    base = os.path.join(TTS_CACHE_DIR, key)
+    try:
+        with open(base + '.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        _link_or_copy(base + '.mp3', filepath)
+    except (OSError, ValueError):
+        return None
+    
+    with _tts_cache_lock():
+        index = _load_cache_index()
+        if key in index:
+            index.move_to_end(key)
+            _save_cache_index(index)
+    return meta
+
+def _tts_cache_put(key: str, path: str, meta: Dict[str, Any]):
+    """Store a generated clip and its metadata, evicting least recently used clips over the size cap"""
+    base = os.path.join(TTS_CACHE_DIR, key)
+    try:
+        with _tts_cache_lock():
+            # Unique temp name: a stale one left by a crash would make os.link fail
+            tmp_path = f"{base}.{os.urandom(4).hex()}.mp3.tmp"
+            try:
+                _link_or_copy(path, tmp_path)
+                os.replace(tmp_path, base + '.mp3')
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            with open(base + '.json', 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            
+            index = _load_cache_index()
+            index[key] = meta['file_size']
+            index.move_to_end(key)
+            total = sum(index.values())
+            while total > TTS_CACHE_MAX_BYTES and len(index) > 1:
+                old_key, old_size = index.popitem(last=False)
+                total -= old_size
+                for ext in ('.mp3', '.json'):
+                    try:
+                        os.remove(os.path.join(TTS_CACHE_DIR, old_key + ext))
+                    except FileNotFoundError:
+                        pass
+            _save_cache_index(index)
+    except OSError as e:
+        print(f"[AUDIO] Could not cache audio: {e}")
+
+def _cached_result(key: str, filepath: str, text: str) -> Optional[Dict[str, Any]]:
+    """Build a generate_audio result from a cache hit"""
+    meta = _tts_cache_get(key, filepath)
+    if meta is None:
+        return None
+    print(f"[AUDIO] Cache hit: {os.path.basename(filepath)} ({meta['file_size']/1024:.1f} KB)")
+    return {
+        "success": True,
+        "audio_file": filepath,
+        "duration_seconds": meta['duration_seconds'],
+        "duration_estimated": meta.get('duration_estimated', True),
+        "file_size": meta['file_size'],
+        "voice_used": meta['voice_used'],
+        "text_length": len(text),
+        "word_count": len(text.split()),
+        "cached": True
+    }
+
+def _cache_result(key: str, result: Dict[str, Any]):
+    """Store a successful generate_audio result in the cache"""
+    _tts_cache_put(key, result['audio_file'], {
+        "duration_seconds": result['duration_seconds'],
+        "duration_estimated": result['duration_estimated'],
+        "file_size": result['file_size'],
+        "voice_used": result['voice_used']
+    })
+
+def generate_audio_gtts_fallback(text: str, output_dir: str = ".") -> Dict[str, Any]:
     """
     Fallback audio generation using gTTS when ElevenLabs fails
     """
     try:
-        from gtts import gTTS
-        import io
-        
         print("[AUDIO] ElevenLabs failed, using gTTS fallback...")
         
         # Generate filename
-        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-        filename = f'audio_gtts_{timestamp}_{uuid.uuid4().hex[:8]}.mp3'
+        filename = _gen_filename('audio_gtts')
         filepath = os.path.join(output_dir, filename)
         
+        cache_key = _tts_cache_key("gtts", "en", text)
+        cached = _cached_result(cache_key, filepath, text)
+        if cached:
+            return cached
+        
+        if _GTTS is None:
+            return {"success": False, "error": "gTTS not available (pip install gtts)"}
+        
         # Generate TTS
-        tts = gTTS(text=text, lang='en', slow=False)
+        tts = _GTTS(text=text, lang='en', slow=False)
         tts.save(filepath)
         
         # Get file info
         file_size = os.path.getsize(filepath)
         
-        # Estimate duration
+        # Read duration from the MP3 headers, estimating from word count if that fails
         words = len(text.split())
-        estimated_duration = (words / 150) * 60  # 150 WPM
+        duration = _mp3_duration(filepath)
+        duration_estimated = duration is None
+        if duration_estimated:
+            duration = (words / 150) * 60  # 150 WPM
         
-        print(f"[AUDIO] gTTS Generated: {filename} ({file_size/1024:.1f} KB, ~{estimated_duration:.1f}s)")
+        print(f"[AUDIO] gTTS Generated: {filename} ({file_size/1024:.1f} KB, {'~' if duration_estimated else ''}{duration:.1f}s)")
         
-        return {
+        result = {
             "success": True,
             "audio_file": filepath,
-            "duration_seconds": estimated_duration,
+            "duration_seconds": duration,
+            "duration_estimated": duration_estimated,
             "file_size": file_size,
             "voice_used": "gtts_fallback",
             "text_length": len(text),
             "word_count": words
         }
+        _cache_result(cache_key, result)
+        return result
         
-    except ImportError:
-        return {"success": False, "error": "gTTS not available (pip install gtts)"}
     except Exception as e:
         return {"success": False, "error": f"gTTS fallback failed: {e}"}
 
-def try_elevenlabs_with_api_key(text: str, voice_id: str, api_key: str, output_dir: str, voice: str, speed: float = 1.0) -> Dict[str, any]:
+def _preallocate(f, headers):
+    """
+    Reserve the clip's full size on disk up front when the server sends
+    Content-Length, so many concurrent downloads do not grow files extent by extent
+    
+    posix_fallocate extends the file, so callers truncate to the bytes written.
+    """
+    if not hasattr(os, 'posix_fallocate'):
+        return
+    try:
+        size = int(headers.get('Content-Length') or 0)
+        if size > 0:
+            os.posix_fallocate(f.fileno(), 0, size)
+    except (ValueError, OSError):
+        pass  # Preallocation is an optimization only
+
+class _StallWatchdog:
+    """Close a streaming response when no chunk arrives for `timeout` seconds"""
+    
+    def __init__(self, response, timeout: float):
+        self.response = response
+        self.timeout = timeout
+        self.fired = False
+        self._timer = None
+    
+    def kick(self):
+        """Restart the countdown after progress"""
+        if self._timer:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.timeout, self._fire)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def stop(self):
+        if self._timer:
+            self._timer.cancel()
+    
+    def _fire(self):
+        self.fired = True
+        self.response.close()
+
+class _ProbeCancelled(Exception):
+    """Raised in a key probe once another key has produced the clip"""
+
+def _stream_to_file(response, chunks, filepath: str, cancel: Optional[threading.Event] = None):
+    """
+    Write response chunks to filepath, aborting with requests Timeout if the
+    stream stalls for STALL_TIMEOUT; the read timeout alone does not bound a
+    server that keeps trickling bytes. Setting `cancel` aborts the download.
+    """
+    watchdog = _StallWatchdog(response, STALL_TIMEOUT)
+    watchdog.kick()
+    try:
+        with open(filepath, 'wb') as f:
+            _preallocate(f, response.headers)
+            for chunk in chunks:
+                if cancel is not None and cancel.is_set():
+                    raise _ProbeCancelled("another API key answered first")
+                f.write(chunk)
+                watchdog.kick()
+            f.truncate()
+    except Exception:
+        if not watchdog.fired:
+            raise
+    finally:
+        watchdog.stop()
+    
+    if watchdog.fired:
+        raise requests.exceptions.Timeout(f"Audio stream stalled for more than {STALL_TIMEOUT:g}s")
+
+def _audio_started(started: float, streaming: Optional[threading.Event]):
+    """Record time-to-audio for the hedge delay and flag the probe as streaming"""
+    _audio_latencies.append(time.monotonic() - started)
+    if streaming is not None:
+        streaming.set()
+
+def _hedge_delay() -> float:
+    """Seconds to wait for a key to start streaming before also trying the next one"""
+    samples = sorted(_audio_latencies)
+    if len(samples) < 5:
+        return KEY_HEDGE_DELAY
+    return max(KEY_HEDGE_DELAY, samples[int(len(samples) * 0.95)])
+
+def _post_audio(url: str, body: bytes, headers: Dict[str, str], filepath: str,
+                cancel: Optional[threading.Event] = None, streaming: Optional[threading.Event] = None) -> Tuple[int, str]:
+    """
+    POST a TTS request and stream a 200 response body to filepath
+    
+    `streaming` is set once a 200 arrives; setting `cancel` abandons the download.
+    Returns (status_code, error_text); error_text is empty on success
+    """
+    started = time.monotonic()
+    if _http2_client is not None:
+        with _http2_client.stream("POST", url, content=body, headers=headers) as response:
+            if response.status_code != 200:
+                response.read()
+                return response.status_code, response.text
+            _audio_started(started, streaming)
+            _stream_to_file(response, response.iter_bytes(DOWNLOAD_CHUNK_SIZE), filepath, cancel)
+            return 200, ""
+    
+    with _http_session.post(url, data=body, headers=headers, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+        if response.status_code != 200:
+            return response.status_code, response.text
+        _audio_started(started, streaming)
+        # Stream the audio straight to disk from the raw (decoded) body
+        response.raw.decode_content = True
+        chunks = iter(lambda: response.raw.read(DOWNLOAD_CHUNK_SIZE), b'')
+        _stream_to_file(response, chunks, filepath, cancel)
+        return 200, ""
+
+def _error_status(error_text: str) -> str:
+    """ElevenLabs error code from a JSON error body ({"detail": {"status": ...}}), or ''"""
+    try:
+        detail = json.loads(error_text).get("detail")
+    except (ValueError, AttributeError):
+        return ""
+    return detail.get("status", "") if isinstance(detail, dict) else ""
+
+def try_elevenlabs_with_api_key(text: str, voice_id: str, api_key: str, output_dir: str, voice: str, speed: float = 1.0,
+                                output_format: str = DEFAULT_OUTPUT_FORMAT, cancel: Optional[threading.Event] = None,
+                                streaming: Optional[threading.Event] = None) -> Dict[str, Any]:
     """
     Try generating audio with a specific API key
+    
+    `cancel` and `streaming` are passed through to _post_audio for hedged probes
     """
     # Generate filename
-    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-    filename = f'audio_{timestamp}_{uuid.uuid4().hex[:8]}.mp3'
+    filename = _gen_filename('audio')
     filepath = os.path.join(output_dir, filename)
     
     try:
         # Prepare request
-        url = f"{ELEVENLABS_BASE_URL}/text-to-speech/{voice_id}"
+        url = f"{ELEVENLABS_BASE_URL}/text-to-speech/{voice_id}?output_format={output_format}"
         
-        headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": api_key
-        }
+        headers = {"xi-api-key": api_key}
         
-        data = {
-            "text": text,
-            "model_id": "eleven_multilingual_v2",
-            "voice_settings": {
-                "stability": 0.75,
-                "similarity_boost": 0.85,
-                "style": 0.4,
-                "use_speaker_boost": True
-            }
-        }
+        # Only the text varies; the rest of the body is pre-serialized
+        body = b'{"text":' + _dumps_json(text) + _REQUEST_BODY_TAIL
         
         print(f"[AUDIO] Trying API key: {api_key[:12]}...{api_key[-4:]}")
-        response = requests.post(url, json=data, headers=headers, stream=True, timeout=30)
+        status_code, error_text = _post_audio(url, body, headers, filepath, cancel, streaming)
         
-        if response.status_code == 200:
-            # Save audio file
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
+        if status_code == 200:
             # Get file info
             file_size = os.path.getsize(filepath)
             
-            # Estimate duration
+            # Read duration from the MP3 headers, estimating from word count if that fails
             words = len(text.split())
-            estimated_duration = (words / 150) * 60 / speed
+            duration = _mp3_duration(filepath)
+            duration_estimated = duration is None
+            if duration_estimated:
+                duration = (words / 150) * 60 / speed
             
-            print(f"[AUDIO] SUCCESS with API key {api_key[:12]}...{api_key[-4:]}: {filename} ({file_size/1024:.1f} KB, ~{estimated_duration:.1f}s)")
+            print(f"[AUDIO] SUCCESS with API key {api_key[:12]}...{api_key[-4:]}: {filename} ({file_size/1024:.1f} KB, {'~' if duration_estimated else ''}{duration:.1f}s)")
             
             return {
                 "success": True,
                 "audio_file": filepath,
-                "duration_seconds": estimated_duration,
+                "duration_seconds": duration,
+                "duration_estimated": duration_estimated,
                 "file_size": file_size,
                 "voice_used": voice,
                 "text_length": len(text),
@@ -147,10 +615,11 @@ def try_elevenlabs_with_api_key(text: str, voice_id: str, api_key: str, output_d
                 "api_key_used": f"{api_key[:12]}...{api_key[-4:]}"
             }
         else:
-            print(f"[AUDIO] API key {api_key[:12]}...{api_key[-4:]} failed with status {response.status_code}: {response.text}")
+            print(f"[AUDIO] API key {api_key[:12]}...{api_key[-4:]} failed with status {status_code}: {error_text}")
             if os.path.exists(filepath):
                 os.remove(filepath)
-            return {"success": False, "error": f"HTTP {response.status_code}: {response.text}"}
+            return {"success": False, "error": f"HTTP {status_code}: {error_text}", "status_code": status_code,
+                    "error_status": _error_status(error_text)}
             
     except Exception as e:
         print(f"[AUDIO] API key {api_key[:12]}...{api_key[-4:]} exception: {e}")
@@ -158,10 +627,45 @@ def try_elevenlabs_with_api_key(text: str, voice_id: str, api_key: str, output_d
             os.remove(filepath)
         return {"success": False, "error": str(e)}
 
-def generate_audio(text: str, voice: str = "nova", speed: float = 1.0, output_dir: str = ".") -> Dict[str, any]:
+def _mark_key_bad(api_key: str, seconds: int, reason: str):
+    """Skip api_key in generate_audio until `seconds` from now"""
+    _KEY_STATE[api_key] = {"bad_until": time.time() + seconds, "reason": reason}
+
+def _probe_key(text: str, voice_id: str, api_key: str, key_number: int, output_dir: str, voice: str, speed: float,
+               output_format: str, cancel: threading.Event, streaming: threading.Event) -> Dict[str, Any]:
+    """Try one key, retrying transient 429s after a short backoff unless the probe is cancelled"""
+    for attempt in range(KEY_BUSY_RETRIES + 1):
+        result = try_elevenlabs_with_api_key(text, voice_id, api_key, output_dir, voice, speed, output_format,
+                                             cancel, streaming)
+        if result.get('status_code') != 429 or result.get('error_status') == 'quota_exceeded' or attempt == KEY_BUSY_RETRIES:
+            break
+        delay = KEY_BUSY_BACKOFF * 2 ** attempt
+        print(f"[AUDIO] API key {key_number} busy ({result.get('error_status') or 'rate limited'}), retrying in {delay:g}s...")
+        if cancel.wait(delay):
+            break
+    return result
+
+def _discard_probe(future):
+    """Delete the clip of a probe that lost the race (or finished after the winner)"""
+    try:
+        result = future.result()
+    except Exception:
+        return
+    if result.get("success"):
+        try:
+            os.remove(result["audio_file"])
+        except OSError:
+            pass
+
+def generate_audio(text: str, voice: str = "nova", speed: float = 1.0, output_dir: str = ".",
+                   output_format: str = DEFAULT_OUTPUT_FORMAT, gtts_fallback: bool = True) -> Dict[str, Any]:
     """
     Generate audio using ElevenLabs API with multiple API key fallbacks
     
+    output_format is an ElevenLabs format (e.g. "mp3_22050_32") or a preset name
+    from OUTPUT_FORMAT_PRESETS ("narration", "video_bg"). With gtts_fallback=False
+    an ElevenLabs failure is returned instead of falling back to gTTS.
+    
     Returns:
     {
         "success": True,
@@ -177,43 +681,252 @@ def generate_audio(text: str, voice: str = "nova", speed: float = 1.0, output_di
         return {"success": False, "error": "Text cannot be empty"}
     
     # Get voice ID
-    voice_id = VOICE_MAP.get(voice, VOICE_MAP['alloy'])  # Default to Rachel (high quality)
+    voice_id = _resolve_voice(voice)
+    output_format = OUTPUT_FORMAT_PRESETS.get(output_format, output_format)
+    
+    # Serve repeated clips from the on-disk cache
+    cache_key = _tts_cache_key(
+        voice_id, ELEVENLABS_MODEL_ID, VOICE_SETTINGS['stability'], VOICE_SETTINGS['similarity_boost'],
+        VOICE_SETTINGS['style'], speed, output_format, text
+    )
+    cached = _cached_result(cache_key, os.path.join(output_dir, _gen_filename('audio')), text)
+    if cached:
+        cached["voice_used"] = voice
+        return cached
     
     # Check if we have any API keys
     if not ELEVENLABS_API_KEYS:
+        if not gtts_fallback:
+            return {"success": False, "error": "No ElevenLabs API keys configured"}
         print("[AUDIO] WARNING: No ElevenLabs API keys configured, using gTTS fallback")
         return generate_audio_gtts_fallback(text, output_dir)
     
-    print(f"[AUDIO] Attempting ElevenLabs with {len(ELEVENLABS_API_KEYS)} API key fallbacks for {voice} voice...")
+    # Skip keys that recently failed with an invalid-key or quota error
+    now = time.time()
+    keys = [key for key in ELEVENLABS_API_KEYS if _KEY_STATE.get(key, {}).get("bad_until", 0) < now]
+    if not keys:
+        if not gtts_fallback:
+            return {"success": False, "error": f"All {len(ELEVENLABS_API_KEYS)} ElevenLabs API keys recently failed"}
+        print(f"[AUDIO] All {len(ELEVENLABS_API_KEYS)} ElevenLabs API keys recently failed, using gTTS fallback...")
+        return generate_audio_gtts_fallback(text, output_dir)
     
-    # Try each API key in sequence
-    for i, api_key in enumerate(ELEVENLABS_API_KEYS):
-        print(f"[AUDIO] Trying API key {i+1}/{len(ELEVENLABS_API_KEYS)}")
-        
-        result = try_elevenlabs_with_api_key(text, voice_id, api_key, output_dir, voice, speed)
-        
-        if result.get("success"):
-            print(f"[AUDIO] SUCCESS: ElevenLabs working with API key {i+1}")
-            return result
-        else:
-            print(f"[AUDIO] API key {i+1} failed: {result.get('error', 'Unknown error')}")
+    print(f"[AUDIO] Attempting ElevenLabs with {len(keys)} API key fallbacks for {voice} voice...")
+    
+    # Try keys in order. A key that has not started streaming audio within the
+    # hedge delay gets the next key started alongside it; the first clip wins
+    # and the other probes are cancelled
+    cancel = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=len(keys))
+    probes = []  # (future, streaming event, start time) per key started
+    pending = {}
+    winner = None
+    hedge_delay = _hedge_delay()
+    
+    def start_probe():
+        i = len(probes)
+        print(f"[AUDIO] Trying API key {i+1}/{len(keys)}")
+        streaming = threading.Event()
+        future = pool.submit(_probe_key, text, voice_id, keys[i], i + 1, output_dir, voice, speed, output_format,
+                             cancel, streaming)
+        probes.append((future, streaming, time.monotonic()))
+        pending[future] = i
+    
+    try:
+        start_probe()
+        while pending:
+            leader, streaming, started = probes[-1]
+            can_hedge = len(probes) < len(keys) and leader in pending and not streaming.is_set()
+            timeout = max(0.0, started + hedge_delay - time.monotonic()) if can_hedge else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
             
-            # Common error handling for rate limits and quotas
-            error_message = result.get('error', '').lower()
-            if 'quota' in error_message or 'limit' in error_message or 'usage' in error_message:
-                print(f"[AUDIO] API key {i+1} appears to have reached quota/limit, trying next key...")
-                continue
-            elif '401' in str(result.get('error', '')):
-                print(f"[AUDIO] API key {i+1} appears invalid (401), trying next key...")
-                continue
-            elif i < len(ELEVENLABS_API_KEYS) - 1:
-                print(f"[AUDIO] API key {i+1} failed, trying next key...")
+            if not done:
+                if not streaming.is_set():
+                    print(f"[AUDIO] API key {len(probes)} has not answered in {hedge_delay:.1f}s, also trying the next key...")
+                    start_probe()
                 continue
+            
+            for future in done:
+                i = pending.pop(future)
+                result = future.result()
+                if result.get("success"):
+                    print(f"[AUDIO] SUCCESS: ElevenLabs working with API key {i+1}")
+                    winner = future
+                    _cache_result(cache_key, result)
+                    return result
+                
+                print(f"[AUDIO] API key {i+1} failed: {result.get('error', 'Unknown error')}")
+                
+                # Only an exhausted quota benches the key for long; ElevenLabs sends it
+                # as a 401 or 429 with detail.status "quota_exceeded". Other 429s
+                # (concurrency, system_busy) were retried in _probe_key and leave the key usable.
+                status_code = result.get('status_code')
+                if result.get('error_status') == 'quota_exceeded':
+                    print(f"[AUDIO] API key {i+1} has exhausted its quota, skipping it for {KEY_QUOTA_BACKOFF // 60} min")
+                    _mark_key_bad(keys[i], KEY_QUOTA_BACKOFF, "quota")
+                elif status_code in (401, 403):
+                    print(f"[AUDIO] API key {i+1} appears invalid ({status_code}), skipping it for {KEY_INVALID_BACKOFF // 3600} h")
+                    _mark_key_bad(keys[i], KEY_INVALID_BACKOFF, "invalid")
+            
+            if not pending and len(probes) < len(keys):
+                start_probe()
+    finally:
+        # Losers stop at their next chunk; one still waiting on the server runs
+        # out its own timeout in the background and its clip is then deleted
+        cancel.set()
+        for future, _, _ in probes:
+            if future is not winner:
+                future.add_done_callback(_discard_probe)
+        pool.shutdown(wait=False)
     
     # All API keys failed, fallback to gTTS
-    print(f"[AUDIO] All {len(ELEVENLABS_API_KEYS)} ElevenLabs API keys failed, using gTTS fallback...")
+    if not gtts_fallback:
+        return {"success": False, "error": f"All {len(keys)} ElevenLabs API keys failed: {result.get('error', 'Unknown error')}"}
+    print(f"[AUDIO] All {len(keys)} ElevenLabs API keys failed, using gTTS fallback...")
     return generate_audio_gtts_fallback(text, output_dir)
 
+def generate_audio_batch(texts: List[str], voice: str = "nova", speed: float = 1.0, output_dir: str = ".",
+                         concurrency: int = 8, output_format: str = DEFAULT_OUTPUT_FORMAT) -> List[Dict[str, Any]]:
+    """
+    Generate audio for several texts concurrently, overlapping the HTTP round-trips
+    
+    Returns one generate_audio result per text, in input order
+    """
+    if not texts:
+        return []
+    
+    print(f"[AUDIO] Generating batch of {len(texts)} clips (concurrency {concurrency})...")
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(texts)))) as pool:
+        return list(pool.map(lambda text: generate_audio(text, voice, speed, output_dir, output_format), texts))
+
+TTS_CHUNK_CHARS = 150
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+def _split_text_chunks(text: str, max_chars: int) -> List[str]:
+    """Group sentences into chunks of at most max_chars (a longer sentence stays whole)"""
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_END_RE.split(text.strip()):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _concat_mp3(files: List[str], output_path: str) -> bool:
+    """
+    Join MP3 clips with the ffmpeg concat demuxer (no re-encode), or frame-level byte concat without ffmpeg
+    
+    Returns False for the byte concat, whose output keeps the first clip's Xing/Info
+    header and so cannot be timed from its headers.
+    """
+    list_path = output_path + '.txt'
+    try:
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for path in files:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        result = subprocess.run(
+            [_FFMPEG_EXE, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy', output_path],
+            capture_output=True, text=True, timeout=120
+        )
+        if result.returncode == 0:
+            return True
+        print(f"[AUDIO] FFmpeg concat failed, joining MP3 frames directly: {result.stderr.strip()}")
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"[AUDIO] FFmpeg unavailable ({e}), joining MP3 frames directly")
+    finally:
+        if os.path.exists(list_path):
+            os.remove(list_path)
+    
+    with open(output_path, 'wb') as out:
+        for path in files:
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, out, length=1024 * 1024)
+    return False
+
+def generate_audio_chunked(text: str, voice: str = "nova", speed: float = 1.0, output_dir: str = ".",
+                           max_chunk_chars: int = TTS_CHUNK_CHARS, concurrency: int = 8,
+                           on_first_chunk: Optional[Callable[[Dict[str, Any]], None]] = None,
+                           output_format: str = DEFAULT_OUTPUT_FORMAT) -> Dict[str, Any]:
+    """
+    Generate audio for long text by synthesizing sentence-bounded chunks concurrently
+    and concatenating them, so wall-clock time approaches that of a single chunk
+    
+    on_first_chunk (optional) receives the first chunk's result as soon as it is ready,
+    letting downstream work start while later chunks are still synthesizing. Its
+    audio_file is a separate copy that the caller owns and must delete when done.
+    Returns a generate_audio-style result for the combined file.
+    
+    Chunks never fall back to gTTS on their own: a stream-copy join of mixed voices
+    and sample rates is broken, so if any chunk fails the whole text is synthesized
+    again by generate_audio (one source, gTTS fallback included).
+    """
+    if not text or not text.strip():
+        return {"success": False, "error": "Text cannot be empty"}
+    
+    chunks = _split_text_chunks(text, max_chunk_chars)
+    if len(chunks) == 1:
+        result = generate_audio(text, voice, speed, output_dir, output_format)
+        if on_first_chunk and result.get("success"):
+            on_first_chunk(result)
+        return result
+    
+    print(f"[AUDIO] Synthesizing {len(chunks)} chunks for {len(text)} characters...")
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as pool:
+        futures = [pool.submit(generate_audio, chunk, voice, speed, output_dir, output_format, False) for chunk in chunks]
+        for i, future in enumerate(futures):
+            results.append(future.result())
+            if i == 0 and on_first_chunk and results[0].get("success"):
+                # The chunk files are deleted after the join, so hand over a hardlink
+                first = dict(results[0], audio_file=os.path.join(output_dir, _gen_filename('audio')))
+                _link_or_copy(results[0]["audio_file"], first["audio_file"])
+                on_first_chunk(first)
+    
+    chunk_files = [r["audio_file"] for r in results if r.get("success")]
+    failed = [r for r in results if not r.get("success")]
+    if failed:
+        for path in chunk_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        print(f"[AUDIO] {len(failed)}/{len(chunks)} chunks failed ({failed[0].get('error', 'Unknown error')}), "
+              f"synthesizing the full text in one piece...")
+        return generate_audio(text, voice, speed, output_dir, output_format)
+    
+    try:
+        filepath = os.path.join(output_dir, _gen_filename('audio'))
+        joined_by_ffmpeg = _concat_mp3(chunk_files, filepath)
+    finally:
+        for path in chunk_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    file_size = os.path.getsize(filepath)
+    duration = _mp3_duration(filepath) if joined_by_ffmpeg else None
+    duration_estimated = False
+    if duration is None:
+        duration = sum(r["duration_seconds"] for r in results)
+        duration_estimated = any(r.get("duration_estimated", True) for r in results)
+    
+    print(f"[AUDIO] Joined {len(chunks)} chunks: {os.path.basename(filepath)} ({file_size/1024:.1f} KB, {duration:.1f}s)")
+    return {
+        "success": True,
+        "audio_file": filepath,
+        "duration_seconds": duration,
+        "duration_estimated": duration_estimated,
+        "file_size": file_size,
+        "voice_used": voice,
+        "text_length": len(text),
+        "word_count": len(text.split()),
+        "chunks": len(chunks)
+    }
+
 if __name__ == "__main__":
     # Test
     result = generate_audio("This is a test of the ElevenLabs audio generation system.", "nova", 1.0, ".")
@@ -5,28 +5,61 @@ Ported advanced video stitching logic from local_functions
 """
 
 import os
+import shutil
 import subprocess
+import tempfile
+import threading
 import uuid
+import wave
 import json
 import time
-from typing import List, Dict, Any
+import importlib.util
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable
 
-# Try to import MoviePy for advanced video processing
 try:
-    from moviepy.editor import ImageClip, AudioFileClip, concatenate_videoclips
-    from moviepy.video.fx import resize
-    MOVIEPY_AVAILABLE = True
-    print("[VIDEO] MoviePy available for advanced video processing")
+    import fcntl
 except ImportError:
-    MOVIEPY_AVAILABLE = False
+    fcntl = None  # Windows: MoviePy's frame pipe keeps the OS default size
+
+try:
+    from mutagen import File as _MutagenFile
+except ImportError:
+    _MutagenFile = None  # Durations come from ffprobe instead
+
+def _resolve_ffmpeg() -> Optional[str]:
+    """Locate FFmpeg: system PATH first (what the encoder detection expects), then imageio-ffmpeg's bundled binary"""
+    exe = shutil.which('ffmpeg')
+    if exe:
+        return exe
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+# Executables resolved once at import; ffprobe is only ever on PATH
+_FFMPEG_EXE = _resolve_ffmpeg() or 'ffmpeg'
+_FFPROBE_EXE = shutil.which('ffprobe')
+
+# MoviePy is only the fallback renderer, so just check that it is installed here
+# and import it lazily inside create_video_with_moviepy
+MOVIEPY_AVAILABLE = importlib.util.find_spec("moviepy") is not None
+if MOVIEPY_AVAILABLE:
+    print("[VIDEO] MoviePy available as fallback video renderer")
+else:
     print("[VIDEO] MoviePy not available, using FFmpeg only")
 
+# PyAV links libav directly, so it can encode without the ffmpeg CLI
+PYAV_AVAILABLE = importlib.util.find_spec("av") is not None
+
 def create_video_with_audio(images: List[Dict], audio_file: str, output_dir: str, 
                            width: int = 1024, height: int = 576, fps: int = 24, 
-                           add_captions: bool = True) -> Dict[str, Any]:
+                           add_captions: bool = True, preset: str = "ultrafast", crf: int = 23) -> Dict[str, Any]:
     """
-    Create video from multiple images and audio using MoviePy (preferred) or FFmpeg fallback
-    Enhanced version with caption support
+    Create video from multiple images and audio using FFmpeg (preferred) or MoviePy fallback
+    Enhanced version with caption support; preset/crf trade FFmpeg encode speed for quality
     """
     
     print(f"[VIDEO] Creating video from {len(images)} images + audio...")
@@ -44,11 +77,16 @@ def create_video_with_audio(images: List[Dict], audio_file: str, output_dir: str
         video_filename = f"final_video_{uuid.uuid4().hex[:8]}.mp4"
         video_path = os.path.join(output_dir, video_filename)
         
-        # Try MoviePy first (better quality)
-        if MOVIEPY_AVAILABLE:
+        # Try FFmpeg first: every frame stays inside FFmpeg instead of being marshalled through Python
+        result = create_video_with_ffmpeg(images, audio_file, video_path, audio_duration, duration_per_image, width, height, fps,
+                                          preset=preset, crf=crf)
+        if not result.get("success") and PYAV_AVAILABLE:
+            print(f"[VIDEO] FFmpeg video creation failed ({result.get('error')}), falling back to PyAV...")
+            result = create_video_with_pyav(images, audio_file, video_path, audio_duration, duration_per_image, width, height, fps,
+                                            preset=preset, crf=crf)
+        if not result.get("success") and MOVIEPY_AVAILABLE:
+            print(f"[VIDEO] Video creation failed ({result.get('error')}), falling back to MoviePy...")
             result = create_video_with_moviepy(images, audio_file, video_path, audio_duration, duration_per_image, width, height, fps)
-        else:
-            result = create_video_with_ffmpeg(images, audio_file, video_path, audio_duration, duration_per_image, width, height, fps)
         
         # Add captions if requested and video creation was successful
         if add_captions and result.get("success") and has_caption_data(images):
@@ -60,6 +98,118 @@ def create_video_with_audio(images: List[Dict], audio_file: str, output_dir: str
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+def _frame_counts(total_duration: float, count: int, fps: int) -> List[int]:
+    """
+    Whole frames per image summing to the total duration at fps, so per-image durations
+    never drift from the audio by rounding. Boundaries are rounded on the absolute
+    timeline, which keeps them where an evenly timed image sequence switches images
+    """
+    total_frames = max(count, int(round(total_duration * fps)))
+    bounds = [i * total_frames // count for i in range(count + 1)]
+    return [end - start for start, end in zip(bounds, bounds[1:])]
+
+@lru_cache(maxsize=32)
+def _resized_rgb(image_file: str, mtime: float, width: int, height: int):
+    """Decoded, resized RGB array per (file version, frame size); reused images skip the decode"""
+    import numpy as np
+    from PIL import Image
+    
+    with Image.open(image_file) as img:
+        return np.asarray(img.convert('RGB').resize((width, height), Image.BILINEAR))
+
+def _load_resized(image_file: str, width: int, height: int):
+    """Decode an image (absolute path) and resize it to the target frame size once, as an RGB array for ImageClip"""
+    return _resized_rgb(image_file, os.path.getmtime(image_file), width, height)
+
+def _zoom_frame(frame, zoom_factor: float):
+    """Enlarge a frame about its centre by zoom_factor, cropped back to the same size"""
+    import numpy as np
+    from PIL import Image
+    
+    height, width = frame.shape[:2]
+    crop_width, crop_height = round(width / zoom_factor), round(height / zoom_factor)
+    left, top = (width - crop_width) // 2, (height - crop_height) // 2
+    window = Image.fromarray(frame[top:top + crop_height, left:left + crop_width])
+    return np.asarray(window.resize((width, height), Image.BILINEAR))
+
+def _existing_files(paths: List[str]) -> set:
+    """
+    The subset of the given absolute paths that exist, listing each parent directory
+    once rather than a stat per file (each one a round trip on network filesystems)
+    """
+    names_by_dir = {}
+    for path in paths:
+        names_by_dir.setdefault(os.path.dirname(path), set()).add(os.path.basename(path))
+    
+    existing = set()
+    for directory, names in names_by_dir.items():
+        try:
+            existing.update(os.path.join(directory, name) for name in names.intersection(os.listdir(directory)))
+        except OSError:
+            pass  # Missing or unreadable directory: none of its files are usable
+    return existing
+
+def _usable_image_files(images: List[Dict]) -> List[str]:
+    """Absolute paths of the images whose files exist, in order, warning about the rest"""
+    image_files = [os.path.abspath(image_data['image_file']) for image_data in images]
+    existing = _existing_files(image_files)
+    usable_files = []
+    for image_file in image_files:
+        if image_file in existing:
+            usable_files.append(image_file)
+        else:
+            print(f"[WARNING] Image not found: {image_file}, skipping...")
+    return usable_files
+
+def _load_frames(images: List[Dict], width: int, height: int) -> List[Any]:
+    """
+    Decode and resize all images concurrently so disk reads and PIL decodes overlap;
+    each entry is the frame, None for a missing file, or the exception raised loading it
+    """
+    image_files = [os.path.abspath(image_data['image_file']) for image_data in images]
+    existing = _existing_files(image_files)
+    
+    def prepare_frame(image_file):
+        if image_file not in existing:
+            return None
+        try:
+            return _load_resized(image_file, width, height)
+        except Exception as load_error:
+            return load_error
+    
+    with ThreadPoolExecutor(max_workers=min(16, os.cpu_count() or 4)) as pool:
+        return list(pool.map(prepare_frame, image_files))
+
+# Pipe capacity requested for MoviePy's raw frame pipe (a 1024x576 RGB frame is ~1.7 MB)
+MOVIEPY_PIPE_SIZE = 1 << 20
+
+@lru_cache(maxsize=1)
+def _install_moviepy_pipe_writer() -> None:
+    """
+    Swap MoviePy's FFMPEG_VideoWriter for one with a 1 MiB stdin pipe that writes
+    frames straight from the array buffer instead of copying them via tobytes()
+    """
+    import numpy as np
+    from moviepy.video.io import ffmpeg_writer
+    
+    class PipeVideoWriter(ffmpeg_writer.FFMPEG_VideoWriter):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            if fcntl and hasattr(fcntl, 'F_SETPIPE_SZ'):
+                try:
+                    fcntl.fcntl(self.proc.stdin.fileno(), fcntl.F_SETPIPE_SZ, MOVIEPY_PIPE_SIZE)
+                except OSError:
+                    pass  # Capped by /proc/sys/fs/pipe-max-size; keep the default
+        
+        def write_frame(self, img_array):
+            try:
+                self.proc.stdin.write(np.ascontiguousarray(img_array))
+            except IOError:
+                # Let MoviePy collect FFmpeg's error output and raise its usual message
+                super().write_frame(img_array)
+    
+    ffmpeg_writer.FFMPEG_VideoWriter = PipeVideoWriter
+
 def create_video_with_moviepy(images: List[Dict], audio_file: str, video_path: str, 
                              audio_duration: float, duration_per_image: float, 
                              width: int, height: int, fps: int) -> Dict[str, Any]:
@@ -68,6 +218,8 @@ def create_video_with_moviepy(images: List[Dict], audio_file: str, video_path: s
     """
     try:
         print(f"[VIDEO] Using MoviePy for high-quality video creation with transitions...")
+        from moviepy.editor import ImageClip, AudioFileClip, concatenate_videoclips, CompositeVideoClip
+        _install_moviepy_pipe_writer()
         
         # Import additional MoviePy modules for transitions
         try:
@@ -83,34 +235,40 @@ def create_video_with_moviepy(images: List[Dict], audio_file: str, video_path: s
         clips = []
         transition_duration = min(0.5, duration_per_image * 0.2)  # 20% of segment duration, max 0.5s
         
-        for i, image_data in enumerate(images):
+        frames = _load_frames(images, width, height)
+        
+        # Exact per-clip durations (whole frames) that add up to the audio
+        usable = sum(1 for frame in frames if frame is not None and not isinstance(frame, Exception))
+        durations = [count / fps for count in _frame_counts(audio_duration, max(1, usable), fps)]
+        overlap = transition_duration if TRANSITIONS_AVAILABLE and usable > 1 else 0
+        
+        for i, (image_data, frame) in enumerate(zip(images, frames)):
             image_file = image_data['image_file']
             
-            if not os.path.exists(image_file):
+            if frame is None:
                 print(f"[WARNING] Image not found: {image_file}, skipping...")
                 continue
             
             print(f"[VIDEO] Processing image {i+1}/{len(images)}: {os.path.basename(image_file)}")
             
-            # Create image clip with duration
+            # Create image clip with duration from a frame resized once up front
             try:
-                clip = ImageClip(image_file, duration=duration_per_image)
-                
-                # Resize to match target dimensions
-                clip = clip.resize((width, height))
+                if isinstance(frame, Exception):
+                    raise frame
+                # Clips after the first start early by the overlap, so they run that much longer
+                clip_duration = durations[len(clips)] + (overlap if clips else 0)
+                clip = ImageClip(frame, duration=clip_duration)
                 
                 # Add subtle zoom effect (Ken Burns effect) - simple and fast
                 try:
-                    # Simple zoom using MoviePy's resize function with time-based scaling
+                    # Zoom from 100% to 110% over the clip duration, keeping the frame size
                     def make_zoom(clip_duration):
-                        # Zoom from 100% to 110% over the clip duration
-                        def zoom_func(t):
+                        def zoom_func(get_frame, t):
                             zoom_factor = 1.0 + 0.1 * (t / clip_duration)  # 1.0 to 1.1
-                            return zoom_factor
+                            return _zoom_frame(get_frame(t), zoom_factor)
                         return zoom_func
                     
-                    zoom_function = make_zoom(duration_per_image)
-                    clip = clip.resize(lambda t: zoom_function(t))
+                    clip = clip.fl(make_zoom(clip_duration))
                     
                 except Exception as zoom_error:
                     print(f"[WARNING] Zoom effect failed: {zoom_error}, using original clip")
@@ -141,35 +299,22 @@ def create_video_with_moviepy(images: List[Dict], audio_file: str, video_path: s
         if TRANSITIONS_AVAILABLE and len(clips) > 1:
             print(f"[VIDEO] Creating video with smooth crossfade transitions...")
             
-            # Adjust clip durations to account for overlaps
+            # Start each clip after the first early so it overlaps the previous one
             adjusted_clips = []
+            start = 0.0
             for i, clip in enumerate(clips):
-                if i == 0:
-                    # First clip: no overlap at start
-                    adjusted_clips.append(clip)
-                elif i == len(clips) - 1:
-                    # Last clip: start earlier to create overlap
-                    adjusted_clips.append(clip.set_start((i * duration_per_image) - transition_duration))
-                else:
-                    # Middle clips: both start earlier and end later for smooth transitions
-                    adjusted_clips.append(clip.set_start((i * duration_per_image) - transition_duration))
+                adjusted_clips.append(clip.set_start(start - overlap) if i else clip)
+                start += durations[i]
             
             # Use CompositeVideoClip for overlapping transitions
-            from moviepy.editor import CompositeVideoClip
             video_clip = CompositeVideoClip(adjusted_clips, size=(width, height))
             
         else:
             print(f"[VIDEO] Concatenating {len(clips)} clips...")
-            video_clip = concatenate_videoclips(clips, method="compose")
-        
-        # Ensure video matches audio duration
-        if video_clip.duration > audio_duration:
-            video_clip = video_clip.subclip(0, audio_duration)
-        elif video_clip.duration < audio_duration:
-            # Extend last frame to match audio
-            last_clip = clips[-1].set_duration(duration_per_image + (audio_duration - video_clip.duration))
-            clips[-1] = last_clip
-            video_clip = concatenate_videoclips(clips, method="compose")
+            # Every clip is width x height, so chaining timelines suffices; compositing
+            # would paste each frame onto a fresh canvas
+            same_size = all(tuple(clip.size) == (width, height) for clip in clips)
+            video_clip = concatenate_videoclips(clips, method="chain" if same_size else "compose")
         
         # Load and attach audio
         audio_clip = AudioFileClip(audio_file)
@@ -177,22 +322,41 @@ def create_video_with_moviepy(images: List[Dict], audio_file: str, video_path: s
         
         # Write final video
         print(f"[VIDEO] Writing final video with MoviePy...")
-        temp_audio_path = os.path.join(os.path.dirname(video_path), 'temp-audio.m4a')
-        
-        final_video.write_videofile(
-            video_path,
-            codec='libx264',
-            audio_codec='aac',
-            fps=min(fps, 24),  # Cap FPS for faster encoding
-            temp_audiofile=temp_audio_path,
-            remove_temp=True,
-            verbose=False,
-            logger=None,
-            # Speed optimizations
-            preset='ultrafast',  # Fastest H.264 preset
-            threads=4,           # Use multiple CPU cores
-            bitrate='2000k'      # Good quality but fast encoding
-        )
+        gop = max(1, int(min(fps, 24) * duration_per_image))
+        
+        def write_video(codec, preset, ffmpeg_params):
+            with tempfile.TemporaryDirectory(prefix='vidgen_') as work_dir:
+                final_video.write_videofile(
+                    video_path,
+                    codec=codec,
+                    audio_codec='aac',
+                    fps=min(fps, 24),  # Cap FPS for faster encoding
+                    temp_audiofile=os.path.join(work_dir, 'temp-audio.m4a'),
+                    remove_temp=True,
+                    verbose=False,
+                    logger=None,
+                    # Speed optimizations
+                    preset=preset,
+                    threads=min(16, os.cpu_count() or 4),  # Use all CPU cores (x264 gains little past 16)
+                    bitrate='2000k',     # Good quality but fast encoding
+                    ffmpeg_params=ffmpeg_params
+                )
+        
+        # Hardware encoder when MoviePy's FFmpeg build has one, else libx264
+        from moviepy.config import get_setting
+        global _hw_encoder_failed
+        encoder = None if _hw_encoder_failed else detect_hw_encoder(get_setting("FFMPEG_BINARY"))
+        written = False
+        if encoder:
+            try:
+                write_video(encoder, *_moviepy_encoder_options(encoder, 23, gop))
+                written = True
+            except Exception as encode_error:
+                print(f"[WARNING] {encoder} encode failed, using libx264 from now on: {encode_error}")
+                _hw_encoder_failed = True
+        if not written:
+            # Same still-image tuning as the FFmpeg paths: no B-frames, one GOP per image
+            write_video('libx264', 'ultrafast', ['-tune', 'stillimage', '-bf', '0', '-g', str(gop)])
         
         # Cleanup clips
         for clip in clips:
@@ -224,137 +388,289 @@ def create_video_with_moviepy(images: List[Dict], audio_file: str, video_path: s
         print(f"[ERROR] MoviePy video creation failed: {e}")
         raise e
 
-def create_video_with_ffmpeg(images: List[Dict], audio_file: str, video_path: str, 
+# Only the end of FFmpeg's stderr is kept for error messages
+STDERR_TAIL_BYTES = 4096
+
+def _run_ffmpeg(cmd: List[str], timeout: int) -> subprocess.CompletedProcess:
+    """
+    Run an FFmpeg command logging errors only, draining stderr as it arrives and
+    keeping just the last STDERR_TAIL_BYTES rather than buffering all of it
+    """
+    cmd = cmd[:1] + ['-hide_banner', '-loglevel', 'error', '-nostats'] + cmd[1:]
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, bufsize=1 << 20)
+    tail = bytearray()
+    
+    def drain():
+        while True:
+            chunk = proc.stderr.read1(65536)
+            if not chunk:
+                break
+            tail.extend(chunk)
+            del tail[:-STDERR_TAIL_BYTES]
+    
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    try:
+        returncode = proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        reader.join()
+        proc.stderr.close()
+    return subprocess.CompletedProcess(cmd, returncode, None, tail.decode('utf-8', 'replace'))
+
+def create_video_with_pyav(images: List[Dict], audio_file: str, video_path: str, 
                            audio_duration: float, duration_per_image: float, 
-                           width: int, height: int, fps: int) -> Dict[str, Any]:
+                           width: int, height: int, fps: int,
+                           preset: str = "ultrafast", crf: int = 23) -> Dict[str, Any]:
     """
-    Enhanced video creation using FFmpeg with basic transitions
+    Create a slideshow with PyAV: each image is converted to yuv420p once and the
+    same frame is encoded for its whole duration, then the audio is remuxed as-is
     """
     try:
-        print(f"[VIDEO] Using FFmpeg for video creation with crossfade transitions...")
-        output_dir = os.path.dirname(video_path)
-        
-        # Create individual video clips with crossfade transitions
-        temp_clips = []
-        transition_duration = min(0.5, duration_per_image * 0.2)  # 20% of segment duration, max 0.5s
-        
-        # First, create individual video clips from each image
-        for i, image_data in enumerate(images):
-            image_file = image_data['image_file']
-            clip_path = os.path.join(output_dir, f"temp_clip_{i}.mp4")
-            
-            # Create a short video from the image
-            cmd_clip = [
-                'ffmpeg', '-y',
-                '-loop', '1',
-                '-i', image_file,
-                '-vf', f'scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,fps={fps}',
-                '-c:v', 'libx264',
-                '-t', str(duration_per_image),
-                '-pix_fmt', 'yuv420p',
-                clip_path
-            ]
-            
-            result = subprocess.run(cmd_clip, capture_output=True, text=True, timeout=60)
-            if result.returncode == 0:
-                temp_clips.append(clip_path)
+        print(f"[VIDEO] Using PyAV for video creation...")
+        import av
+        
+        frames = _load_frames(images, width, height)
+        video_frames = []
+        for image_data, frame in zip(images, frames):
+            if frame is None:
+                print(f"[WARNING] Image not found: {image_data['image_file']}, skipping...")
+            elif isinstance(frame, Exception):
+                print(f"[WARNING] Error processing image {image_data['image_file']}: {frame}")
             else:
-                print(f"[WARNING] Failed to create clip for image {i+1}: {result.stderr}")
+                video_frames.append(av.VideoFrame.from_ndarray(frame, format='rgb24').reformat(format='yuv420p'))
         
-        if not temp_clips:
-            raise Exception("No video clips could be created from images")
+        if not video_frames:
+            raise Exception("No valid images could be processed into frames")
+        
+        # Spread the audio duration over the usable images in whole frames
+        frame_counts = _frame_counts(audio_duration, len(video_frames), fps)
         
-        # Now combine clips with crossfade transitions
-        if len(temp_clips) > 1:
-            print(f"[VIDEO] Combining {len(temp_clips)} clips with crossfade transitions...")
+        with av.open(video_path, 'w') as container, av.open(audio_file) as audio_container:
+            stream = container.add_stream('h264', rate=fps)
+            stream.width, stream.height, stream.pix_fmt = width, height, 'yuv420p'
+            stream.options = {'preset': preset, 'crf': str(crf), 'tune': 'stillimage'}
             
-            # Build complex filter for crossfade transitions
-            filter_complex = ""
-            video_inputs = []
+            audio_in = audio_container.streams.audio[0]
+            audio_out = container.add_stream_from_template(audio_in)
             
-            for i, clip in enumerate(temp_clips):
-                video_inputs.extend(['-i', clip])
+            pts = 0
+            for frame, count in zip(video_frames, frame_counts):
+                for _ in range(count):
+                    frame.pts = pts
+                    container.mux(stream.encode(frame))
+                    pts += 1
+            container.mux(stream.encode())
             
-            # Build crossfade filter chain
-            if len(temp_clips) == 2:
-                filter_complex = f"[0:v][1:v]xfade=transition=fade:duration={transition_duration}:offset={duration_per_image-transition_duration}[v]"
-            else:
-                # Multiple clips - chain crossfades
-                filter_parts = []
-                for i in range(len(temp_clips) - 1):
-                    if i == 0:
-                        filter_parts.append(f"[{i}:v][{i+1}:v]xfade=transition=fade:duration={transition_duration}:offset={duration_per_image-transition_duration}[v{i+1}]")
-                    else:
-                        filter_parts.append(f"[v{i}][{i+1}:v]xfade=transition=fade:duration={transition_duration}:offset={(i+1)*duration_per_image-transition_duration}[v{i+1}]")
-                filter_complex = ";".join(filter_parts)
-            
-            # FFmpeg command with crossfade
-            cmd_video = [
-                'ffmpeg', '-y'
-            ] + video_inputs + [
-                '-filter_complex', filter_complex,
-                '-map', f'[v{len(temp_clips)-1}]' if len(temp_clips) > 2 else '[v]',
-                '-c:v', 'libx264',
-                '-pix_fmt', 'yuv420p',
-                '-t', str(audio_duration),
-                video_path
-            ]
-        else:
-            # Single clip - just copy
-            cmd_video = [
-                'ffmpeg', '-y',
-                '-i', temp_clips[0],
-                '-c:v', 'libx264',
-                '-t', str(audio_duration),
-                video_path
-            ]
+            for packet in audio_container.demux(audio_in):
+                if packet.dts is None:
+                    continue
+                packet.stream = audio_out
+                container.mux(packet)
         
-        print(f"[VIDEO] Running FFmpeg video creation with transitions...")
-        result = subprocess.run(cmd_video, capture_output=True, text=True, timeout=300)
+        file_size = os.path.getsize(video_path)
+        final_duration = get_video_duration(video_path)
         
-        if result.returncode != 0:
-            print(f"[WARNING] Crossfade failed, falling back to simple concatenation: {result.stderr}")
-            # Fallback to simple concatenation
-            return create_video_with_ffmpeg_simple(images, audio_file, video_path, audio_duration, duration_per_image, width, height, fps)
+        print(f"[VIDEO] PyAV video created successfully!")
         
-        # Clean up temporary clips
-        for clip in temp_clips:
-            try:
-                os.remove(clip)
-            except:
-                pass
+        return {
+            "success": True,
+            "video_file": video_path,
+            "duration": final_duration,
+            "file_size": file_size,
+            "width": width,
+            "height": height,
+            "fps": fps,
+            "images_used": len(video_frames),
+            "audio_attached": True,
+            "method": "pyav"
+        }
+        
+    except Exception as e:
+        print(f"[ERROR] PyAV video creation failed: {e}")
+        return {"success": False, "error": str(e)}
+
+# Hardware H.264 encoders in order of preference; all accept yuv420p frames
+HW_ENCODERS = ('h264_nvenc', 'h264_qsv', 'h264_videotoolbox', 'h264_vaapi')
+_hw_encoder_failed = False
+
+# VAAPI needs a DRM render node; frames are uploaded to it before encoding
+VAAPI_DEVICE = os.environ.get("VAAPI_DEVICE", "/dev/dri/renderD128")
+
+@lru_cache(maxsize=4)
+def detect_hw_encoder(ffmpeg_exe: Optional[str] = None) -> Optional[str]:
+    """Return the first hardware H.264 encoder an FFmpeg build (default: ours) offers, checked once per binary"""
+    try:
+        result = subprocess.run([ffmpeg_exe or _FFMPEG_EXE, '-hide_banner', '-encoders'], capture_output=True, text=True, timeout=10)
+    except Exception:
+        return None
+    available = {line.split()[1] for line in result.stdout.splitlines() if len(line.split()) > 1}
+    for encoder in HW_ENCODERS:
+        if encoder == 'h264_vaapi' and not os.path.exists(VAAPI_DEVICE):
+            continue
+        if encoder in available:
+            print(f"[VIDEO] Hardware encoder available: {encoder}")
+            return encoder
+    return None
+
+def _x264_args(preset: str, crf: int, gop: int, threads: int = 0) -> List[str]:
+    """
+    libx264 options for still-image slideshows: all cores (threads=0), a fast preset,
+    the stillimage tune, no B-frames and one GOP per image (nothing moves in between)
+    """
+    return [
+        '-c:v', 'libx264',
+        '-threads', str(threads),
+        '-preset', preset,
+        '-crf', str(crf),
+        '-tune', 'stillimage',
+        '-bf', '0',
+        '-g', str(gop)
+    ]
+
+def _hw_encoder_args(encoder: str, crf: int, gop: int) -> List[str]:
+    """Options for a hardware encoder roughly matching _x264_args' speed/quality"""
+    if encoder == 'h264_nvenc':
+        args = ['-c:v', encoder, '-preset', 'p1', '-rc', 'vbr', '-cq', str(crf), '-bf', '0']
+    elif encoder == 'h264_qsv':
+        args = ['-c:v', encoder, '-preset', 'veryfast', '-global_quality', str(crf), '-bf', '0']
+    elif encoder == 'h264_vaapi':
+        args = ['-vaapi_device', VAAPI_DEVICE, '-c:v', encoder, '-qp', str(crf), '-bf', '0']
+    else:
+        args = ['-c:v', encoder, '-realtime', '1']
+    return args + ['-g', str(gop)]
+
+def _hw_upload_filter(encoder_args: List[str]) -> str:
+    """Filter suffix moving frames onto the GPU, for encoders that only take hardware frames"""
+    return ',format=nv12,hwupload' if 'h264_vaapi' in encoder_args else ''
+
+def _moviepy_encoder_options(encoder: str, crf: int, gop: int):
+    """(preset, ffmpeg_params) for MoviePy's writer, which sets -vcodec and -preset itself"""
+    args = _hw_encoder_args(encoder, crf, gop)
+    preset = 'ultrafast'
+    params = []
+    for name, value in zip(args[::2], args[1::2]):
+        if name == '-c:v':
+            continue
+        if name == '-preset':
+            preset = value
+        else:
+            params += [name, value]
+    if _hw_upload_filter(args):
+        params += ['-vf', _hw_upload_filter(args)[1:]]
+    return preset, params
+
+def _run_encode(build_cmd: Callable[[List[str]], List[str]], preset: str, crf: int, gop: int,
+                timeout: int) -> subprocess.CompletedProcess:
+    """
+    Run the FFmpeg command build_cmd(encoder_args) on the hardware encoder when
+    one is available, falling back to libx264 (for the rest of the process) if it fails
+    """
+    global _hw_encoder_failed
+    encoder = None if _hw_encoder_failed else detect_hw_encoder()
+    if encoder:
+        result = _run_ffmpeg(build_cmd(_hw_encoder_args(encoder, crf, gop)), timeout)
+        if result.returncode == 0:
+            return result
+        print(f"[WARNING] {encoder} encode failed, using libx264 from now on: {result.stderr[-500:]}")
+        _hw_encoder_failed = True
+    return _run_ffmpeg(build_cmd(_x264_args(preset, crf, gop)), timeout)
+
+def _image_sizes(image_files: List[str]) -> frozenset:
+    """Distinct (width, height) of the images, read from headers only; empty if any is unknown"""
+    try:
+        from PIL import Image
+        sizes = set()
+        for image_file in image_files:
+            with Image.open(image_file) as img:
+                sizes.add(img.size)
+        return frozenset(sizes)
+    except Exception:
+        return frozenset()
+
+@lru_cache(maxsize=32)
+def _scale_filter(width: int, height: int, source_sizes: frozenset = frozenset()) -> str:
+    """
+    Filter chain fitting a frame inside width x height (letterboxed). With the source
+    sizes known, images already at the target size skip scaling and ones at the target
+    aspect ratio skip the pad. The frame rate is set with the -r output option rather
+    than an fps filter: the graph is rebuilt whenever the input image size changes,
+    which would reset an fps filter's state
+    """
+    if source_sizes and all(size == (width, height) for size in source_sizes):
+        return 'format=yuv420p'
+    if source_sizes and all(w * height == h * width for w, h in source_sizes):
+        return f'scale={width}:{height}:flags=bilinear,format=yuv420p'
+    return f'scale={width}:{height}:force_original_aspect_ratio=decrease:flags=bilinear,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,format=yuv420p'
+
+def create_video_with_ffmpeg(images: List[Dict], audio_file: str, video_path: str, 
+                           audio_duration: float, duration_per_image: float, 
+                           width: int, height: int, fps: int,
+                           preset: str = "ultrafast", crf: int = 23) -> Dict[str, Any]:
+    """
+    Enhanced video creation using FFmpeg with basic transitions
+    """
+    try:
+        print(f"[VIDEO] Using FFmpeg for video creation with crossfade transitions...")
         
-        print(f"[VIDEO] Created video with transitions: {os.path.basename(video_path)}")
+        gop = max(1, int(fps * duration_per_image))
+        transition_duration = min(0.5, duration_per_image * 0.2)  # 20% of segment duration, max 0.5s
         
-        # Now combine video with audio - use the original video_path as final path
-        temp_video_path = video_path.replace('.mp4', '_temp.mp4')
-        os.rename(video_path, temp_video_path)
+        usable_files = _usable_image_files(images)
+        if not usable_files:
+            raise Exception("No video clips could be created from images")
         
-        cmd_final = [
-            'ffmpeg', '-y',
-            '-i', temp_video_path,
+        # Each image holds the screen for a whole number of frames; crossfades are centred
+        # on the boundaries, so every input runs half a transition into its neighbours
+        durations = [count / fps for count in _frame_counts(audio_duration, len(usable_files), fps)]
+        half = transition_duration / 2 if len(usable_files) > 1 else 0
+        
+        # One FFmpeg pass: every image is a looped input, scaled and crossfaded in a
+        # single filter graph, encoded once and muxed with the audio
+        video_inputs = []
+        filter_parts = []
+        for i, (image_file, duration) in enumerate(zip(usable_files, durations)):
+            input_duration = duration + (half if i > 0 else 0) + (half if i < len(usable_files) - 1 else 0)
+            video_inputs.extend(['-loop', '1', '-framerate', str(fps), '-t', f'{input_duration:.6f}', '-i', image_file])
+            filter_parts.append(f"[{i}:v]{_scale_filter(width, height, _image_sizes([image_file]))},setsar=1,fps={fps}[s{i}]")
+        
+        # Chain crossfades: the k-th starts half a transition before boundary k
+        last_label = "s0"
+        boundary = 0.0
+        for i in range(1, len(usable_files)):
+            boundary += durations[i - 1]
+            filter_parts.append(f"[{last_label}][s{i}]xfade=transition=fade:duration={transition_duration}:offset={boundary - half:.6f}[x{i}]")
+            last_label = f"x{i}"
+        filter_complex = ";".join(filter_parts)
+        
+        cmd_video = lambda encoder_args: [
+            _FFMPEG_EXE, '-y'
+        ] + video_inputs + [
             '-i', audio_file,
-            '-c:v', 'copy',  # Don't re-encode video
-            '-c:a', 'aac',   # Encode audio as AAC
+            '-filter_complex', f"{filter_complex};[{last_label}]null{_hw_upload_filter(encoder_args)}[vout]",
+            '-map', '[vout]',
+            '-map', f'{len(usable_files)}:a:0',
+        ] + encoder_args + _audio_codec_args(audio_file) + [
+            '-t', str(audio_duration),
             '-shortest',     # Match shortest stream (should be same duration)
-            video_path  # Use original path as final output
+            video_path
         ]
         
-        print(f"[VIDEO] Combining video with audio...")
-        result = subprocess.run(cmd_final, capture_output=True, text=True, timeout=300)
+        print(f"[VIDEO] Running FFmpeg video creation with transitions...")
+        result = _run_encode(cmd_video, preset, crf, gop, timeout=300)
         
         if result.returncode != 0:
-            raise Exception(f"FFmpeg audio combination failed: {result.stderr}")
+            print(f"[WARNING] Crossfade failed, falling back to simple concatenation: {result.stderr}")
+            # Fallback to simple concatenation
+            return create_video_with_ffmpeg_simple(images, audio_file, video_path, audio_duration, duration_per_image, width, height, fps,
+                                                   preset=preset, crf=crf)
         
         print(f"[VIDEO] Final video created: {os.path.basename(video_path)}")
         
-        # Clean up temporary files
-        try:
-            os.remove(file_list_path)
-            os.remove(temp_video_path)  # Remove intermediate video
-        except:
-            pass
-        
         # Get final file info
         file_size = os.path.getsize(video_path)
         final_duration = get_video_duration(video_path)
@@ -367,7 +683,7 @@ def create_video_with_ffmpeg(images: List[Dict], audio_file: str, video_path: st
             "width": width,
             "height": height,
             "fps": fps,
-            "images_used": len(images),
+            "images_used": len(usable_files),
             "audio_attached": True,
             "method": "ffmpeg"
         }
@@ -377,84 +693,184 @@ def create_video_with_ffmpeg(images: List[Dict], audio_file: str, video_path: st
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+def _image_sequence_args(image_files: List[str], duration_per_image: float, work_dir: str) -> Optional[List[str]]:
+    """
+    FFmpeg input args reading the images as a numbered sequence (symlinked into
+    work_dir) at 1/duration_per_image fps; None if they differ in extension or
+    symlinks are unsupported
+    """
+    ext = os.path.splitext(image_files[0])[1].lower()
+    if any(os.path.splitext(image_file)[1].lower() != ext for image_file in image_files):
+        return None
+    try:
+        for i, image_file in enumerate(image_files):
+            os.symlink(image_file, os.path.join(work_dir, f"img_{i:03d}{ext}"))
+    except (OSError, NotImplementedError):
+        return None
+    return ['-framerate', f'1/{duration_per_image}', '-start_number', '0', '-i', os.path.join(work_dir, f'img_%03d{ext}')]
+
+def _write_concat_list(image_files: List[str], frame_counts: List[int], fps: int, work_dir: str) -> str:
+    """Write an FFmpeg concat demuxer list showing each image for its whole number of frames"""
+    file_list_path = os.path.join(work_dir, "files.txt")
+    with open(file_list_path, 'w') as f:
+        for image_file, count in zip(image_files, frame_counts):
+            f.write(f"file '{image_file}'\n")
+            f.write(f"duration {count / fps}\n")
+        # Add last image again to prevent FFmpeg from shortening the video
+        f.write(f"file '{image_files[-1]}'\n")
+    return file_list_path
+
 def create_video_with_ffmpeg_simple(images: List[Dict], audio_file: str, video_path: str, 
                                    audio_duration: float, duration_per_image: float, 
-                                   width: int, height: int, fps: int) -> Dict[str, Any]:
+                                   width: int, height: int, fps: int,
+                                   preset: str = "ultrafast", crf: int = 23) -> Dict[str, Any]:
     """
     Simple video creation using FFmpeg without transitions - fallback method
     """
+    if len(images) >= SHARD_MIN_IMAGES and (os.cpu_count() or 1) > 1:
+        result = create_video_ffmpeg_sharded(images, audio_file, video_path, audio_duration, duration_per_image, width, height, fps,
+                                             preset=preset, crf=crf)
+        if result.get("success"):
+            return result
+        print(f"[WARNING] Sharded encode failed ({result.get('error')}), encoding in one process...")
+    
     try:
         print(f"[VIDEO] Using simple FFmpeg concatenation (fallback)...")
-        output_dir = os.path.dirname(video_path)
-        
-        # Create temporary file list for FFmpeg
-        file_list_path = os.path.join(output_dir, f"files_{uuid.uuid4().hex[:8]}.txt")
-        
-        with open(file_list_path, 'w') as f:
-            for image_data in images:
-                image_file = image_data['image_file']
-                # Each image should be shown for duration_per_image seconds
-                f.write(f"file '{os.path.abspath(image_file)}'\n")
-                f.write(f"duration {duration_per_image}\n")
+        image_files = _usable_image_files(images)
+        if not image_files:
+            raise Exception("No images found to create video")
+        if len(image_files) != len(images):
+            duration_per_image = audio_duration / len(image_files)
+        
+        with tempfile.TemporaryDirectory(prefix='vidgen_') as work_dir:
+            # Show each image for duration_per_image via a numbered image sequence,
+            # or a concat list when the images cannot form one
+            input_args = _image_sequence_args(image_files, duration_per_image, work_dir)
+            if input_args is None:
+                frame_counts = _frame_counts(audio_duration, len(image_files), fps)
+                input_args = ['-f', 'concat', '-safe', '0', '-i', _write_concat_list(image_files, frame_counts, fps, work_dir)]
             
-            # Add last image again to prevent FFmpeg from shortening the video
-            if images:
-                last_image = images[-1]['image_file']
-                f.write(f"file '{os.path.abspath(last_image)}'\n")
-        
-        print(f"[VIDEO] Created file list: {file_list_path}")
-        
-        # FFmpeg command to create video from images
-        cmd_video = [
-            'ffmpeg', '-y',
-            '-f', 'concat',
-            '-safe', '0',
-            '-i', file_list_path,
-            '-vf', f'scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,fps={fps}',
-            '-c:v', 'libx264',
-            '-pix_fmt', 'yuv420p',
-            '-t', str(audio_duration),  # Match audio duration exactly
-            video_path
-        ]
-        
-        print(f"[VIDEO] Running simple FFmpeg video creation...")
-        result = subprocess.run(cmd_video, capture_output=True, text=True, timeout=300)
+            # Single FFmpeg pass: read images, scale/pad, encode and mux the audio
+            cmd_video = lambda encoder_args: [
+                _FFMPEG_EXE, '-y',
+            ] + input_args + [
+                '-i', audio_file,
+                '-filter_complex', f'[0:v]{_scale_filter(width, height, _image_sizes(image_files))}{_hw_upload_filter(encoder_args)}[v]',
+                '-map', '[v]',
+                '-map', '1:a',
+                '-r', str(fps),
+            ] + encoder_args + _audio_codec_args(audio_file) + [
+                '-shortest',     # Match shortest stream (the audio)
+                video_path
+            ]
+            
+            print(f"[VIDEO] Running simple FFmpeg video creation...")
+            result = _run_encode(cmd_video, preset, crf, max(1, int(fps * duration_per_image)), timeout=300)
         
         if result.returncode != 0:
             raise Exception(f"FFmpeg video creation failed: {result.stderr}")
         
-        print(f"[VIDEO] Created video: {os.path.basename(video_path)}")
+        print(f"[VIDEO] Final video created: {os.path.basename(video_path)}")
         
-        # Now combine video with audio - use the original video_path as final path
-        temp_video_path = video_path.replace('.mp4', '_temp.mp4')
-        os.rename(video_path, temp_video_path)
+        # Get final file info
+        file_size = os.path.getsize(video_path)
+        final_duration = get_video_duration(video_path)
         
-        cmd_final = [
-            'ffmpeg', '-y',
-            '-i', temp_video_path,
-            '-i', audio_file,
-            '-c:v', 'copy',  # Don't re-encode video
-            '-c:a', 'aac',   # Encode audio as AAC
-            '-shortest',     # Match shortest stream (should be same duration)
-            video_path  # Use original path as final output
-        ]
+        return {
+            "success": True,
+            "video_file": video_path,
+            "duration": final_duration,
+            "file_size": file_size,
+            "width": width,
+            "height": height,
+            "fps": fps,
+            "images_used": len(image_files),
+            "audio_attached": True,
+            "method": "ffmpeg_simple"
+        }
         
-        print(f"[VIDEO] Combining video with audio...")
-        result = subprocess.run(cmd_final, capture_output=True, text=True, timeout=300)
+    except subprocess.TimeoutExpired:
+        return {"success": False, "error": "FFmpeg operation timed out"}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+# Slideshows with at least this many images are encoded in parallel shards
+SHARD_MIN_IMAGES = int(os.environ.get("VIDEO_SHARD_MIN_IMAGES", "50"))
+
+def create_video_ffmpeg_sharded(images: List[Dict], audio_file: str, video_path: str, 
+                                audio_duration: float, duration_per_image: float, 
+                                width: int, height: int, fps: int,
+                                preset: str = "ultrafast", crf: int = 23,
+                                shards: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Simple (no transition) slideshow for long image lists: consecutive runs of images
+    are encoded by parallel FFmpeg processes, then the shards are joined with stream
+    copy and the audio muxed in. Shards use libx264 since hardware encoders cap
+    concurrent sessions; every shard starts on a keyframe so the copy-concat is valid
+    """
+    try:
+        image_files = _usable_image_files(images)
+        if not image_files:
+            raise Exception("No images found to create video")
+        if len(image_files) != len(images):
+            duration_per_image = audio_duration / len(image_files)
+        shards = max(1, min(shards or os.cpu_count() or 1, len(image_files)))
+        per_shard = -(-len(image_files) // shards)
+        bounds = [(start, min(start + per_shard, len(image_files))) for start in range(0, len(image_files), per_shard)]
+        encoder_args = _x264_args(preset, crf, max(1, int(fps * duration_per_image)),
+                                  threads=max(1, (os.cpu_count() or 1) // len(bounds)))
+        scale_filter = _scale_filter(width, height, _image_sizes(image_files))
+        frame_counts = _frame_counts(audio_duration, len(image_files), fps)
+        print(f"[VIDEO] Encoding {len(image_files)} images in {len(bounds)} parallel shards...")
+        
+        with tempfile.TemporaryDirectory(prefix='vidgen_') as work_dir:
+            def encode_shard(index):
+                start, end = bounds[index]
+                shard_dir = os.path.join(work_dir, f"shard_{index:03d}")
+                os.makedirs(shard_dir)
+                input_args = _image_sequence_args(image_files[start:end], duration_per_image, shard_dir)
+                if input_args is None:
+                    input_args = ['-f', 'concat', '-safe', '0', '-i', _write_concat_list(image_files[start:end], frame_counts[start:end], fps, shard_dir)]
+                frames = sum(frame_counts[start:end])
+                shard_path = shard_dir + ".mp4"
+                result = _run_ffmpeg([_FFMPEG_EXE, '-y'] + input_args + [
+                    '-vf', scale_filter,
+                    '-r', str(fps),
+                ] + encoder_args + [
+                    '-frames:v', str(frames),
+                    '-an',
+                    shard_path
+                ], timeout=300)
+                if result.returncode != 0:
+                    raise Exception(f"FFmpeg shard {index} failed: {result.stderr}")
+                return shard_path
+            
+            with ThreadPoolExecutor(max_workers=len(bounds)) as pool:
+                shard_paths = list(pool.map(encode_shard, range(len(bounds))))
+            
+            shard_list_path = os.path.join(work_dir, "shards.txt")
+            with open(shard_list_path, 'w') as f:
+                for shard_path in shard_paths:
+                    f.write(f"file '{shard_path}'\n")
+            
+            print(f"[VIDEO] Joining {len(shard_paths)} shards with audio...")
+            result = _run_ffmpeg([
+                _FFMPEG_EXE, '-y',
+                '-f', 'concat', '-safe', '0', '-i', shard_list_path,
+                '-i', audio_file,
+                '-map', '0:v:0',
+                '-map', '1:a:0',
+                '-c:v', 'copy',  # Shards are already encoded
+            ] + _audio_codec_args(audio_file) + [
+                '-shortest',
+                video_path
+            ], timeout=300)
         
         if result.returncode != 0:
-            raise Exception(f"FFmpeg audio combination failed: {result.stderr}")
+            raise Exception(f"FFmpeg shard concatenation failed: {result.stderr}")
         
         print(f"[VIDEO] Final video created: {os.path.basename(video_path)}")
         
-        # Clean up temporary files
-        try:
-            os.remove(file_list_path)
-            os.remove(temp_video_path)  # Remove intermediate video
-        except:
-            pass
-        
-        # Get final file info
         file_size = os.path.getsize(video_path)
         final_duration = get_video_duration(video_path)
         
@@ -466,9 +882,9 @@ def create_video_with_ffmpeg_simple(images: List[Dict], audio_file: str, video_p
             "width": width,
             "height": height,
             "fps": fps,
-            "images_used": len(images),
+            "images_used": len(image_files),
             "audio_attached": True,
-            "method": "ffmpeg_simple"
+            "method": "ffmpeg_sharded"
         }
         
     except subprocess.TimeoutExpired:
@@ -476,66 +892,120 @@ def create_video_with_ffmpeg_simple(images: List[Dict], audio_file: str, video_p
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-def get_audio_duration(audio_file: str) -> float:
-    """Get audio duration using FFprobe"""
+def _header_duration(media_file: str) -> Optional[float]:
+    """Duration read from the container headers with mutagen (no subprocess); None if unknown"""
+    if _MutagenFile is None:
+        return None
     try:
-        cmd = [
-            'ffprobe', '-v', 'quiet',
-            '-show_entries', 'format=duration',
-            '-of', 'default=noprint_wrappers=1:nokey=1',
-            audio_file
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-        else:
-            raise Exception("FFprobe failed")
-    except:
-        # Fallback estimation based on file size (very rough)
-        file_size = os.path.getsize(audio_file)
-        estimated_duration = file_size / 16000  # Rough estimation
-        print(f"[WARNING] Could not get exact audio duration, estimating: {estimated_duration:.1f}s")
-        return estimated_duration
+        media = _MutagenFile(media_file)
+        if media is not None and media.info.length > 0:
+            return media.info.length
+    except Exception:
+        pass
+    return None
 
-def get_video_duration(video_file: str) -> float:
-    """Get video duration using FFprobe"""
+def _ffprobe_duration(media_file: str) -> Optional[float]:
+    """Container duration reported by FFprobe; None if it is unavailable or fails"""
+    if not _FFPROBE_EXE:
+        return None
     try:
         cmd = [
-            'ffprobe', '-v', 'quiet',
+            _FFPROBE_EXE, '-v', 'quiet',
             '-show_entries', 'format=duration',
             '-of', 'default=noprint_wrappers=1:nokey=1',
-            video_file
+            media_file
         ]
         
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
         if result.returncode == 0:
             return float(result.stdout.strip())
-    except:
+    except Exception:
         pass
-    return 0.0
+    return None
 
-def check_ffmpeg_available() -> bool:
-    """Check if FFmpeg is available via imageio-ffmpeg or system"""
+@lru_cache(maxsize=32)
+def _audio_codec(audio_file: str, mtime: float) -> Optional[str]:
+    """Codec of the file's audio per (path, version): mutagen header, else FFprobe; None if unknown"""
+    if _MutagenFile is not None:
+        try:
+            media = _MutagenFile(audio_file)
+            if media is not None:
+                # MP4 reports e.g. "mp4a.40.2" (AAC-LC); raw ADTS streams load as mutagen.aac.AAC
+                if (getattr(media.info, 'codec', None) or '').startswith('mp4a.40') or type(media).__name__ == 'AAC':
+                    return 'aac'
+                return type(media).__name__.lower()
+        except Exception:
+            pass
+    if _FFPROBE_EXE:
+        try:
+            result = subprocess.run([
+                _FFPROBE_EXE, '-v', 'quiet',
+                '-select_streams', 'a:0',
+                '-show_entries', 'stream=codec_name',
+                '-of', 'default=noprint_wrappers=1:nokey=1',
+                audio_file
+            ], capture_output=True, text=True, timeout=30)
+            if result.returncode == 0 and result.stdout.strip():
+                return result.stdout.strip()
+        except Exception:
+            pass
+    return None
+
+def _audio_codec_args(audio_file: str) -> List[str]:
+    """Copy audio that is already AAC straight into the MP4; encode anything else to AAC"""
     try:
-        # First try imageio-ffmpeg (comes with MoviePy)
-        import imageio_ffmpeg as iio
-        ffmpeg_exe = iio.get_ffmpeg_exe()
-        result = subprocess.run([ffmpeg_exe, '-version'], capture_output=True, timeout=10)
-        if result.returncode == 0:
-            print(f"[FFMPEG] Found imageio-ffmpeg at: {ffmpeg_exe}")
-            return True
-    except Exception as e:
-        print(f"[FFMPEG] imageio-ffmpeg not available: {e}")
+        if _audio_codec(audio_file, os.path.getmtime(audio_file)) == 'aac':
+            return ['-c:a', 'copy']
+    except OSError:
+        pass
+    return ['-c:a', 'aac', '-b:a', '128k']
+
+def get_audio_duration(audio_file: str) -> float:
+    """Get audio duration from the file headers (mutagen), else FFprobe, else the MP3 frame header"""
+    duration = _header_duration(audio_file) or _ffprobe_duration(audio_file)
+    if duration:
+        return duration
+    
+    if audio_file.lower().endswith('.wav'):
+        try:
+            with wave.open(audio_file) as wav:
+                return wav.getnframes() / wav.getframerate()
+        except (wave.Error, EOFError, ZeroDivisionError):
+            pass
     
+    # MP3 frame header (Xing/Info frame count, or the CBR bitrate) parsed by hand;
+    # imported here because elevenlabs_audio imports this module
+    try:
+        try:
+            from .elevenlabs_audio import _mp3_duration
+        except ImportError:
+            from elevenlabs_audio import _mp3_duration
+        duration = _mp3_duration(audio_file)
+        if duration:
+            return duration
+    except ImportError:
+        pass
+    
+    # Last resort for unparseable files: estimate from size at 128 kbps
+    file_size = os.path.getsize(audio_file)
+    estimated_duration = file_size * 8 / 128000
+    print(f"[WARNING] Could not get exact audio duration, estimating: {estimated_duration:.1f}s")
+    return estimated_duration
+
+def get_video_duration(video_file: str) -> float:
+    """Get video duration from the MP4 headers (mutagen), else FFprobe; 0.0 if unknown"""
+    return _header_duration(video_file) or _ffprobe_duration(video_file) or 0.0
+
+@lru_cache(maxsize=1)
+def check_ffmpeg_available() -> bool:
+    """Check if FFmpeg (system or imageio-ffmpeg) is available; checked once per process"""
     try:
-        # Fallback to system FFmpeg
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, timeout=10)
+        result = subprocess.run([_FFMPEG_EXE, '-version'], capture_output=True, timeout=10)
         if result.returncode == 0:
-            print("[FFMPEG] Found system FFmpeg")
+            print(f"[FFMPEG] Found FFmpeg at: {_FFMPEG_EXE}")
             return True
     except Exception as e:
-        print(f"[FFMPEG] System FFmpeg not available: {e}")
+        print(f"[FFMPEG] FFmpeg not available: {e}")
     
     return False
 
@@ -582,7 +1052,7 @@ def add_captions_to_video(video_result: Dict[str, Any], images: List[Dict],
         
         # FFmpeg command to burn subtitles into video
         cmd_captions = [
-            'ffmpeg', '-y',
+            _FFMPEG_EXE, '-y',
             '-i', original_video,
             '-vf', f"subtitles={srt_file}:force_style='FontSize=24,PrimaryColour=&Hffffff,BackColour=&H80000000,Bold=1,Alignment=2'",
             '-c:a', 'copy',  # Copy audio without re-encoding
@@ -590,7 +1060,7 @@ def add_captions_to_video(video_result: Dict[str, Any], images: List[Dict],
         ]
         
         print(f"[CAPTIONS] Adding captions to video...")
-        result = subprocess.run(cmd_captions, capture_output=True, text=True, timeout=300)
+        result = _run_ffmpeg(cmd_captions, timeout=300)
         
         if result.returncode != 0:
             print(f"[WARNING] Caption overlay failed: {result.stderr}")
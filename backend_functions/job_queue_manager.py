@@ -7,8 +7,10 @@ import os
 import json
 import uuid
 import time
+import heapq
+import zlib
 import threading
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -19,6 +21,28 @@ class JobStatus(Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELLED = "cancelled"
+    DEAD_LETTER = "dead_letter"  # Exhausted retries, kept for manual inspection
+
+# Queue tiers by expected runtime - short jobs are never stuck behind long ones
+QUEUE_TIERS = ("short", "medium", "long")
+
+# Pixel rate (width * height * fps) above which a job is bumped up one tier
+HEAVY_RENDER_PIXEL_RATE = 1920 * 1080 * 30
+
+def classify_queue_tier(script_length: str = "medium", width: int = 1024,
+                        height: int = 576, fps: int = 24) -> str:
+    """Estimate the queue tier of a job from its generation parameters"""
+    tier_index = QUEUE_TIERS.index(script_length) if script_length in QUEUE_TIERS else 1
+    
+    # Heavy renders take noticeably longer to encode
+    if width * height * fps > HEAVY_RENDER_PIXEL_RATE:
+        tier_index = min(tier_index + 1, len(QUEUE_TIERS) - 1)
+    
+    return QUEUE_TIERS[tier_index]
+
+def domain_affinity_slot(domain: str, num_slots: int) -> int:
+    """Stable slot for a domain, so jobs of one domain land on the same worker"""
+    return zlib.crc32(domain.encode("utf-8")) % num_slots
 
 @dataclass
 class VideoJob:
@@ -47,11 +71,18 @@ class VideoJob:
     add_title_card: bool = True
     add_end_card: bool = True
     
+    # Queue tier ("short", "medium" or "long"), classified at enqueue
+    queue_tier: str = "medium"
+    
+    # Retry bookkeeping
+    attempts: int = 0
+    visible_after: Optional[datetime] = None  # Not dispatched before this time
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization"""
         data = asdict(self)
         # Convert datetime objects to ISO strings
-        for key in ['created_at', 'started_at', 'completed_at']:
+        for key in ['created_at', 'started_at', 'completed_at', 'visible_after']:
             if data[key] is not None:
                 data[key] = data[key].isoformat() if isinstance(data[key], datetime) else data[key]
         # Convert enum to string
@@ -62,8 +93,8 @@ class VideoJob:
     def from_dict(cls, data: Dict[str, Any]) -> 'VideoJob':
         """Create from dictionary (JSON deserialization)"""
         # Convert datetime strings back to datetime objects
-        for key in ['created_at', 'started_at', 'completed_at']:
-            if data[key] is not None and isinstance(data[key], str):
+        for key in ['created_at', 'started_at', 'completed_at', 'visible_after']:
+            if data.get(key) is not None and isinstance(data[key], str):
                 try:
                     data[key] = datetime.fromisoformat(data[key])
                 except:
@@ -84,7 +115,9 @@ class JobQueueManager:
                  queue_file: str = "job_queue.json",
                  job_map_file: str = "job_video_mapping.json",
                  max_concurrent_jobs: int = 2,
-                 auto_cleanup_hours: int = 24):
+                 auto_cleanup_hours: int = 24,
+                 progress_flush_interval: float = 0.5,
+                 refill_threshold: int = 5):
         
         self.queue_file = queue_file
         self.job_map_file = job_map_file
@@ -98,9 +131,27 @@ class JobQueueManager:
         # Thread lock for concurrent access
         self._lock = threading.Lock()
         
+        # Progress-only updates are coalesced in memory and written out by a
+        # background flusher instead of rewriting the files on every tick
+        self.progress_flush_interval = progress_flush_interval
+        self._dirty = False
+        self._flusher_thread = None
+        
+        # Queued-job counter kept in step with status transitions; the refill
+        # event fires when it drops below refill_threshold so the refiller
+        # reacts to consumption instead of polling queue status
+        self.refill_threshold = refill_threshold
+        self.refill_needed_event = threading.Event()
+        self._queued_count = 0
+        
         # Load existing data
         self._load_from_files()
         
+        self._queued_count = sum(1 for job in self._job_cache.values() 
+                                if job.status == JobStatus.QUEUED)
+        if self._queued_count < self.refill_threshold:
+            self.refill_needed_event.set()
+        
         print(f"[JOB QUEUE] Initialized with {len(self._job_cache)} existing jobs")
     
     def _load_from_files(self):
@@ -128,6 +179,7 @@ class JobQueueManager:
     
     def _save_to_files(self):
         """Save jobs and mappings to JSON files"""
+        self._dirty = False
         try:
             # Save job queue
             job_data = {}
@@ -144,11 +196,62 @@ class JobQueueManager:
         except Exception as e:
             print(f"[JOB QUEUE] Error saving to files: {e}")
     
+    @property
+    def queued_count(self) -> int:
+        """Number of jobs currently in QUEUED status"""
+        return self._queued_count
+    
+    def _set_status(self, job: VideoJob, status: JobStatus):
+        """Change a job's status, keeping the queued counter in step (call with lock held)"""
+        if job.status == status:
+            return
+        
+        if job.status == JobStatus.QUEUED:
+            self._queued_count -= 1
+            if self._queued_count < self.refill_threshold:
+                self.refill_needed_event.set()
+        elif status == JobStatus.QUEUED:
+            self._queued_count += 1
+        
+        job.status = status
+    
+    def _schedule_save(self):
+        """Mark state dirty so the background flusher persists it (call with lock held)"""
+        self._dirty = True
+        
+        if self._flusher_thread is None or not self._flusher_thread.is_alive():
+            self._flusher_thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher_thread.start()
+    
+    def _flush_loop(self):
+        """Persist coalesced progress updates every flush interval while dirty"""
+        while True:
+            time.sleep(self.progress_flush_interval)
+            with self._lock:
+                if not self._dirty:
+                    self._flusher_thread = None
+                    return
+                self._save_to_files()
+    
+    def flush(self):
+        """Write any pending progress updates to disk immediately"""
+        with self._lock:
+            if self._dirty:
+                self._save_to_files()
+    
     def add_job(self, topic: str, domain: str, **kwargs) -> str:
         """Add new job to queue"""
         with self._lock:
             job_id = str(uuid.uuid4())
             
+            if "queue_tier" not in kwargs:
+                kwargs["queue_tier"] = classify_queue_tier(
+                    kwargs.get("script_length", "medium"),
+                    kwargs.get("width", 1024),
+                    kwargs.get("height", 576),
+                    kwargs.get("fps", 24)
+                )
+            
             job = VideoJob(
                 job_id=job_id,
                 topic=topic,
@@ -159,9 +262,10 @@ class JobQueueManager:
             )
             
             self._job_cache[job_id] = job
+            self._queued_count += 1
             self._save_to_files()
             
-            print(f"[JOB QUEUE] Added job {job_id}: {topic}")
+            print(f"[JOB QUEUE] Added job {job_id} ({job.queue_tier}): {topic}")
             return job_id
     
     def get_job(self, job_id: str) -> Optional[VideoJob]:
@@ -177,7 +281,8 @@ class JobQueueManager:
                 return False
             
             job = self._job_cache[job_id]
-            job.status = status
+            status_changed = job.status != status
+            self._set_status(job, status)
             
             if progress is not None:
                 job.progress = progress
@@ -194,29 +299,187 @@ class JobQueueManager:
             elif status in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]:
                 job.completed_at = datetime.now()
             
-            self._save_to_files()
+            # Plain progress ticks are batched; state changes, errors and
+            # results are written through immediately
+            if status_changed or error is not None or result is not None:
+                self._save_to_files()
+            else:
+                self._schedule_save()
             return True
     
-    def get_next_job(self) -> Optional[VideoJob]:
-        """Get next queued job for processing"""
+    def get_next_job(self, tier: str = None, affinity: Tuple[int, int] = None) -> Optional[VideoJob]:
+        """
+        Get next queued job for processing
+        
+        Args:
+            tier: Only consider jobs in this queue tier (None = any tier)
+            affinity: (slot, num_slots) domain affinity, see get_next_batch
+        """
+        batch = self.get_next_batch(max_k=1, tier=tier, affinity=affinity)
+        return batch[0] if batch else None
+    
+    def get_next_batch(self, max_k: int = 1, tier: str = None,
+                       affinity: Tuple[int, int] = None,
+                       exclude_job_ids: Optional[set] = None,
+                       claim: bool = True) -> List[VideoJob]:
+        """
+        Get up to max_k queued jobs (oldest first) to process together
+        
+        The jobs are claimed (set to PROCESSING with started_at) under the same
+        lock that selects them, so workers sharing this manager never receive
+        the same job. Pass claim=False to only look at the queue.
+        
+        Args:
+            max_k: Maximum number of jobs to return (further capped by the
+                free max_concurrent_jobs slots)
+            tier: Only consider jobs in this queue tier (None = any tier)
+            affinity: (slot, num_slots) - prefer jobs whose domain maps to this
+                slot, falling back to any other job so idle workers still drain
+                bursty domains
+            exclude_job_ids: Jobs to ignore entirely, e.g. the caller's own
+                in-flight batch when prefetching its next one
+            claim: Mark the returned jobs PROCESSING before releasing the lock
+        """
+        exclude_job_ids = exclude_job_ids or set()
+        
         with self._lock:
-            # Check if we've reached max concurrent jobs
+            # Check if we've reached max concurrent jobs. A tier-pinned worker
+            # only competes with jobs of its own tier, so long jobs can't
+            # starve it.
             processing_count = sum(1 for job in self._job_cache.values() 
-                                 if job.status == JobStatus.PROCESSING)
+                                 if job.status == JobStatus.PROCESSING
+                                 and (tier is None or job.queue_tier == tier)
+                                 and job.job_id not in exclude_job_ids)
             
-            if processing_count >= self.max_concurrent_jobs:
-                return None
+            # Never hand out more jobs than there are free slots
+            max_k = min(max_k, self.max_concurrent_jobs - processing_count)
+            if max_k <= 0:
+                return []
             
-            # Find oldest queued job
+            # Find queued jobs, skipping retries still backing off
+            now = datetime.now()
             queued_jobs = [job for job in self._job_cache.values() 
-                          if job.status == JobStatus.QUEUED]
+                          if job.status == JobStatus.QUEUED
+                          and (tier is None or job.queue_tier == tier)
+                          and (job.visible_after is None or job.visible_after <= now)
+                          and job.job_id not in exclude_job_ids]
+            
+            if affinity:
+                slot, num_slots = affinity
+                preferred = [job for job in queued_jobs 
+                            if domain_affinity_slot(job.domain, num_slots) == slot]
+                batch = heapq.nsmallest(max_k, preferred, key=lambda j: j.created_at)
+                
+                # Steal from other domains to fill the batch
+                if len(batch) < max_k:
+                    others = [job for job in queued_jobs if job not in batch]
+                    batch += heapq.nsmallest(max_k - len(batch), others, key=lambda j: j.created_at)
+            else:
+                # Oldest first
+                batch = heapq.nsmallest(max_k, queued_jobs, key=lambda j: j.created_at)
+            
+            if claim and batch:
+                self._claim(batch)
+            return batch
+    
+    def claim_jobs(self, job_ids: List[str], tier: str = None) -> List[VideoJob]:
+        """
+        Claim previously looked-up jobs (see get_next_batch(claim=False))
+        
+        Under one lock, re-checks that each job is still queued and visible and
+        that max_concurrent_jobs has free slots, then claims as many as fit.
+        Returns the claimed jobs (possibly none).
+        """
+        with self._lock:
+            processing_count = sum(1 for job in self._job_cache.values()
+                                 if job.status == JobStatus.PROCESSING
+                                 and (tier is None or job.queue_tier == tier))
+            free_slots = self.max_concurrent_jobs - processing_count
+            if free_slots <= 0:
+                return []
+            
+            now = datetime.now()
+            jobs = [job for job in map(self._job_cache.get, job_ids)
+                    if job is not None and job.status == JobStatus.QUEUED
+                    and (job.visible_after is None or job.visible_after <= now)][:free_slots]
             
-            if not queued_jobs:
-                return None
+            if jobs:
+                self._claim(jobs)
+            return jobs
+    
+    def _claim(self, jobs: List[VideoJob]):
+        """Mark jobs as taken by a worker and persist it (call with lock held)"""
+        now = datetime.now()
+        for job in jobs:
+            self._set_status(job, JobStatus.PROCESSING)
+            job.started_at = now
+            job.progress = 0.0
+            job.message = "Claimed by worker, waiting to start"
+        self._save_to_files()
+    
+    def reenqueue(self, job_id: str, delay: float = 0, error: str = None) -> bool:
+        """Put a failed job back in the queue for another attempt after `delay` seconds"""
+        with self._lock:
+            if job_id not in self._job_cache:
+                return False
+            
+            job = self._job_cache[job_id]
+            job.attempts += 1
+            self._set_status(job, JobStatus.QUEUED)
+            job.progress = 0.0
+            job.started_at = None
+            job.visible_after = datetime.now() + timedelta(seconds=delay)
+            job.message = f"Retry {job.attempts} scheduled in {delay:.0f}s"
+            if error is not None:
+                job.error = error
             
-            # Sort by creation time
-            next_job = min(queued_jobs, key=lambda j: j.created_at)
-            return next_job
+            self._save_to_files()
+            print(f"[JOB QUEUE] Re-enqueued job {job_id} (attempt {job.attempts}, delay {delay:.0f}s)")
+            return True
+    
+    def move_to_dlq(self, job_id: str, error: str = None) -> bool:
+        """Move a job that exhausted its retries to the dead-letter queue"""
+        with self._lock:
+            if job_id not in self._job_cache:
+                return False
+            
+            job = self._job_cache[job_id]
+            self._set_status(job, JobStatus.DEAD_LETTER)
+            job.completed_at = datetime.now()
+            job.visible_after = None
+            job.message = f"Moved to dead-letter queue after {job.attempts + 1} attempts"
+            if error is not None:
+                job.error = error
+            
+            self._save_to_files()
+            print(f"[JOB QUEUE] Moved job {job_id} to dead-letter queue: {job.error}")
+            return True
+    
+    def list_dlq(self) -> List[Dict[str, Any]]:
+        """Get jobs in the dead-letter queue (newest first)"""
+        dead_jobs = [job for job in self._job_cache.values() 
+                    if job.status == JobStatus.DEAD_LETTER]
+        dead_jobs.sort(key=lambda j: j.completed_at or j.created_at, reverse=True)
+        return [job.to_dict() for job in dead_jobs]
+    
+    def replay_dlq_job(self, job_id: str) -> bool:
+        """Move a dead-lettered job back to the queue with a fresh retry budget"""
+        with self._lock:
+            job = self._job_cache.get(job_id)
+            if not job or job.status != JobStatus.DEAD_LETTER:
+                return False
+            
+            self._set_status(job, JobStatus.QUEUED)
+            job.attempts = 0
+            job.progress = 0.0
+            job.started_at = None
+            job.completed_at = None
+            job.visible_after = None
+            job.message = "Replayed from dead-letter queue"
+            
+            self._save_to_files()
+            print(f"[JOB QUEUE] Replayed job {job_id} from dead-letter queue")
+            return True
     
     def map_job_to_video(self, job_id: str, video_file_path: str):
         """Map completed job to its generated video file"""
@@ -235,6 +498,7 @@ class JobQueueManager:
             "total_jobs": len(self._job_cache),
             "by_status": {},
             "by_domain": {},
+            "by_tier": {},
             "processing_jobs": [],
             "next_jobs": [],
             "completed_videos": len(self._job_video_map)
@@ -251,12 +515,20 @@ class JobQueueManager:
             domain_counts[job.domain] = domain_counts.get(job.domain, 0) + 1
         status["by_domain"] = domain_counts
         
+        # Count queued jobs by tier
+        tier_counts = {tier: 0 for tier in QUEUE_TIERS}
+        for job in self._job_cache.values():
+            if job.status == JobStatus.QUEUED:
+                tier_counts[job.queue_tier] = tier_counts.get(job.queue_tier, 0) + 1
+        status["by_tier"] = tier_counts
+        
         # Currently processing jobs
         processing_jobs = [
             {
                 "job_id": job.job_id,
                 "topic": job.topic,
                 "domain": job.domain,
+                "queue_tier": job.queue_tier,
                 "progress": job.progress,
                 "message": job.message,
                 "started_at": job.started_at.isoformat() if job.started_at else None
@@ -277,6 +549,7 @@ class JobQueueManager:
                 "job_id": job.job_id,
                 "topic": job.topic,
                 "domain": job.domain,
+                "queue_tier": job.queue_tier,
                 "created_at": job.created_at.isoformat()
             }
             for job in next_jobs
@@ -374,7 +647,7 @@ class JobQueueManager:
             if job.status != JobStatus.QUEUED:
                 return False
             
-            job.status = JobStatus.CANCELLED
+            self._set_status(job, JobStatus.CANCELLED)
             job.completed_at = datetime.now()
             job.message = "Job cancelled by user"
             
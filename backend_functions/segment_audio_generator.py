@@ -5,45 +5,15 @@ Generates individual audio files for each story segment with proper timing
 
 import os
 import json
-import uuid
-import requests
-import datetime
 from typing import Dict, List, Any, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
 
-# Load environment variables
+# Voice configuration and generation come from the single elevenlabs_audio module;
+# import it under one name so the HTTP pool and TTS cache are shared process-wide
 try:
-    from dotenv import load_dotenv
-    # Load from parent directory (where .env is located)
-    env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
-    load_dotenv(env_path)
+    from .elevenlabs_audio import generate_audio, VOICE_MAP
 except ImportError:
-    pass  # dotenv not required
-
-# ElevenLabs configuration with multiple API key fallbacks
-ELEVENLABS_API_KEYS = [
-    os.getenv('ELEVENLABS_API_KEY'),
-    os.getenv('ELEVENLABS_API_KEY_2'), 
-    os.getenv('ELEVENLABS_API_KEY_3')
-]
-
-# Remove None values and invalid keys
-ELEVENLABS_API_KEYS = [key for key in ELEVENLABS_API_KEYS if key and key != 'sk_fallback_key']
-ELEVENLABS_BASE_URL = "https://api.elevenlabs.io/v1"
-
-# Updated voice mappings with tested working voices
-VOICE_MAP = {
-    'nova': 'pNInz6obpgDQGcFmaJgB',     # Adam - tested working
-    'alloy': '21m00Tcm4TlvDq8ikWAM',    # Rachel - tested working (high quality)
-    'echo': 'ErXwobaYiN019PkySvjV',     # Antoni - tested working
-    'fable': 'EXAVITQu4vr4xnSDxMaL',   # Bella - tested working
-    'rachel': '21m00Tcm4TlvDq8ikWAM',   # Rachel - recommended for video
-    'adam': 'pNInz6obpgDQGcFmaJgB',     # Adam - male voice
-    'bella': 'EXAVITQu4vr4xnSDxMaL',   # Bella - female voice
-    'antoni': 'ErXwobaYiN019PkySvjV',   # Antoni - male voice
-    'domi': 'AZnzlk1XvdvUeBnXmlld',    # Domi - female voice
-}
+    from elevenlabs_audio import generate_audio, VOICE_MAP
 
 # Voice characteristics mapped to Gemini's voice_tone options
 # Dynamic mapping based on character's gender and tone from Gemini
@@ -257,20 +227,15 @@ def generate_single_segment_audio(segment: Dict[str, Any], character_voices: Dic
     print(f"[SEGMENT {segment_number}] Generating with {voice_to_use} voice...")
     
     # Use the improved elevenlabs_audio module with API key fallback
-    import sys
-    import os
-    current_dir = os.path.dirname(__file__)
-    if current_dir not in sys.path:
-        sys.path.insert(0, current_dir)
-    
-    from elevenlabs_audio import generate_audio
-    
     result = generate_audio(text, voice_to_use, 1.0, output_dir)
     
     if result.get("success"):
-        # Get actual audio duration if possible
+        # Get actual audio duration if possible (already read from the MP3 headers unless estimated)
         filepath = result["audio_file"]
-        actual_duration = get_actual_audio_duration(filepath)
+        if result.get("duration_estimated", True):
+            actual_duration = get_actual_audio_duration(filepath)
+        else:
+            actual_duration = result["duration_seconds"]
         
         print(f"[SEGMENT {segment_number}] SUCCESS: {os.path.basename(filepath)} ({result['file_size']/1024:.1f} KB, {actual_duration:.1f}s)")
         print(f"[SEGMENT {segment_number}] API key used: {result.get('api_key_used', 'Unknown')}")
@@ -320,41 +285,6 @@ def get_voice_settings(segment_type: str, emotional_tone: str) -> Tuple[float, f
     
     return stability, similarity_boost, speed
 
-def generate_segment_audio_gtts_fallback(text: str, filepath: str, segment_number: int) -> Dict[str, Any]:
-    """Fallback audio generation using gTTS for a single segment"""
-    
-    try:
-        from gtts import gTTS
-        
-        print(f"[SEGMENT {segment_number}] Using gTTS fallback...")
-        
-        # Generate TTS
-        tts = gTTS(text=text, lang='en', slow=False)
-        tts.save(filepath)
-        
-        # Get file info
-        file_size = os.path.getsize(filepath)
-        actual_duration = get_actual_audio_duration(filepath)
-        
-        return {
-            "success": True,
-            "audio_file": filepath,
-            "filename": os.path.basename(filepath),
-            "duration_seconds": actual_duration,
-            "file_size": file_size,
-            "voice_used": "gtts_fallback",
-            "character": None,
-            "segment_type": "narrative",
-            "emotional_tone": "neutral",
-            "text_length": len(text),
-            "word_count": len(text.split())
-        }
-        
-    except ImportError:
-        return {"success": False, "error": "gTTS not available"}
-    except Exception as e:
-        return {"success": False, "error": f"gTTS failed: {e}"}
-
 def get_actual_audio_duration(audio_file: str) -> float:
     """Get actual audio duration using FFprobe"""
     
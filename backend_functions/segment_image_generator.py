@@ -15,6 +15,9 @@ import threading
 # Pollinations API configuration (correct URL format with trailing slash)
 POLLINATIONS_BASE_URL = "https://image.pollinations.ai/prompt/"
 
+# Shared session so consecutive image requests reuse the TCP/TLS connection
+_http_session = requests.Session()
+
 def generate_segment_images(script_data: Dict[str, Any], output_dir: str = ".", 
                           img_style_prompt: str = "cinematic, professional") -> Dict[str, Any]:
     """
@@ -144,7 +147,7 @@ def generate_single_image_simplified(segment: Dict[str, Any], image_prompt: str,
             'X-Request-ID': f"{uuid.uuid4().hex}_segment_{segment_number}"
         }
         
-        response = requests.get(full_url, timeout=60, headers=headers)
+        response = _http_session.get(full_url, timeout=60, headers=headers)
         
         if response.status_code != 200:
             raise Exception(f"HTTP {response.status_code}")
@@ -323,7 +326,7 @@ def generate_single_image(segment: Dict[str, Any], image_spec: Dict[str, Any],
             try:
                 print(f"[IMAGE {segment_number}-{image_number}] Trying model: {model_attempt}")
 
-                response = requests.get(
+                response = _http_session.get(
                     POLLINATIONS_BASE_URL,
                     params={
                         "prompt": enhanced_prompt,
@@ -355,123 +355,85 @@ def create_multi_image_video_ffmpeg(segment_number: int, images: List[Dict[str,
                                    width: int, height: int, fps: int) -> Dict[str, Any]:
     """Create video with multiple images using FFmpeg crossfades"""
     
-    # Calculate timing for each image
-    total_image_duration = sum(img.get("image_duration", 0) for img in images)
+    image_files = []
+    durations = []
+    for image_info in images:
+        image_file = image_info.get("image_file")
+        if not image_file or not os.path.exists(image_file):
+            continue
+        image_files.append(image_file)
+        durations.append(image_info.get("image_duration", 3.0))
+    
+    if not image_files:
+        raise Exception("No images available for segment video")
+    
+    # Stretch the available images' timing to cover the whole audio
+    total_image_duration = sum(durations)
     duration_ratio = audio_duration / total_image_duration if total_image_duration > 0 else 1.0
+    durations = [duration * duration_ratio for duration in durations]
     
-    # Create temporary clips for each image
-    temp_clips = []
-    temp_dir = os.path.dirname(video_path)
+    # Crossfades are centred on image boundaries, so inputs run half a transition past them
+    transition_duration = min(0.5, min(durations) / 2)
+    half = transition_duration / 2 if len(image_files) > 1 else 0
     
-    try:
-        for i, image_info in enumerate(images):
-            image_file = image_info.get("image_file")
-            if not os.path.exists(image_file):
-                continue
-            
-            adjusted_duration = image_info.get("image_duration", 3.0) * duration_ratio
-            clip_path = os.path.join(temp_dir, f'temp_seg_{segment_number}_clip_{i}.mp4')
-            
-            # Create individual clip
-            cmd_clip = [
-                'ffmpeg', '-y',
-                '-loop', '1',
-                '-i', image_file,
-                '-vf', f'scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,fps={fps}',
-                '-c:v', 'libx264',
-                '-t', str(adjusted_duration),
-                '-pix_fmt', 'yuv420p',
-                clip_path
-            ]
-            
-            result = subprocess.run(cmd_clip, capture_output=True, text=True, timeout=60)
-            if result.returncode == 0:
-                temp_clips.append(clip_path)
-        
-        if not temp_clips:
-            raise Exception("No temporary clips created")
-        
-        # Combine clips with crossfade transitions
-        if len(temp_clips) == 1:
-            # Single clip - just add audio
-            cmd_final = [
-                'ffmpeg', '-y',
-                '-i', temp_clips[0],
-                '-i', audio_file,
-                '-c:v', 'copy',
-                '-c:a', 'aac',
-                '-shortest',
-                video_path
-            ]
-        else:
-            # Multiple clips - create crossfade chain
-            transition_duration = 0.5
-            filter_complex = build_crossfade_filter(len(temp_clips), transition_duration)
-            
-            cmd_final = [
-                'ffmpeg', '-y'
-            ]
-            
-            # Add input files
-            for clip in temp_clips:
-                cmd_final.extend(['-i', clip])
-            
-            cmd_final.extend([
-                '-i', audio_file,
-                '-filter_complex', filter_complex,
-                '-map', f'[v{len(temp_clips)-1}]',
-                '-map', f'{len(temp_clips)}:a',
-                '-c:v', 'libx264',
-                '-c:a', 'aac',
-                '-shortest',
-                video_path
-            ])
-        
-        result = subprocess.run(cmd_final, capture_output=True, text=True, timeout=180)
-        
-        if result.returncode != 0:
-            raise Exception(f"Final FFmpeg command failed: {result.stderr}")
-        
-        return {
-            "success": True,
-            "video_file": video_path,
-            "filename": os.path.basename(video_path),
-            "duration_seconds": get_video_duration(video_path),
-            "file_size": os.path.getsize(video_path),
-            "width": width,
-            "height": height,
-            "fps": fps,
-            "images_used": len(images),
-            "has_transitions": True,
-            "creation_method": "ffmpeg_crossfade"
-        }
-        
-    finally:
-        # Clean up temporary clips
-        for clip_path in temp_clips:
-            try:
-                os.remove(clip_path)
-            except:
-                pass
-
-def build_crossfade_filter(clip_count: int, transition_duration: float) -> str:
-    """Build FFmpeg filter chain for crossfade transitions"""
+    # One FFmpeg pass: each image is a looped input, crossfaded in the filter graph,
+    # encoded once and muxed with the audio (no per-image temporary clips)
+    cmd = ['ffmpeg', '-y']
+    for i, (image_file, duration) in enumerate(zip(image_files, durations)):
+        input_duration = duration + (half if i > 0 else 0) + (half if i < len(image_files) - 1 else 0)
+        cmd.extend(['-loop', '1', '-framerate', str(fps), '-t', f'{input_duration:.6f}', '-i', image_file])
     
-    if clip_count <= 1:
-        return "[0:v]"
+    filter_complex, video_label = build_crossfade_filter(durations, transition_duration, width, height, fps)
+    cmd.extend([
+        '-i', audio_file,
+        '-filter_complex', filter_complex,
+        '-map', f'[{video_label}]',
+        '-map', f'{len(image_files)}:a',
+        '-c:v', 'libx264',
+        '-c:a', 'aac',
+        '-shortest',
+        video_path
+    ])
     
-    filter_parts = []
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
     
-    for i in range(clip_count - 1):
-        if i == 0:
-            # First transition
-            filter_parts.append(f"[0:v][1:v]xfade=transition=fade:duration={transition_duration}:offset=2[v1]")
-        else:
-            # Subsequent transitions
-            offset = 2 + (i * 2)  # Approximate offset
-            filter_parts.append(f"[v{i}][{i+1}:v]xfade=transition=fade:duration={transition_duration}:offset={offset}[v{i+1}]")
+    if result.returncode != 0:
+        raise Exception(f"Final FFmpeg command failed: {result.stderr}")
+    
+    return {
+        "success": True,
+        "video_file": video_path,
+        "filename": os.path.basename(video_path),
+        "duration_seconds": get_video_duration(video_path),
+        "file_size": os.path.getsize(video_path),
+        "width": width,
+        "height": height,
+        "fps": fps,
+        "images_used": len(image_files),
+        "has_transitions": len(image_files) > 1,
+        "creation_method": "ffmpeg_crossfade"
+    }
+
+def build_crossfade_filter(durations: List[float], transition_duration: float,
+                           width: int, height: int, fps: int) -> tuple:
+    """
+    Build the FFmpeg filter graph scaling each looped image input and chaining
+    crossfades centred on the image boundaries; returns (filter, output label)
+    """
+    half = transition_duration / 2
+    filter_parts = [
+        f"[{i}:v]scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps},format=yuv420p[s{i}]"
+        for i in range(len(durations))
+    ]
+    
+    last_label = "s0"
+    boundary = 0.0
+    for i in range(1, len(durations)):
+        boundary += durations[i - 1]
+        filter_parts.append(f"[{last_label}][s{i}]xfade=transition=fade:duration={transition_duration}:offset={boundary - half:.6f}[v{i}]")
+        last_label = f"v{i}"
     
-    return ";".join(filter_parts)
+    return ";".join(filter_parts), last_label
 
 def get_audio_duration(audio_file: str) -> float:
     """Get audio duration using FFprobe"""
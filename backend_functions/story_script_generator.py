@@ -18,18 +18,8 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "AIzaSyB2VLzqQbnSy0KloCMlk4IRXD6L9Q
 genai.configure(api_key=GEMINI_API_KEY)
 model = genai.GenerativeModel('gemini-1.5-flash')
 
-def generate_story_script(topic: str, script_length: str = "medium", include_dialogs: bool = True) -> Dict[str, Any]:
-    """
-    Generate an engaging story-driven script with variable-length segments
-    
-    Args:
-        topic: Main topic/theme for the story
-        script_length: "short" (3-4 segments), "medium" (5-7 segments), "long" (8-12 segments)
-        include_dialogs: Whether to include character dialogs in the narrative
-    
-    Returns:
-        Enhanced script data with story elements and flexible segment timing
-    """
+def _build_story_prompt(topic: str, script_length: str, include_dialogs: bool):
+    """Build the Gemini story prompt and length config for a single topic"""
     
     # Define story parameters based on length
     length_config = {
@@ -144,18 +134,38 @@ def generate_story_script(topic: str, script_length: str = "medium", include_dia
     Make this a truly engaging story that viewers will remember! Focus on emotional connection and visual storytelling.
     """
     
+    return prompt, config
+
+def _parse_json_response(response_text: str) -> Any:
+    """Strip markdown fences from a Gemini response and parse the JSON inside"""
+    response_text = response_text.strip()
+    
+    if "```json" in response_text:
+        response_text = response_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in response_text:
+        response_text = response_text.split("```")[1].split("```")[0].strip()
+    
+    return json.loads(response_text)
+
+def generate_story_script(topic: str, script_length: str = "medium", include_dialogs: bool = True) -> Dict[str, Any]:
+    """
+    Generate an engaging story-driven script with variable-length segments
+    
+    Args:
+        topic: Main topic/theme for the story
+        script_length: "short" (3-4 segments), "medium" (5-7 segments), "long" (8-12 segments)
+        include_dialogs: Whether to include character dialogs in the narrative
+    
+    Returns:
+        Enhanced script data with story elements and flexible segment timing
+    """
+    
+    prompt, config = _build_story_prompt(topic, script_length, include_dialogs)
+    
     try:
         # Generate with Gemini
         response = model.generate_content(prompt)
-        response_text = response.text.strip()
-        
-        # Clean JSON response
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        
-        story_data = json.loads(response_text)
+        story_data = _parse_json_response(response.text)
         
         # Process and enhance the story data
         processed_script = process_story_segments(story_data, topic, script_length)
@@ -168,6 +178,61 @@ def generate_story_script(topic: str, script_length: str = "medium", include_dia
         print(f"[STORY ERROR] Using enhanced fallback story generation...")
         return generate_fallback_story(topic, script_length, config, include_dialogs)
 
+def generate_story_scripts_batch(story_requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Generate several story scripts with a single Gemini call
+    
+    Args:
+        story_requests: List of dicts with "topic", "script_length" and "include_dialogs"
+    
+    Returns:
+        One processed script per request, in request order. Stories missing or
+        malformed in the batched response are regenerated individually.
+    """
+    
+    if len(story_requests) <= 1:
+        return [generate_story_script(**req) for req in story_requests]
+    
+    story_prompts = [
+        _build_story_prompt(req["topic"], req.get("script_length", "medium"), req.get("include_dialogs", True))[0]
+        for req in story_requests
+    ]
+    
+    batch_prompt = f"""
+    You will write {len(story_requests)} independent stories. Each story below has its own
+    requirements and JSON format. Return ONLY a valid JSON array containing exactly
+    {len(story_requests)} story objects, in the same order as the stories are listed.
+    """ + "".join(
+        f"\n\n=== STORY {i + 1} ===\n{story_prompt}" for i, story_prompt in enumerate(story_prompts)
+    )
+    
+    try:
+        response = model.generate_content(batch_prompt)
+        batch_data = _parse_json_response(response.text)
+        if not isinstance(batch_data, list):
+            raise ValueError("Batched response is not a JSON array")
+        print(f"[STORY] Batched script generation returned {len(batch_data)}/{len(story_requests)} stories")
+    except Exception as e:
+        print(f"[STORY ERROR] Batched Gemini call failed: {e}")
+        batch_data = []
+    
+    scripts = []
+    for i, req in enumerate(story_requests):
+        topic = req["topic"]
+        script_length = req.get("script_length", "medium")
+        
+        story_data = batch_data[i] if i < len(batch_data) else None
+        if isinstance(story_data, dict) and story_data.get("segments"):
+            try:
+                scripts.append(process_story_segments(story_data, topic, script_length))
+                continue
+            except Exception as e:
+                print(f"[STORY ERROR] Could not process batched story for '{topic}': {e}")
+        
+        scripts.append(generate_story_script(topic, script_length, req.get("include_dialogs", True)))
+    
+    return scripts
+
 def process_story_segments(story_data: Dict[str, Any], topic: str, script_length: str) -> Dict[str, Any]:
     """Process and enhance the generated story segments"""
     
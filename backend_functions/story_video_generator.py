@@ -7,12 +7,13 @@ import os
 import json
 import uuid
 import time
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Callable
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # Import all the new backend modules
 try:
-    from .story_script_generator import generate_story_script
+    from .story_script_generator import generate_story_script, generate_story_scripts_batch
     from .segment_audio_generator import generate_segment_audios
     from .segment_image_generator import generate_segment_images
     from .segment_video_creator import create_segment_videos
@@ -24,7 +25,7 @@ except ImportError:
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from story_script_generator import generate_story_script
+    from story_script_generator import generate_story_script, generate_story_scripts_batch
     from segment_audio_generator import generate_segment_audios
     from segment_image_generator import generate_segment_images
     from segment_video_creator import create_segment_videos
@@ -37,7 +38,8 @@ def generate_story_video(topic: str, script_length: str = "medium", voice: str =
                         img_style_prompt: str = "cinematic, professional",
                         include_dialogs: bool = True, use_different_voices: bool = True,
                         add_captions: bool = True, add_title_card: bool = True,
-                        add_end_card: bool = True, auto_cleanup: bool = False) -> Dict[str, Any]:
+                        add_end_card: bool = True, auto_cleanup: bool = False,
+                        script_result: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Generate a complete story video using the new segment-based approach
     
@@ -53,6 +55,7 @@ def generate_story_video(topic: str, script_length: str = "medium", voice: str =
         add_captions: Add subtitle overlay
         add_title_card: Add opening title card
         add_end_card: Add closing end card
+        script_result: Pre-generated story script (skips Gemini script generation)
     
     Returns:
         Complete results including final video and all intermediate files
@@ -96,7 +99,8 @@ def generate_story_video(topic: str, script_length: str = "medium", voice: str =
         print(f"[STORY VIDEO] Stage 1: Generating story script...")
         stage_start = time.time()
         
-        script_result = generate_story_script(topic, script_length, include_dialogs)
+        if script_result is None:
+            script_result = generate_story_script(topic, script_length, include_dialogs)
         
         if not script_result:
             raise Exception("Script generation failed")
@@ -119,16 +123,33 @@ def generate_story_video(topic: str, script_length: str = "medium", voice: str =
         
         print(f"[STORY VIDEO] Script: '{script_result.get('story_title')}' with {script_result.get('total_segments')} segments")
         
+        # Stages 2 and 3 only depend on the script, so segment images are
+        # fetched in the background while the audio is synthesized
+        image_stage_start = time.time()
+        image_executor = ThreadPoolExecutor(max_workers=1)
+        image_future = image_executor.submit(
+            generate_segment_images, script_result, output_dir, img_style_prompt
+        )
+        image_executor.shutdown(wait=False)
+        
         # Stage 2: Generate Audio for Each Segment
         print(f"[STORY VIDEO] Stage 2: Generating segment audio files...")
         stage_start = time.time()
         
-        audio_result = generate_segment_audios(
-            script_result, voice, output_dir, use_different_voices
-        )
-        
-        if not audio_result.get("success") or audio_result.get("segments_generated", 0) == 0:
-            raise Exception(f"Audio generation failed: {audio_result.get('error', 'Unknown error')}")
+        audio_done = False
+        try:
+            audio_result = generate_segment_audios(
+                script_result, voice, output_dir, use_different_voices
+            )
+            
+            if not audio_result.get("success") or audio_result.get("segments_generated", 0) == 0:
+                raise Exception(f"Audio generation failed: {audio_result.get('error', 'Unknown error')}")
+            audio_done = True
+        finally:
+            # On failure, stop the image fetch or wait it out, so it does not
+            # keep writing into the output directory of a failed job
+            if not audio_done and not image_future.cancel():
+                wait([image_future])
         
         # Save audio results
         audio_results_path = os.path.join(output_dir, "audio_results.json")
@@ -148,11 +169,11 @@ def generate_story_video(topic: str, script_length: str = "medium", voice: str =
         
         print(f"[STORY VIDEO] Audio: {audio_result.get('segments_generated')} segments ({audio_result.get('total_duration', 0):.1f}s total)")
         
-        # Stage 3: Generate Images for Each Segment
-        print(f"[STORY VIDEO] Stage 3: Generating segment images...")
-        stage_start = time.time()
+        # Stage 3: Generate Images for Each Segment (started alongside stage 2)
+        print(f"[STORY VIDEO] Stage 3: Waiting for segment images...")
+        stage_start = image_stage_start
         
-        image_result = generate_segment_images(script_result, output_dir, img_style_prompt)
+        image_result = image_future.result()
         
         if not image_result.get("success") or image_result.get("images_generated", 0) == 0:
             raise Exception(f"Image generation failed: {image_result.get('error', 'Unknown error')}")
@@ -354,6 +375,49 @@ def generate_story_video(topic: str, script_length: str = "medium", voice: str =
         
         return results
 
+def generate_story_video_batch(video_requests: List[Dict[str, Any]],
+                               on_video_start: Optional[Callable[[int], None]] = None,
+                               on_video_done: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """
+    Generate several story videos, sharing one Gemini call for all scripts
+    
+    Args:
+        video_requests: List of keyword-argument dicts for generate_story_video
+        on_video_start: Called with a request's index just before its video is
+            rendered (videos render one at a time, in request order)
+        on_video_done: Called with a request's index and result as soon as its
+            video has finished
+    
+    Returns:
+        One result dict per request, in request order. A video that raises gets
+        a failed result and the rest of the batch still renders.
+    """
+    
+    print(f"[STORY VIDEO] Starting batch of {len(video_requests)} videos")
+    
+    scripts = generate_story_scripts_batch([
+        {
+            "topic": req["topic"],
+            "script_length": req.get("script_length", "medium"),
+            "include_dialogs": req.get("include_dialogs", True)
+        }
+        for req in video_requests
+    ])
+    
+    results = []
+    for i, (req, script) in enumerate(zip(video_requests, scripts)):
+        if on_video_start:
+            on_video_start(i)
+        try:
+            result = generate_story_video(**req, script_result=script)
+        except Exception as e:
+            print(f"[STORY VIDEO] Batch video {i + 1} failed: {e}")
+            result = {"success": False, "error": str(e)}
+        results.append(result)
+        if on_video_done:
+            on_video_done(i, result)
+    return results
+
 def validate_system_requirements() -> Dict[str, Any]:
     """Validate that all required components are available"""
     
@@ -37,12 +37,14 @@ def main():
     try:
         # Import cleanup utilities
         from cleanup_utils import (
+            configure_logging,
             get_cleanup_stats, 
             cleanup_old_results, 
             cleanup_temporary_files,
             cleanup_result_folder,
             scheduled_cleanup
         )
+        configure_logging()
         
         print("AI Video Generator Cleanup Script")
         print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test Cloudflare storage record persistence
+Record changes go to an NDJSON log that is periodically compacted into the
+storage file; a restart must rebuild the same records from both.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The storage manager needs requests for its HTTP session
+pytest.importorskip("requests")
+
+from backend_functions.cloudflare_storage_manager import CloudflareStorageManager, UploadRecord
+
+def make_record(job_id: str, uploaded_at: str, size_mb: float = 1.0) -> UploadRecord:
+    """Storage record for a fake upload"""
+    return UploadRecord(
+        job_id=job_id,
+        cloudflare_id=f"cf_{job_id}",
+        cloudflare_url=f"https://watch.cloudflarestream.com/cf_{job_id}",
+        filename=f"{job_id}.mp4",
+        file_size=int(size_mb * 1024 * 1024),
+        size_mb=size_mb,
+        uploaded_at=uploaded_at,
+        local_file_path=f"/videos/{job_id}.mp4"
+    )
+
+def close_manager(manager: CloudflareStorageManager):
+    """Sync pending log lines and release the log file, as a shutdown would"""
+    manager.flush()
+    manager._log.close()
+
+def test_replay_after_compaction():
+    """Records written before and after a compaction all survive a restart"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        storage_file = os.path.join(work_dir, "cloudflare_storage.json")
+        manager = CloudflareStorageManager(storage_file=storage_file, save_flush_interval=60)
+
+        with manager._lock:
+            manager._put_record("a", make_record("a", "2026-01-01T00:00:00"))
+            manager._put_record("b", make_record("b", "2026-01-02T00:00:00"))
+
+            # Compact: records move to the storage file, the log is emptied
+            manager._save_storage_records()
+        assert os.path.getsize(manager.log_file) == 0
+
+        # Changes after the compaction only exist in the log
+        with manager._lock:
+            manager._put_record("c", make_record("c", "2026-01-03T00:00:00"))
+            manager._remove_record("a")
+            manager._put_record("b", make_record("b", "2026-01-04T00:00:00", size_mb=2.5))
+        close_manager(manager)
+
+        with open(manager.log_file, 'rb') as f:
+            assert len(f.read().splitlines()) == 4  # put c, del a, then del + put for the replaced b
+
+        restarted = CloudflareStorageManager(storage_file=storage_file, save_flush_interval=60)
+        assert sorted(restarted.storage_records) == ["b", "c"]
+        assert restarted.storage_records["b"].size_mb == 2.5
+        assert restarted.storage_records["b"].uploaded_at == "2026-01-04T00:00:00"
+
+        # The time index is rebuilt from the replayed records
+        assert [job_id for _, job_id in restarted._by_time] == ["c", "b"]
+        close_manager(restarted)
+
+        print("PASS: log replayed over compacted records")
+
+def test_torn_log_line_ignored():
+    """A partial last line from a crash mid-append is skipped on replay"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        storage_file = os.path.join(work_dir, "cloudflare_storage.json")
+        manager = CloudflareStorageManager(storage_file=storage_file, save_flush_interval=60)
+
+        with manager._lock:
+            manager._put_record("a", make_record("a", "2026-01-01T00:00:00"))
+        close_manager(manager)
+
+        with open(manager.log_file, 'ab') as f:
+            f.write(b'{"op":"put","id":"b","rec":{"job_')
+
+        restarted = CloudflareStorageManager(storage_file=storage_file, save_flush_interval=60)
+        assert sorted(restarted.storage_records) == ["a"]
+        close_manager(restarted)
+
+        print("PASS: torn log line ignored")
+
+def main():
+    """Main test function"""
+    print("CLOUDFLARE STORAGE LOG TEST")
+    print("=" * 60)
+
+    tests = [
+        test_replay_after_compaction,
+        test_torn_log_line_ignored
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL: {test.__name__} {e}")
+
+    print("=" * 60)
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
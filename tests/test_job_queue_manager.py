@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test Job Queue Manager state transitions
+Retry backoff, dead-letter queue and replay, and batch dispatch under the
+concurrency cap. Runs offline against a throwaway queue file.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend_functions.job_queue_manager import JobQueueManager, JobStatus
+
+def make_manager(work_dir: str, max_concurrent_jobs: int = 2) -> JobQueueManager:
+    """Job manager persisting to files inside work_dir"""
+    return JobQueueManager(
+        queue_file=os.path.join(work_dir, "job_queue.json"),
+        job_map_file=os.path.join(work_dir, "job_video_mapping.json"),
+        max_concurrent_jobs=max_concurrent_jobs
+    )
+
+def test_retry_dlq_replay():
+    """A failed job backs off, dead-letters after its retries, and replays with a fresh budget"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        manager = make_manager(work_dir)
+        job_id = manager.add_job("The story of Hanuman", "indian_mythology")
+
+        # First attempt is claimed, then fails and is retried after a backoff
+        assert [job.job_id for job in manager.get_next_batch(1)] == [job_id]
+        assert manager.reenqueue(job_id, delay=60, error="render failed")
+        job = manager.get_job(job_id)
+        assert job.status == JobStatus.QUEUED
+        assert job.attempts == 1
+        assert job.started_at is None
+        assert job.error == "render failed"
+
+        # Still backing off - not dispatched yet
+        assert manager.get_next_batch(1) == []
+
+        # Backoff over - dispatched again
+        assert manager.reenqueue(job_id, delay=0)
+        assert [job.job_id for job in manager.get_next_batch(1)] == [job_id]
+
+        # Retries exhausted - dead-lettered, listed, never dispatched
+        assert manager.move_to_dlq(job_id, error="still failing")
+        assert job.status == JobStatus.DEAD_LETTER
+        assert job.completed_at is not None
+        assert [entry["job_id"] for entry in manager.list_dlq()] == [job_id]
+        assert manager.list_dlq()[0]["status"] == "dead_letter"
+        assert manager.get_next_batch(1) == []
+
+        # Replay resets the retry budget and makes it dispatchable again
+        assert manager.replay_dlq_job(job_id)
+        assert job.status == JobStatus.QUEUED
+        assert job.attempts == 0
+        assert job.completed_at is None
+        assert manager.list_dlq() == []
+        assert not manager.replay_dlq_job(job_id)  # Only dead-lettered jobs replay
+        assert [job.job_id for job in manager.get_next_batch(1)] == [job_id]
+
+        # State survives a reload from disk
+        manager.flush()
+        reloaded = make_manager(work_dir)
+        assert reloaded.get_job(job_id).status == JobStatus.PROCESSING
+
+        print("PASS: retry -> dead-letter -> replay")
+
+def test_batch_honours_concurrency_cap():
+    """get_next_batch never hands out more jobs than free slots, and claims what it returns"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        manager = make_manager(work_dir, max_concurrent_jobs=2)
+        for i in range(5):
+            manager.add_job(f"Topic {i}", "science")
+
+        batch = manager.get_next_batch(max_k=3)
+        assert len(batch) == 2
+        assert all(job.status == JobStatus.PROCESSING and job.started_at for job in batch)
+        assert manager.queued_count == 3
+
+        # Cap reached: nothing more until a slot frees up
+        assert manager.get_next_batch(max_k=3) == []
+        manager.update_job_status(batch[0].job_id, JobStatus.COMPLETED)
+        assert len(manager.get_next_batch(max_k=3)) == 1
+
+        print("PASS: batch size clamped to free slots")
+
+def test_batch_claim_is_exclusive():
+    """Concurrent workers sharing one manager never receive the same job"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        manager = make_manager(work_dir, max_concurrent_jobs=4)
+        for i in range(8):
+            manager.add_job(f"Topic {i}", "history")
+
+        taken = []
+        taken_lock = threading.Lock()
+
+        def worker():
+            batch = manager.get_next_batch(max_k=3)
+            with taken_lock:
+                taken.extend(job.job_id for job in batch)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(taken) == 4
+        assert len(set(taken)) == 4
+
+        print("PASS: concurrent batches are disjoint")
+
+def test_prefetch_claim_rechecks():
+    """Jobs looked up without claiming are re-checked against the cap and their status when claimed"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        manager = make_manager(work_dir, max_concurrent_jobs=2)
+        for i in range(4):
+            manager.add_job(f"Topic {i}", "technology")
+
+        prefetched = [job.job_id for job in manager.get_next_batch(max_k=2, claim=False)]
+        assert len(prefetched) == 2
+        assert manager.queued_count == 4  # Looking does not claim
+
+        # Another worker takes the oldest prefetched job in the meantime
+        assert manager.get_next_batch(max_k=1)[0].job_id == prefetched[0]
+
+        claimed = manager.claim_jobs(prefetched)
+        assert [job.job_id for job in claimed] == [prefetched[1]]
+
+        # Cap now full - nothing else can be claimed
+        assert manager.claim_jobs([job.job_id for job in manager.get_next_batch(max_k=2, claim=False)]) == []
+
+        print("PASS: prefetched jobs are re-checked when claimed")
+
+def main():
+    """Main test function"""
+    print("JOB QUEUE MANAGER TEST")
+    print("=" * 60)
+
+    tests = [
+        test_retry_dlq_replay,
+        test_batch_honours_concurrency_cap,
+        test_batch_claim_is_exclusive,
+        test_prefetch_claim_rechecks
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL: {test.__name__} {e}")
+
+    print("=" * 60)
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test MP3 duration parsing from frame headers
+Builds MPEG-1 Layer III files of known length (CBR, and VBR with a Xing
+header) and checks the header parser used when mutagen is not installed.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# elevenlabs_audio builds its HTTP session from requests and urllib3 at import
+pytest.importorskip("requests")
+pytest.importorskip("urllib3")
+
+from backend_functions import elevenlabs_audio
+
+SAMPLE_RATE = 44100
+SAMPLES_PER_FRAME = 1152
+
+def frame_header(bitrate_index: int) -> bytes:
+    """MPEG-1 Layer III, no CRC, 44.1 kHz, no padding, joint stereo"""
+    return bytes((0xFF, 0xFB, bitrate_index << 4, 0x40))
+
+def frame_length(bitrate_kbps: int) -> int:
+    """Bytes in one unpadded MPEG-1 Layer III frame at 44.1 kHz"""
+    return 144 * bitrate_kbps * 1000 // SAMPLE_RATE
+
+def write_cbr(path: str, frames: int, bitrate_index: int = 9, bitrate_kbps: int = 128):
+    """CBR stream (128 kbps by default) behind an ID3v2 tag"""
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x10" + bytes(16)
+    frame = frame_header(bitrate_index) + bytes(frame_length(bitrate_kbps) - 4)
+    with open(path, 'wb') as f:
+        f.write(id3 + frame * frames)
+
+def write_vbr(path: str, frames: int):
+    """VBR stream whose first frame is a Xing header carrying the frame count"""
+    # Side information is 32 bytes for stereo MPEG-1, then the Xing tag
+    xing = b"Xing" + (1).to_bytes(4, 'big') + frames.to_bytes(4, 'big')
+    first = frame_header(9) + bytes(32) + xing
+    first += bytes(frame_length(128) - len(first))
+
+    # Mix of bitrates, so a bitrate-based estimate would be wrong
+    body = b"".join(
+        frame_header(index) + bytes(frame_length(kbps) - 4)
+        for index, kbps in ((5, 64), (11, 192), (1, 32)) * (frames // 3)
+    )
+    with open(path, 'wb') as f:
+        f.write(first + body)
+
+def header_duration(path: str) -> float:
+    """_mp3_duration using only the built-in header parser"""
+    mutagen_mp3 = elevenlabs_audio._MP3
+    elevenlabs_audio._MP3 = None
+    try:
+        return elevenlabs_audio._mp3_duration(path)
+    finally:
+        elevenlabs_audio._MP3 = mutagen_mp3
+
+def test_cbr_duration():
+    """A 128 kbps CBR file is timed from its bitrate"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "cbr.mp3")
+        frames = 1000
+        write_cbr(path, frames)
+
+        expected = frames * SAMPLES_PER_FRAME / SAMPLE_RATE  # ~26.1s
+        duration = header_duration(path)
+        assert duration is not None
+        assert abs(duration - expected) / expected < 0.01, f"{duration} != {expected}"
+
+        print(f"PASS: CBR duration {duration:.2f}s (expected {expected:.2f}s)")
+
+def test_low_bitrate_cbr_duration():
+    """A 32 kbps CBR file (gTTS, mp3_22050_32-style) is not timed as 128 kbps"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "cbr32.mp3")
+        frames = 300
+        write_cbr(path, frames, bitrate_index=1, bitrate_kbps=32)
+
+        expected = frames * SAMPLES_PER_FRAME / SAMPLE_RATE
+        duration = header_duration(path)
+        assert duration is not None
+        assert abs(duration - expected) / expected < 0.01, f"{duration} != {expected}"
+
+        print(f"PASS: 32 kbps CBR duration {duration:.2f}s (expected {expected:.2f}s)")
+
+def test_vbr_duration():
+    """A VBR file is timed from the Xing frame count, not the first frame's bitrate"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "vbr.mp3")
+        frames = 600
+        write_vbr(path, frames)
+
+        expected = frames * SAMPLES_PER_FRAME / SAMPLE_RATE
+        duration = header_duration(path)
+        assert duration is not None
+        assert abs(duration - expected) < 1e-6, f"{duration} != {expected}"
+
+        print(f"PASS: VBR duration {duration:.2f}s (expected {expected:.2f}s)")
+
+def test_not_mp3():
+    """Files without an MPEG audio frame return None"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "noise.mp3")
+        with open(path, 'wb') as f:
+            f.write(b"not an mp3 file" * 100)
+
+        assert header_duration(path) is None
+
+        print("PASS: non-MP3 input returns None")
+
+def main():
+    """Main test function"""
+    print("MP3 DURATION TEST")
+    print("=" * 60)
+
+    tests = [
+        test_cbr_duration,
+        test_low_bitrate_cbr_duration,
+        test_vbr_duration,
+        test_not_mp3
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL: {test.__name__} {e}")
+
+    print("=" * 60)
+    print(f"{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)